@@ -1,4 +1,5 @@
-from flask import Flask
+import time
+from flask import Flask, g, request
 from pathlib import Path
 
 
@@ -27,6 +28,23 @@ def create_app() -> Flask:
     from app.routes import api
     app.register_blueprint(api.bp)
 
+    from app.services import metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("request_started")
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            metrics.REQUEST_LATENCY.observe(
+                time.perf_counter() - started, route, request.method
+            )
+            metrics.REQUESTS.inc(route, request.method, response.status_code)
+        return response
+
     @app.route("/")
     def index():
         """Serve the main PWA page."""
@@ -1,6 +1,10 @@
 import os
+from pathlib import Path
+
 from dotenv import load_dotenv
 
+BASE_DIR = Path(__file__).parent.parent
+
 
 def load_env() -> None:
     """Load environment variables from .env file."""
@@ -17,9 +21,132 @@ class Config:
     SECRET_KEY: str = os.getenv("FLASK_SECRET_KEY", "dev-secret-key")
     VAPID_PUBLIC_KEY: str = os.getenv("VAPID_PUBLIC_KEY", "")
     VAPID_PRIVATE_KEY: str = os.getenv("VAPID_PRIVATE_KEY", "")
+    VAPID_SUBJECT: str = os.getenv("VAPID_SUBJECT", "mailto:admin@example.com")
+    # Lifetime of a signed VAPID token; RFC 8292 caps it at 24 hours
+    VAPID_TOKEN_TTL: int = int(os.getenv("VAPID_TOKEN_TTL", str(12 * 60 * 60)))
     BOT_JWT_SECRET: str = os.getenv("BOT_JWT_SECRET", "")
+    # Require "Authorization: Bearer <bot JWT>" on the send endpoints
+    REQUIRE_BOT_JWT: bool = os.getenv("REQUIRE_BOT_JWT", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # Extra signing keys by kid ("kid1:secret1,kid2:secret2") for rotation;
+    # BOT_JWT_SECRET still verifies tokens without a kid
+    BOT_JWT_KEYS: str = os.getenv("BOT_JWT_KEYS", "")
+    # Kid used by generate_bot_jwt (empty signs with BOT_JWT_SECRET)
+    BOT_JWT_ACTIVE_KID: str = os.getenv("BOT_JWT_ACTIVE_KID", "")
+    # Verified tokens remembered until their exp
+    BOT_JWT_CACHE_SIZE: int = int(os.getenv("BOT_JWT_CACHE_SIZE", "1024"))
     JWT_SECRET: str = os.getenv("JWT_SECRET", "dummy-secret")
+    # Comma-separated CIDR blocks, addresses or dotted prefixes ("192.168.12.")
     ALLOWED_BOT_IPS: str = os.getenv("ALLOWED_BOT_IPS", "")
+    # Clients allowed to scrape /api/metrics (empty: same as ALLOWED_BOT_IPS)
+    METRICS_ALLOWED_IPS: str = os.getenv("METRICS_ALLOWED_IPS", "")
+    # Reverse proxies whose X-Forwarded-For is believed (same syntax)
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1")
+
+    # Subscription storage: "sqlite" (default) or the legacy "json" file
+    SUBSCRIPTION_STORE: str = os.getenv("SUBSCRIPTION_STORE", "sqlite")
+    SUBSCRIPTIONS_DB: str = os.getenv(
+        "SUBSCRIPTIONS_DB", str(BASE_DIR / "subscriptions.db")
+    )
+    SUBSCRIPTIONS_FILE: str = os.getenv(
+        "SUBSCRIPTIONS_FILE", str(BASE_DIR / "subscriptions.json")
+    )
+    # Seconds between checks for subscription changes made by other processes
+    # (writes in this process are seen immediately)
+    SUBSCRIPTION_CACHE_CHECK_INTERVAL: float = float(
+        os.getenv("SUBSCRIPTION_CACHE_CHECK_INTERVAL", "1")
+    )
+    # Devices kept per user; registering another evicts the least recently seen
+    MAX_DEVICES_PER_USER: int = int(os.getenv("MAX_DEVICES_PER_USER", "10"))
+
+    # Broadcast fan-out: worker pool size and in-flight limit per push host
+    BROADCAST_MAX_WORKERS: int = int(os.getenv("BROADCAST_MAX_WORKERS", "32"))
+    PUSH_HOST_CONCURRENCY: int = int(os.getenv("PUSH_HOST_CONCURRENCY", "8"))
+    # e.g. "web.push.apple.com=16,fcm.googleapis.com=32"
+    PUSH_HOST_CONCURRENCY_OVERRIDES: str = os.getenv(
+        "PUSH_HOST_CONCURRENCY_OVERRIDES", ""
+    )
+
+    # Large broadcasts are split across worker processes so encryption can use
+    # every core: "auto" (one per CPU), a number, or 0/1 to stay in-process
+    BROADCAST_PROCESSES: str = os.getenv("BROADCAST_PROCESSES", "auto")
+    # Fewest subscriptions per process worth the cost of starting one
+    BROADCAST_SHARD_MIN_SIZE: int = int(os.getenv("BROADCAST_SHARD_MIN_SIZE", "1000"))
+
+    # Retries for 429/5xx/network failures (exponential backoff with jitter)
+    PUSH_MAX_ATTEMPTS: int = int(os.getenv("PUSH_MAX_ATTEMPTS", "4"))
+    PUSH_RETRY_BASE_DELAY: float = float(os.getenv("PUSH_RETRY_BASE_DELAY", "1"))
+    PUSH_RETRY_MAX_DELAY: float = float(os.getenv("PUSH_RETRY_MAX_DELAY", "60"))
+
+    # Expired (404/410) subscriptions are deleted in batches of this size
+    PRUNE_BATCH_SIZE: int = int(os.getenv("PRUNE_BATCH_SIZE", "100"))
+
+    # Keep-alive connection pool per push-service origin
+    PUSH_POOL_SIZE: int = int(os.getenv("PUSH_POOL_SIZE", "16"))
+    PUSH_POOL_IDLE_TIMEOUT: float = float(os.getenv("PUSH_POOL_IDLE_TIMEOUT", "90"))
+    PUSH_TIMEOUT: float = float(os.getenv("PUSH_TIMEOUT", "10"))
+    # TTL header for messages that do not set one; 0 delivers only to devices
+    # that are online, larger values let the push service hold the message
+    PUSH_DEFAULT_TTL: int = int(os.getenv("PUSH_DEFAULT_TTL", "0"))
+
+    # Most notifications accepted by one /api/send-notifications/batch request
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+    # Token-bucket rate limits on bot requests (per minute, plus a burst);
+    # a rate of 0 disables that limit
+    BOT_RATE_PER_MINUTE: float = float(os.getenv("BOT_RATE_PER_MINUTE", "600"))
+    BOT_RATE_BURST: int = int(os.getenv("BOT_RATE_BURST", "60"))
+    # Broadcasts and tag sends, per bot, on top of the bot limit
+    BROADCAST_RATE_PER_MINUTE: float = float(
+        os.getenv("BROADCAST_RATE_PER_MINUTE", "2")
+    )
+    BROADCAST_RATE_BURST: int = int(os.getenv("BROADCAST_RATE_BURST", "5"))
+    # Notifications to one recipient, from all bots together
+    RECIPIENT_RATE_PER_MINUTE: float = float(
+        os.getenv("RECIPIENT_RATE_PER_MINUTE", "30")
+    )
+    RECIPIENT_RATE_BURST: int = int(os.getenv("RECIPIENT_RATE_BURST", "10"))
+    # "memory" (per process) or "sqlite" to share buckets between workers
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_DB: str = os.getenv("RATE_LIMIT_DB", str(BASE_DIR / "ratelimit.db"))
+
+    # Repeated bot requests (same Idempotency-Key, or same fields) within this
+    # many seconds return the original job instead of sending again. Covers
+    # the +/-5 minute timestamp window.
+    REPLAY_WINDOW_SECONDS: float = float(os.getenv("REPLAY_WINDOW_SECONDS", "600"))
+    REPLAY_CACHE_MAX_ENTRIES: int = int(os.getenv("REPLAY_CACHE_MAX_ENTRIES", "100000"))
+
+    # Background delivery queue
+    JOBS_DB: str = os.getenv("JOBS_DB", str(BASE_DIR / "jobs.db"))
+    DELIVERY_WORKERS: int = int(os.getenv("DELIVERY_WORKERS", "2"))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    # /api/jobs/<id>/events: seconds between checks of jobs running in other
+    # processes, and between keep-alive comments on an idle stream
+    PROGRESS_POLL_INTERVAL: float = float(os.getenv("PROGRESS_POLL_INTERVAL", "1"))
+    PROGRESS_KEEPALIVE_SECONDS: float = float(
+        os.getenv("PROGRESS_KEEPALIVE_SECONDS", "15")
+    )
+    # Open event streams per worker process. Each holds a request thread, so
+    # keep this well below WEB_THREADS; further watchers get 503 and can poll.
+    PROGRESS_MAX_STREAMS: int = int(os.getenv("PROGRESS_MAX_STREAMS", "4"))
+
+    # "sqlite" shares remembered requests between worker processes (a retry
+    # may reach any of them); "memory" is per process. The keys live next to
+    # the jobs they point to unless REPLAY_CACHE_DB says otherwise.
+    REPLAY_CACHE_BACKEND: str = os.getenv("REPLAY_CACHE_BACKEND", "sqlite")
+    REPLAY_CACHE_DB: str = os.getenv("REPLAY_CACHE_DB", JOBS_DB)
+
+    # Production server (main.py --production): worker processes, request
+    # threads per worker, and seconds a stopping worker waits for in-flight
+    # requests and, at the same time, for in-flight deliveries
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", "2"))
+    WEB_THREADS: int = int(os.getenv("WEB_THREADS", "8"))
+    # Whole seconds: it becomes gunicorn's graceful_timeout, an integer setting
+    REQUEST_DRAIN_SECONDS: int = int(os.getenv("REQUEST_DRAIN_SECONDS", "10"))
+    SHUTDOWN_DRAIN_SECONDS: float = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "30"))
 
 class DevelopmentConfig(Config):
     DEBUG = True
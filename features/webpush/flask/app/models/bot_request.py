@@ -1,26 +1,109 @@
+import time
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    Field,
+    StrictFloat,
+    StrictInt,
+    ValidationInfo,
+    field_validator,
+)
 
+from app.services.push_options import MAX_TTL, TOPIC_PATTERN, PushOptions
 
-class BotNotificationRequest(BaseModel):
-    """Model for bot notification request."""
+Urgency = Literal["very-low", "low", "normal", "high"]
+
+# Furthest ahead a notification may be scheduled, in seconds (30 days)
+MAX_SCHEDULE_SECONDS = 30 * 24 * 3600
+
+# Unix time in milliseconds as a JSON integer or float (not a string or
+# boolean), checked entirely by pydantic-core
+TimestampMs = Annotated[StrictInt | StrictFloat, Field(alias="timestamp")]
+
+
+class DeliveryOptionsMixin(BaseModel):
+    """Optional Web Push TTL, Urgency and Topic of a notification."""
+
+    ttl: int | None = Field(None, ge=0, le=MAX_TTL)
+    urgency: Urgency | None = None
+    topic: str | None = Field(None, pattern=TOPIC_PATTERN)
+
+    def push_options(self) -> PushOptions:
+        """Return the delivery options as a ``PushOptions``."""
+        return PushOptions(self.ttl, self.urgency, self.topic)
+
+
+class ScheduleMixin(BaseModel):
+    """Optional delayed delivery, at an absolute time or after a delay."""
+
+    send_at_ms: int | None = Field(None, alias="send_at", ge=0)
+    delay_seconds: float | None = Field(None, ge=0, le=MAX_SCHEDULE_SECONDS)
+
+    @field_validator("send_at_ms")
+    @classmethod
+    def check_send_at(cls, v):
+        """Reject times further ahead than MAX_SCHEDULE_SECONDS."""
+        if v is not None and v / 1000 - time.time() > MAX_SCHEDULE_SECONDS:
+            raise ValueError(
+                f"must be at most {MAX_SCHEDULE_SECONDS} seconds in the future"
+            )
+        return v
+
+    @field_validator("delay_seconds")
+    @classmethod
+    def check_single_schedule(cls, v, info: ValidationInfo):
+        """Allow only one of send_at and delay_seconds."""
+        if v is not None and info.data.get("send_at_ms") is not None:
+            raise ValueError("use either send_at or delay_seconds, not both")
+        return v
+
+    def run_at(self, now: float) -> float | None:
+        """Return the Unix time to deliver at, or None for immediately."""
+        if self.delay_seconds:
+            return now + self.delay_seconds
+        if self.send_at_ms is not None and self.send_at_ms / 1000 > now:
+            return self.send_at_ms / 1000
+        return None
+
+
+class BotNotificationRequest(DeliveryOptionsMixin, ScheduleMixin):
+    """Model for bot notification request.
+
+    Validate request bodies with ``model_validate_json``: pydantic-core
+    parses the JSON straight into the model without building a dict first.
+    """
 
     bot_id: str
     title: str
     content: str
-    timestamp_ms: int = Field(..., alias="timestamp")
+    timestamp_ms: TimestampMs
+    recipient_external_id: str | None = None
+    tags: str | None = None
 
-    @field_validator("timestamp_ms", mode="before")
-    @classmethod
-    def convert_timestamp(cls, v):
-        """Convert timestamp to milliseconds if needed."""
-        if isinstance(v, (int, float)):
-            return int(v)
-        raise ValueError("timestamp must be an integer or float")
+    model_config = {"populate_by_name": True}
+
+
+class BatchEnvelope(ScheduleMixin):
+    """Sender fields validated once for a whole notification batch."""
+
+    bot_id: str
+    timestamp_ms: TimestampMs
 
     model_config = {"populate_by_name": True}
 
 
+class BatchNotificationItem(DeliveryOptionsMixin):
+    """One personalised notification in a batch."""
+
+    recipient_external_id: str = Field(
+        ..., validation_alias=AliasChoices("recipient", "recipient_external_id")
+    )
+    title: str
+    content: str
+
+
 class BotAuthResponse(BaseModel):
     """Response for bot authentication."""
 
@@ -1,17 +1,61 @@
+import json
 import logging
+import math
+import threading
+import time
+from typing import Any
 
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
+from pydantic import ValidationError
 
 from app.config import Config
-from app.models.bot_request import BotNotificationRequest
+from app.models.bot_request import (
+    BatchEnvelope,
+    BatchNotificationItem,
+    BotNotificationRequest,
+)
+from app.services import metrics
 from app.services.auth_service import AuthService
+from app.services.idempotency import fingerprint, get_replay_cache
+from app.services.progress import FINAL_STATUSES
 from app.services.push_service import PushService
-from app.utils.security import get_client_ip, validate_ip_prefix, validate_timestamp
+from app.services.rate_limit import get_rate_limiter
+from app.services.tags import parse_tag_expression
+from app.utils.security import get_client_ip, validate_ip_allowlist, validate_timestamp
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 
+# Seconds a watcher turned away from a full event stream limit should wait
+STREAM_RETRY_AFTER = 5
+
+# Event streams open in this process (capped at PROGRESS_MAX_STREAMS)
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+
+def _acquire_stream() -> bool:
+    """Take a stream slot if fewer than PROGRESS_MAX_STREAMS are open."""
+    global _open_streams
+    with _open_streams_lock:
+        if _open_streams >= Config.PROGRESS_MAX_STREAMS:
+            return False
+        _open_streams += 1
+        return True
+
+
+def _release_stream() -> None:
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams -= 1
+
+
+@bp.before_app_request
+def start_delivery_workers():
+    """Resume background delivery (idempotent; also done by main.py at boot)."""
+    PushService.get_queue().start()
+
 
 @bp.route("/config", methods=["GET"])
 def get_config():
@@ -28,37 +72,171 @@ def get_config():
     )
 
 
+def _reserve_replay_key(bot_id: str, timestamp_ms: int, request_fingerprint: str):
+    """Claim this request's replay key, or answer a repeated request.
+
+    The key is the Idempotency-Key header (scoped to the bot) if sent, so a
+    retry signed with a new timestamp still matches. Otherwise it is the
+    request fingerprint together with the timestamp.
+
+    Returns:
+        (key, None) if the request is new and the caller must complete the
+        key, or (key, response) for a repeated request
+    """
+    header = request.headers.get("Idempotency-Key", "").strip()
+    if header:
+        key = f"{bot_id}:{header}"
+    else:
+        key = fingerprint(request_fingerprint, timestamp_ms)
+    entry = get_replay_cache().reserve(key, request_fingerprint)
+    if entry is None:
+        return key, None
+
+    if entry.fingerprint != request_fingerprint:
+        return key, (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Idempotency-Key was already used for a different request",
+                }
+            ),
+            422,
+        )
+    if entry.job_id is None:
+        return key, (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "An identical request is still being processed",
+                }
+            ),
+            409,
+        )
+
+    logger.info(f"Repeated request from bot {bot_id} answered with job {entry.job_id}")
+    return key, (
+        jsonify(
+            {
+                "success": True,
+                "message": "Duplicate request; notification was already accepted",
+                "duplicate": True,
+                "job_id": entry.job_id,
+                "job": PushService.get_queue().get(entry.job_id),
+            }
+        ),
+        200,
+    )
+
+
+def _check_bot_jwt(bot_id: str):
+    """Enforce the bot JWT when REQUIRE_BOT_JWT is set.
+
+    The token comes from "Authorization: Bearer <token>" and must carry the
+    request's bot_id.
+
+    Returns:
+        None if the request may proceed, otherwise a 401 response
+    """
+    if not Config.REQUIRE_BOT_JWT:
+        return None
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        error = "Missing bot token"
+    else:
+        import jwt
+
+        try:
+            claims = AuthService.validate_bot_jwt(token.strip())
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Invalid bot token for {bot_id}: {e}")
+            error = "Invalid or expired bot token"
+        else:
+            if claims.get("bot_id") == bot_id:
+                return None
+            logger.warning(f"Bot token for {claims.get('bot_id')} used by {bot_id}")
+            error = "Bot token does not match bot_id"
+
+    response = jsonify({"success": False, "error": error})
+    response.headers["WWW-Authenticate"] = "Bearer"
+    return response, 401
+
+
+def _rate_limited(retry_after: float, error: str):
+    """Build a 429 response telling the bot when to retry."""
+    response = jsonify(
+        {
+            "success": False,
+            "error": error,
+            "retry_after": math.ceil(retry_after),
+        }
+    )
+    response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response, 429
+
+
 @bp.route("/send-notification", methods=["POST"])
 def send_bot_notification():
     """Endpoint for bots to send push notifications.
 
     This endpoint validates:
-    1. IP address matches allowed prefix
+    1. IP address is in the allowlist
     2. Timestamp is within 5-minute window
-    3. JWT authentication (OPTIONAL - see comments below)
+    3. JWT authentication (only when REQUIRE_BOT_JWT is set)
 
-    NOTE: JWT authentication is available but NOT currently activated.
-    To enable JWT validation for enhanced security:
-    1. Set BOT_JWT_SECRET in .env
-    2. Add JWT validation call after timestamp validation
-    3. Update bot client to include JWT in request headers
-    See docs/documentation.md section "Security Configuration" for implementation details.
+    With REQUIRE_BOT_JWT the bot sends "Authorization: Bearer <token>"
+    signed with BOT_JWT_SECRET or a key from BOT_JWT_KEYS (selected by the
+    token's kid), and the token's bot_id must match the request's. Verified
+    tokens are cached until they expire.
 
     Request Body (JSON):
         {
             "bot_id": "bot_identifier",
             "title": "Notification title",
             "content": "Notification content",
-            "timestamp": 1737302400000
+            "timestamp": 1737302400000,
+            "recipient_external_id": "device-uuid" (optional),
+            "tags": "sports AND (nba OR nfl)" (optional),
+            "ttl": 3600 (optional, seconds the push service may hold it),
+            "urgency": "very-low" | "low" | "normal" | "high" (optional),
+            "topic": "order-42-status" (optional collapse key),
+            "send_at": 1737306000000 (optional, deliver at this time),
+            "delay_seconds": 600 (optional, deliver after this delay)
         }
 
+    With neither recipient_external_id nor tags the notification is broadcast.
+    With send_at or delay_seconds (up to 30 days ahead) the job is stored
+    and starts at that time; the bot does not need to stay connected.
+    A notification with a topic replaces a queued, not yet started one with
+    the same topic and target, and the push service replaces an undelivered
+    message with the same topic.
+
+    Requests are rate limited per bot, broadcasts and tag sends additionally
+    per bot, and single-recipient sends per recipient; over a limit the
+    response is 429 with a Retry-After header.
+
+    A repeat of an accepted request within REPLAY_WINDOW_SECONDS (same
+    Idempotency-Key header, or without one the same fields) is not sent
+    again: the response is 200 with the original job.
+
     Returns:
-        JSON response with notification status
+        202 JSON response with the ID of the queued delivery job
     """
     try:
-        data = request.get_json()
+        # Cheapest check first: rejected clients never get their body parsed
+        client_ip = get_client_ip(request) or ""
 
-        if not data:
+        if not validate_ip_allowlist(client_ip, Config.ALLOWED_BOT_IPS):
+            logger.warning(f"Unauthorized IP attempt: {client_ip}")
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "Unauthorized IP address",
+                }
+            ), 403
+
+        body = request.get_data()
+        if not body.strip():
             return jsonify(
                 {
                     "success": False,
@@ -66,15 +244,261 @@ def send_bot_notification():
                 }
             ), 400
 
-        # Extract recipient_external_id before validation (not part of BotNotificationRequest model)
-        recipient_external_id = data.get("recipient_external_id")
+        # Parsed and validated in one pass by pydantic-core
+        try:
+            bot_req = BotNotificationRequest.model_validate_json(body)
+        except ValidationError as e:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": f"Invalid request: {_validation_message(e)}",
+                }
+            ), 400
+        recipient_external_id = bot_req.recipient_external_id
+        tags = bot_req.tags
 
-        # Create request object (excludes recipient_external_id)
-        bot_req = BotNotificationRequest(**data)
+        if not validate_timestamp(bot_req.timestamp_ms):
+            logger.warning(f"Invalid timestamp: {bot_req.timestamp_ms}")
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "Invalid or expired timestamp",
+                }
+            ), 403
 
-        client_ip = get_client_ip(request) or ""
+        unauthorized = _check_bot_jwt(bot_req.bot_id)
+        if unauthorized:
+            return unauthorized
+
+        if tags is not None:
+            if recipient_external_id:
+                return jsonify(
+                    {
+                        "success": False,
+                        "error": "Use either recipient_external_id or tags, not both",
+                    }
+                ), 400
+            try:
+                parse_tag_expression(tags)
+            except ValueError as e:
+                return jsonify(
+                    {
+                        "success": False,
+                        "error": f"Invalid tag expression: {e}",
+                    }
+                ), 400
+
+        request_fingerprint = fingerprint(
+            bot_req.bot_id,
+            bot_req.title,
+            bot_req.content,
+            recipient_external_id,
+            tags,
+            bot_req.push_options().to_dict(),
+            bot_req.send_at_ms,
+            bot_req.delay_seconds,
+        )
+        replay_key, replayed = _reserve_replay_key(
+            bot_req.bot_id, bot_req.timestamp_ms, request_fingerprint
+        )
+        if replayed:
+            return replayed
+
+        job_id = None
+        try:
+            response, job_id = _accept_notification(bot_req, recipient_external_id, tags)
+        finally:
+            # Releases the key unless a job was queued for it
+            get_replay_cache().complete(replay_key, job_id)
+        return response
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return jsonify(
+            {
+                "success": False,
+                "error": "Internal server error",
+            }
+        ), 500
+
+
+def _accept_notification(
+    bot_req: BotNotificationRequest,
+    recipient_external_id: str | None,
+    tags: str | None,
+) -> tuple[Any, str | None]:
+    """Apply rate limits and queue a validated notification.
+
+    Returns:
+        (response, job ID or None if nothing was queued)
+    """
+    limiter = get_rate_limiter()
+    retry_after = limiter.acquire("bot", bot_req.bot_id)
+    if retry_after:
+        logger.warning(f"Rate limit exceeded by bot {bot_req.bot_id}")
+        return _rate_limited(retry_after, "Rate limit exceeded for bot"), None
+    if recipient_external_id:
+        retry_after = limiter.acquire("recipient", recipient_external_id)
+        if retry_after:
+            return _rate_limited(retry_after, "Rate limit exceeded for recipient"), None
+    else:
+        retry_after = limiter.acquire("broadcast", bot_req.bot_id)
+        if retry_after:
+            logger.warning(f"Broadcast rate limit exceeded by bot {bot_req.bot_id}")
+            return _rate_limited(retry_after, "Broadcast rate limit exceeded"), None
+
+    try:
+        if recipient_external_id and not PushService.get_subscription(
+            recipient_external_id
+        ):
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": f"No subscription found for user: {recipient_external_id}",
+                    }
+                ),
+                404,
+            ), None
+
+        # Delivery happens on background workers; the job is durable once queued
+        run_at = bot_req.run_at(time.time())
+        job_id = PushService.enqueue_notification(
+            title=bot_req.title,
+            content=bot_req.content,
+            recipient_external_id=recipient_external_id,
+            tags=tags,
+            options=bot_req.push_options(),
+            run_at=run_at,
+        )
+        target = recipient_external_id or (f"tags '{tags}'" if tags else "broadcast")
+        logger.info(
+            f"Notification from bot {bot_req.bot_id} queued as job {job_id} "
+            f"for {target}{_schedule_note(run_at)}: {bot_req.title}"
+        )
+
+        body = {
+            "success": True,
+            "message": "Notification accepted for delivery",
+            "job_id": job_id,
+            "events_url": f"/api/jobs/{job_id}/events",
+        }
+        if run_at is not None:
+            body["send_at"] = int(run_at * 1000)
+        return (jsonify(body), 202), job_id
+
+    except Exception as e:
+        logger.error(f"Push notification error: {e}")
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Failed to queue notification",
+                }
+            ),
+            500,
+        ), None
+
+
+def _schedule_note(run_at: float | None) -> str:
+    return f" at {int(run_at * 1000)}" if run_at is not None else ""
+
+
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        if err["loc"]
+        else err["msg"]
+        for err in error.errors()
+    )
+
+
+def _read_batch() -> tuple[Any, list[Any]]:
+    """Split a batch request body into its envelope and raw items.
 
-        if not validate_ip_prefix(client_ip, Config.ALLOWED_BOT_IPS):
+    A JSON body is an object with ``bot_id``, ``timestamp`` and a
+    ``notifications`` array. An NDJSON body carries the envelope on its
+    first line and one notification per following line; a line that is
+    not valid JSON is kept as ``None`` so it is reported as invalid.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        lines = [
+            line for line in request.get_data(as_text=True).splitlines()
+            if line.strip()
+        ]
+        if not lines:
+            return None, []
+        try:
+            envelope = json.loads(lines[0])
+        except ValueError:
+            return None, []
+        items = []
+        for line in lines[1:]:
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+        return envelope, items
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, []
+    notifications = data.get("notifications")
+    if not isinstance(notifications, list):
+        return data, []
+    return data, notifications
+
+
+@bp.route("/send-notifications/batch", methods=["POST"])
+def send_bot_notification_batch():
+    """Endpoint for bots to queue many personalised notifications at once.
+
+    The IP allowlist and timestamp are checked once for the whole batch,
+    all recipients are resolved in one store lookup, and the deliverable
+    notifications are queued together as a single job.
+
+    Request Body (JSON):
+        {
+            "bot_id": "bot_identifier",
+            "timestamp": 1737302400000,
+            "notifications": [
+                {"recipient": "user-1", "title": "...", "content": "...",
+                 "ttl": 3600, "urgency": "high", "topic": "score"}
+            ]
+        }
+
+    or NDJSON (Content-Type: application/x-ndjson), envelope first:
+        {"bot_id": "bot_identifier", "timestamp": 1737302400000}
+        {"recipient": "user-1", "title": "...", "content": "..."}
+
+    The envelope may carry send_at or delay_seconds to schedule the whole
+    batch, as for a single send.
+
+    ttl, urgency and topic are optional per notification. Of several
+    notifications for one recipient with the same topic only the last is
+    delivered; the others are reported as "superseded".
+
+    With REQUIRE_BOT_JWT the bot token is checked as for a single send.
+
+    Each notification counts as one request against the bot's rate limit, so
+    a batch larger than BOT_RATE_BURST is rejected with 413, and against its
+    recipient's; a notification over the recipient limit is reported as
+    "rate_limited" with its "retry_after".
+
+    A repeat of an accepted batch within REPLAY_WINDOW_SECONDS (same
+    Idempotency-Key header, or without one the same envelope and
+    notifications) is answered with the original job, as for a single send.
+
+    Returns:
+        202 JSON response with the job ID and a status per notification
+        ("queued", "invalid", "not_found", "superseded" or "rate_limited")
+    """
+    try:
+        client_ip = get_client_ip(request) or ""
+        if not validate_ip_allowlist(client_ip, Config.ALLOWED_BOT_IPS):
             logger.warning(f"Unauthorized IP attempt: {client_ip}")
             return jsonify(
                 {
@@ -83,59 +507,73 @@ def send_bot_notification():
                 }
             ), 403
 
-        if not validate_timestamp(bot_req.timestamp_ms):
-            logger.warning(f"Invalid timestamp: {bot_req.timestamp_ms}")
+        envelope_data, raw_items = _read_batch()
+        if not envelope_data:
             return jsonify(
                 {
                     "success": False,
-                    "error": "Invalid or expired timestamp",
+                    "error": "No JSON data provided",
                 }
-            ), 403
+            ), 400
 
         try:
-            # Send push notification directly
-            if recipient_external_id:
-                success = PushService.send_notification(
-                    user_external_id=recipient_external_id,
-                    title=bot_req.title,
-                    content=bot_req.content,
-                )
-                if not success:
-                    return jsonify(
-                        {
-                            "success": False,
-                            "error": f"No subscription found for user: {recipient_external_id}",
-                        }
-                    ), 404
+            envelope = BatchEnvelope.model_validate(envelope_data)
+        except ValidationError as e:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": f"Invalid batch envelope: {_validation_message(e)}",
+                }
+            ), 400
 
-                logger.info(
-                    f"Notification sent from bot {bot_req.bot_id} to {recipient_external_id}: {bot_req.title}"
-                )
-            else:
-                # Broadcast to all subscribed users
-                count = PushService.broadcast_notification(
-                    title=bot_req.title,
-                    content=bot_req.content,
-                )
-                logger.info(
-                    f"Notification broadcast from bot {bot_req.bot_id} to {count} users: {bot_req.title}"
-                )
+        if not validate_timestamp(envelope.timestamp_ms):
+            logger.warning(f"Invalid timestamp: {envelope.timestamp_ms}")
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "Invalid or expired timestamp",
+                }
+            ), 403
+
+        unauthorized = _check_bot_jwt(envelope.bot_id)
+        if unauthorized:
+            return unauthorized
 
+        if not raw_items:
             return jsonify(
                 {
-                    "success": True,
-                    "message": "Notification sent successfully",
+                    "success": False,
+                    "error": "No notifications provided",
                 }
-            )
+            ), 400
 
-        except Exception as e:
-            logger.error(f"Push notification error: {e}")
+        if len(raw_items) > Config.BATCH_MAX_ITEMS:
             return jsonify(
                 {
                     "success": False,
-                    "error": "Failed to send notification",
+                    "error": f"Batch exceeds {Config.BATCH_MAX_ITEMS} notifications",
                 }
-            ), 500
+            ), 413
+
+        request_fingerprint = fingerprint(
+            envelope.bot_id,
+            raw_items,
+            envelope.send_at_ms,
+            envelope.delay_seconds,
+        )
+        replay_key, replayed = _reserve_replay_key(
+            envelope.bot_id, envelope.timestamp_ms, request_fingerprint
+        )
+        if replayed:
+            return replayed
+
+        job_id = None
+        try:
+            response, job_id = _accept_batch(envelope, raw_items)
+        finally:
+            # Releases the key unless a job was queued for it
+            get_replay_cache().complete(replay_key, job_id)
+        return response
 
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
@@ -147,6 +585,326 @@ def send_bot_notification():
         ), 500
 
 
+def _accept_batch(
+    envelope: BatchEnvelope, raw_items: list[Any]
+) -> tuple[Any, str | None]:
+    """Apply rate limits, resolve recipients and queue a validated batch.
+
+    Returns:
+        (response, job ID or None if nothing was queued)
+    """
+    # Every notification in the batch counts against the bot's limit
+    limiter = get_rate_limiter()
+    burst = limiter.burst("bot")
+    if burst is not None and len(raw_items) > burst:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"Batch exceeds the bot rate limit burst of {burst}",
+                }
+            ),
+            413,
+        ), None
+    retry_after = limiter.acquire("bot", envelope.bot_id, cost=len(raw_items))
+    if retry_after:
+        logger.warning(f"Rate limit exceeded by bot {envelope.bot_id}")
+        return _rate_limited(retry_after, "Rate limit exceeded for bot"), None
+
+    results: list[dict[str, Any]] = []
+    valid: list[tuple[int, BatchNotificationItem]] = []
+    for index, raw in enumerate(raw_items):
+        try:
+            valid.append((index, BatchNotificationItem.model_validate(raw)))
+            results.append({"index": index, "status": "queued"})
+        except ValidationError as e:
+            results.append(
+                {"index": index, "status": "invalid", "error": _validation_message(e)}
+            )
+
+    try:
+        subscriptions = PushService.get_subscriptions(
+            [item.recipient_external_id for _, item in valid]
+        )
+        # Index of the last notification per (recipient, topic)
+        latest: dict[tuple[str, str | None], int] = {
+            (item.recipient_external_id, item.topic): index
+            for index, item in valid
+            if item.topic
+        }
+        messages = []
+        for index, item in valid:
+            result = results[index]
+            result["recipient"] = item.recipient_external_id
+            if item.recipient_external_id not in subscriptions:
+                result["status"] = "not_found"
+                result["error"] = (
+                    f"No subscription found for user: {item.recipient_external_id}"
+                )
+                continue
+            key = (item.recipient_external_id, item.topic)
+            if item.topic and latest[key] != index:
+                result["status"] = "superseded"
+                continue
+            retry_after = limiter.acquire("recipient", item.recipient_external_id)
+            if retry_after:
+                result["status"] = "rate_limited"
+                result["retry_after"] = math.ceil(retry_after)
+                continue
+            messages.append(item.model_dump(exclude_none=True))
+
+        if not messages:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": "No deliverable notifications in batch",
+                        "items": results,
+                    }
+                ),
+                422,
+            ), None
+
+        run_at = envelope.run_at(time.time())
+        job_id = PushService.enqueue_batch(messages, run_at=run_at)
+        logger.info(
+            f"Batch of {len(messages)}/{len(results)} notifications from bot "
+            f"{envelope.bot_id} queued as job {job_id}{_schedule_note(run_at)}"
+        )
+
+        body = {
+            "success": True,
+            "message": "Notifications accepted for delivery",
+            "job_id": job_id,
+            "events_url": f"/api/jobs/{job_id}/events",
+            "accepted": len(messages),
+            "rejected": sum(
+                r["status"] in ("invalid", "not_found", "rate_limited")
+                for r in results
+            ),
+            "superseded": sum(r["status"] == "superseded" for r in results),
+            "items": results,
+        }
+        if run_at is not None:
+            body["send_at"] = int(run_at * 1000)
+        return (jsonify(body), 202), job_id
+
+    except Exception as e:
+        logger.error(f"Push notification error: {e}")
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Failed to queue notifications",
+                }
+            ),
+            500,
+        ), None
+
+
+@bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Export service metrics in the Prometheus text format.
+
+    Only available to clients matching METRICS_ALLOWED_IPS (or
+    ALLOWED_BOT_IPS when that is unset). Counters are per process.
+
+    Returns:
+        text/plain metrics exposition
+    """
+    client_ip = get_client_ip(request) or ""
+    allowed = Config.METRICS_ALLOWED_IPS or Config.ALLOWED_BOT_IPS
+    if not validate_ip_allowlist(client_ip, allowed):
+        logger.warning(f"Unauthorized IP attempt: {client_ip}")
+        return jsonify(
+            {
+                "success": False,
+                "error": "Unauthorized IP address",
+            }
+        ), 403
+
+    return Response(
+        metrics.REGISTRY.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job_status(job_id: str):
+    """Report delivery progress of a queued notification job.
+
+    Only available to clients matching ALLOWED_BOT_IPS.
+
+    Returns:
+        JSON response with job status and sent/failed/expired/pending counts
+    """
+    client_ip = get_client_ip(request) or ""
+    if not validate_ip_allowlist(client_ip, Config.ALLOWED_BOT_IPS):
+        logger.warning(f"Unauthorized IP attempt: {client_ip}")
+        return jsonify(
+            {
+                "success": False,
+                "error": "Unauthorized IP address",
+            }
+        ), 403
+
+    job = PushService.get_queue().get(job_id)
+    if job is None:
+        return jsonify(
+            {
+                "success": False,
+                "error": f"Job not found: {job_id}",
+            }
+        ), 404
+
+    return jsonify(
+        {
+            "success": True,
+            "job": job,
+        }
+    )
+
+
+@bp.route("/jobs/<job_id>/events", methods=["GET"])
+def stream_job_events(job_id: str):
+    """Stream delivery progress of a job as Server-Sent Events.
+
+    Only available to clients matching ALLOWED_BOT_IPS.
+
+    Every event is "event: progress" with the job's counts as JSON data;
+    the stream ends after the event whose status is done, failed or
+    superseded. Jobs running in this process publish an event at most every
+    PROGRESS_EVENT_INTERVAL, shared by all watchers; jobs running in another
+    process are read from the queue every PROGRESS_POLL_INTERVAL. The stream
+    also ends when the worker starts shutting down; EventSource clients then
+    reconnect, to another worker.
+
+    Every open stream holds a request thread, so at most
+    PROGRESS_MAX_STREAMS are served per worker process; beyond that the
+    response is 503 with Retry-After, pointing at /api/jobs/<job_id>.
+
+    Returns:
+        text/event-stream response, 404 JSON if the job does not exist, or
+        503 JSON if too many streams are open
+    """
+    client_ip = get_client_ip(request) or ""
+    if not validate_ip_allowlist(client_ip, Config.ALLOWED_BOT_IPS):
+        logger.warning(f"Unauthorized IP attempt: {client_ip}")
+        return jsonify(
+            {
+                "success": False,
+                "error": "Unauthorized IP address",
+            }
+        ), 403
+
+    queue = PushService.get_queue()
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify(
+            {
+                "success": False,
+                "error": f"Job not found: {job_id}",
+            }
+        ), 404
+
+    if not _acquire_stream():
+        response = jsonify(
+            {
+                "success": False,
+                "error": "Too many progress streams open; poll the job instead",
+                "status_url": f"/api/jobs/{job_id}",
+                "retry_after": STREAM_RETRY_AFTER,
+            }
+        )
+        response.headers["Retry-After"] = str(STREAM_RETRY_AFTER)
+        return response, 503
+
+    def events():
+        sequence = 0
+
+        def format_event(event: dict[str, Any]) -> str:
+            nonlocal sequence
+            sequence += 1
+            return f"id: {sequence}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+
+        yield format_event(job)
+        if job["status"] in FINAL_STATUSES:
+            return
+
+        version = 0
+        last_update = job["updated_at"]
+        idle = 0.0
+        while not queue.progress.closed:
+            published = queue.progress.wait(
+                job_id, version, Config.PROGRESS_POLL_INTERVAL
+            )
+            if published is not None:
+                version, event = published
+            elif version == 0:
+                # Not running here (yet): fall back to the shared database
+                event = queue.get(job_id)
+                if event is None:
+                    return
+                if event["updated_at"] == last_update:
+                    event = None
+                else:
+                    last_update = event["updated_at"]
+            else:
+                event = None
+
+            if event is None:
+                idle += Config.PROGRESS_POLL_INTERVAL
+                if idle >= Config.PROGRESS_KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                continue
+
+            idle = 0.0
+            yield format_event(event)
+            if event["status"] in FINAL_STATUSES:
+                return
+
+    try:
+        response = Response(
+            stream_with_context(events()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except Exception:
+        _release_stream()
+        raise
+    # Runs when the server closes the response, even if it never started it
+    response.call_on_close(_release_stream)
+    return response
+
+
+@bp.route("/stats/push-pool", methods=["GET"])
+def get_push_pool_stats():
+    """Report push-service connection pool statistics.
+
+    Only available to clients matching ALLOWED_BOT_IPS.
+
+    Returns:
+        JSON response with connection reuse ratio and open connections
+    """
+    client_ip = get_client_ip(request) or ""
+    if not validate_ip_allowlist(client_ip, Config.ALLOWED_BOT_IPS):
+        logger.warning(f"Unauthorized IP attempt: {client_ip}")
+        return jsonify(
+            {
+                "success": False,
+                "error": "Unauthorized IP address",
+            }
+        ), 403
+
+    return jsonify(
+        {
+            "success": True,
+            "pool": PushService.get_http_pool().stats(),
+        }
+    )
+
+
 @bp.route("/register-push-subscription", methods=["POST"])
 def register_push_subscription():
     """Register a push subscription (stored locally).
@@ -160,7 +918,8 @@ def register_push_subscription():
                     "auth": "..."
                 }
             },
-            "user_external_id": "device-uuid-here"
+            "user_external_id": "device-uuid-here",
+            "tags": ["sports", "lang:en"] (optional, replaces the user's tags)
         }
 
     Returns:
@@ -189,7 +948,17 @@ def register_push_subscription():
             ), 400
 
         # Store subscription locally
-        PushService.register_subscription(user_external_id, subscription)
+        try:
+            PushService.register_subscription(
+                user_external_id, subscription, data.get("tags")
+            )
+        except ValueError as e:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": str(e),
+                }
+            ), 400
 
         logger.info(f"Push subscription registered for {user_external_id}")
         return jsonify(
@@ -266,11 +1035,13 @@ def send_test_notification():
 
                 logger.info(f"Test notification sent to {user_external_id}: {title}")
             else:
-                count = PushService.broadcast_notification(
+                report = PushService.broadcast_notification(
                     title=title,
                     content=content,
                 )
-                logger.info(f"Test notification broadcast to {count} users: {title}")
+                logger.info(
+                    f"Test notification broadcast to {report.sent}/{report.total} users: {title}"
+                )
 
             return jsonify(
                 {
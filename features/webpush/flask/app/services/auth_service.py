@@ -1,8 +1,112 @@
-import jwt
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional
 from app.config import Config
 
+# PyJWT loads ``cryptography`` when imported, so ``jwt`` is imported where it
+# is used and never by processes that only serve health checks
+
+_verifier: BotJwtVerifier | None = None
+_verifier_lock = threading.Lock()
+
+
+def parse_bot_jwt_keys(spec: str) -> dict[str, str]:
+    """Parse "kid1:secret1,kid2:secret2" into a kid -> secret mapping."""
+    keys: dict[str, str] = {}
+    for entry in spec.split(","):
+        kid, sep, secret = entry.strip().partition(":")
+        if sep and kid and secret:
+            keys[kid] = secret
+    return keys
+
+
+class BotJwtVerifier:
+    """Verify bot JWTs against several signing keys, caching verified tokens.
+
+    A token's ``kid`` header selects its key, so a new key can be added
+    alongside the old one and bots moved over without downtime; tokens
+    without a kid use the default key. Verified tokens are kept in a bounded
+    LRU until their ``exp``, so a bot reusing its token skips the HMAC check
+    and decode. Tokens without ``exp`` are verified every time.
+    """
+
+    def __init__(
+        self,
+        keys: dict[str, str],
+        default_key: str = "",
+        max_entries: int = 1024,
+    ) -> None:
+        self.keys = dict(keys)
+        self.default_key = default_key
+        self.max_entries = max_entries
+        # token -> (claims, exp), least recently used first
+        self._cache: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """Return the claims of a valid token.
+
+        Raises:
+            jwt.InvalidTokenError: If the token is malformed, signed with an
+                unknown key, has a bad signature or has expired
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                if now < cached[1]:
+                    self._cache.move_to_end(token)
+                    return dict(cached[0])
+                del self._cache[token]
+
+        import jwt
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            secret = self.default_key
+        else:
+            secret = self.keys.get(kid, "") if isinstance(kid, str) else ""
+        if not secret:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid or 'default'}")
+
+        claims: dict[str, Any] = jwt.decode(token, secret, algorithms=["HS256"])
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)) and self.max_entries > 0:
+            with self._lock:
+                self._cache[token] = (claims, float(exp))
+                self._cache.move_to_end(token)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return dict(claims)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def get_bot_jwt_verifier() -> BotJwtVerifier:
+    """Return the process-wide bot JWT verifier, creating it from Config on first use."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = BotJwtVerifier(
+                    parse_bot_jwt_keys(Config.BOT_JWT_KEYS),
+                    default_key=Config.BOT_JWT_SECRET,
+                    max_entries=Config.BOT_JWT_CACHE_SIZE,
+                )
+    return _verifier
+
+
+def set_bot_jwt_verifier(verifier: BotJwtVerifier | None) -> None:
+    """Replace the bot JWT verifier (None re-creates it from Config)."""
+    global _verifier
+    with _verifier_lock:
+        _verifier = verifier
+
 
 class AuthService:
     """Service for JWT generation and validation."""
@@ -35,6 +139,8 @@ class AuthService:
         if user_external_id:
             payload["user_external_id"] = user_external_id
 
+        import jwt
+
         return jwt.encode(
             payload,
             Config.JWT_SECRET,
@@ -42,14 +148,19 @@ class AuthService:
         )
 
     @staticmethod
-    def generate_bot_jwt(bot_id: str) -> str:
+    def generate_bot_jwt(bot_id: str, kid: str | None = None) -> str:
         """Generate JWT for bot authentication.
 
         Args:
             bot_id: Bot identifier
+            kid: Signing key ID from BOT_JWT_KEYS (default BOT_JWT_ACTIVE_KID;
+                empty signs with BOT_JWT_SECRET)
 
         Returns:
             JWT token string
+
+        Raises:
+            ValueError: If kid is not in BOT_JWT_KEYS
         """
         payload: Dict[str, Any] = {
             "bot_id": bot_id,
@@ -57,16 +168,27 @@ class AuthService:
             "exp": datetime.now(timezone.utc) + timedelta(minutes=5),
         }
 
-        return jwt.encode(
-            payload,
-            Config.BOT_JWT_SECRET,
-            algorithm="HS256",
-        )
+        import jwt
+
+        kid = kid if kid is not None else Config.BOT_JWT_ACTIVE_KID
+        if not kid:
+            return jwt.encode(
+                payload,
+                Config.BOT_JWT_SECRET,
+                algorithm="HS256",
+            )
+
+        secret = parse_bot_jwt_keys(Config.BOT_JWT_KEYS).get(kid)
+        if not secret:
+            raise ValueError(f"Unknown bot JWT key: {kid}")
+        return jwt.encode(payload, secret, algorithm="HS256", headers={"kid": kid})
 
     @staticmethod
     def validate_bot_jwt(token: str) -> Dict[str, Any]:
         """Validate bot JWT token.
 
+        Verified tokens are cached until they expire (see BotJwtVerifier).
+
         Args:
             token: JWT token string
 
@@ -76,8 +198,4 @@ class AuthService:
         Raises:
             jwt.InvalidTokenError: If token is invalid or expired
         """
-        return jwt.decode(  # type: ignore[no-any-return]
-            token,
-            Config.BOT_JWT_SECRET,
-            algorithms=["HS256"],
-        )
+        return get_bot_jwt_verifier().verify(token)
@@ -0,0 +1,322 @@
+"""Concurrent fan-out of push deliveries with per-host concurrency limits."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from enum import Enum
+from typing import Any
+from urllib.parse import urlparse
+
+from app.services.retry import RetryPolicy, RetryScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryOutcome(Enum):
+    """Result of a single push delivery attempt."""
+
+    SENT = "sent"
+    # 404/410: the subscription is gone and should be pruned
+    EXPIRED = "expired"
+    # 413: payload exceeds the push service's limit
+    TOO_LARGE = "too_large"
+    # 429: the push service is throttling us
+    RATE_LIMITED = "rate_limited"
+    # 5xx or network error: may succeed later
+    TRANSIENT = "transient"
+    # Anything else (4xx, malformed subscription keys, ...)
+    FAILED = "failed"
+
+
+def classify_status(status_code: int | None) -> DeliveryOutcome:
+    """Map a push-service HTTP status to a delivery outcome.
+
+    Args:
+        status_code: Response status, or None if no response was received
+
+    Returns:
+        The classified outcome
+    """
+    if status_code is None:
+        return DeliveryOutcome.TRANSIENT
+    if 200 <= status_code < 300:
+        return DeliveryOutcome.SENT
+    if status_code in (404, 410):
+        return DeliveryOutcome.EXPIRED
+    if status_code == 413:
+        return DeliveryOutcome.TOO_LARGE
+    if status_code == 429:
+        return DeliveryOutcome.RATE_LIMITED
+    if status_code >= 500:
+        return DeliveryOutcome.TRANSIENT
+    return DeliveryOutcome.FAILED
+
+
+@dataclass
+class DeliveryReport:
+    """Aggregated result of a broadcast.
+
+    ``failed`` counts every undelivered, unexpired message; ``too_large``,
+    ``rate_limited`` and ``transient`` break part of it down by cause.
+    ``pruned`` is the number of expired subscriptions removed from the store
+    and ``retried`` the number of retry attempts scheduled.
+    """
+
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    expired: int = 0
+    pruned: int = 0
+    retried: int = 0
+    too_large: int = 0
+    rate_limited: int = 0
+    transient: int = 0
+
+    def record(self, outcome: DeliveryOutcome) -> None:
+        """Count one final delivery outcome."""
+        if outcome is DeliveryOutcome.SENT:
+            self.sent += 1
+        elif outcome is DeliveryOutcome.EXPIRED:
+            self.expired += 1
+        else:
+            self.failed += 1
+            if outcome is DeliveryOutcome.TOO_LARGE:
+                self.too_large += 1
+            elif outcome is DeliveryOutcome.RATE_LIMITED:
+                self.rate_limited += 1
+            elif outcome is DeliveryOutcome.TRANSIENT:
+                self.transient += 1
+
+    def to_dict(self) -> dict[str, int]:
+        """Return the report as a JSON-serialisable dict."""
+        return asdict(self)
+
+    @classmethod
+    def merged(cls, reports: Iterable[DeliveryReport]) -> DeliveryReport:
+        """Sum several reports (e.g. one per broadcast shard) into one."""
+        total = cls()
+        for report in reports:
+            for name, value in asdict(report).items():
+                setattr(total, name, getattr(total, name) + value)
+        return total
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    """A delivery outcome plus what the push service asked of us."""
+
+    outcome: DeliveryOutcome
+    # Seconds from the Retry-After header, if the push service sent one
+    retry_after: float | None = None
+
+
+# (user_external_id, subscription)
+Target = tuple[str, dict[str, Any]]
+# Returns a bare outcome, or a DeliveryResult when it has a Retry-After
+DeliverFn = Callable[[str, dict[str, Any]], DeliveryOutcome | DeliveryResult]
+# Removes expired targets from the store, returning how many were removed
+PruneFn = Callable[[list[Target]], int]
+
+
+def push_host(subscription: dict[str, Any]) -> str:
+    """Return the push-service host a subscription's endpoint points at."""
+    return urlparse(subscription.get("endpoint", "")).hostname or ""
+
+
+def parse_host_limits(spec: str) -> dict[str, int]:
+    """Parse "host=limit,host=limit" into a mapping.
+
+    Args:
+        spec: Comma-separated overrides, e.g. "web.push.apple.com=16"
+
+    Returns:
+        Mapping of host name to concurrency limit
+    """
+    limits: dict[str, int] = {}
+    for item in spec.split(","):
+        host, sep, value = item.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            limits[host.strip().lower()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid host concurrency override: {item}")
+    return limits
+
+
+class BroadcastEngine:
+    """Deliver to many subscriptions through a bounded worker pool.
+
+    Targets are queued per push-service host. At most ``host_limit``
+    deliveries to the same host are in flight at once, so a slow or
+    throttling provider cannot occupy the whole pool while other hosts still
+    have work. Workers never block waiting for a host slot: when a delivery
+    finishes, the next target for that host is submitted.
+
+    Rate-limited and transient failures are retried according to
+    ``retry_policy``. The retry is parked on ``scheduler`` and re-queued when
+    due, leaving the worker free. A ``Retry-After`` from the push service
+    also pauses the whole host until it elapses.
+
+    Expired targets are handed to ``prune`` in batches of
+    ``prune_batch_size`` while the broadcast runs, and once more at the end.
+    """
+
+    RETRYABLE = (DeliveryOutcome.RATE_LIMITED, DeliveryOutcome.TRANSIENT)
+
+    def __init__(
+        self,
+        max_workers: int,
+        host_limit: int,
+        host_overrides: dict[str, int] | None = None,
+        prune: PruneFn | None = None,
+        prune_batch_size: int = 100,
+        retry_policy: RetryPolicy | None = None,
+        scheduler: RetryScheduler | None = None,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.host_limit = max(1, host_limit)
+        self.host_overrides = host_overrides or {}
+        self.prune = prune
+        self.prune_batch_size = max(1, prune_batch_size)
+        self.retry_policy = retry_policy if scheduler is not None else None
+        self.scheduler = scheduler
+
+    def limit_for(self, host: str) -> int:
+        """Return the concurrency limit for a push-service host."""
+        return self.host_overrides.get(host, self.host_limit)
+
+    def run(
+        self,
+        targets: Iterable[Target],
+        deliver: DeliverFn,
+        on_progress: Callable[[DeliveryReport], None] | None = None,
+    ) -> DeliveryReport:
+        """Deliver to every target and wait for all of them to finish.
+
+        Args:
+            targets: (user_external_id, subscription) pairs
+            deliver: Callable performing one delivery and classifying it
+            on_progress: Optional callback receiving a snapshot of the report
+                after each completed delivery
+
+        Returns:
+            Aggregated delivery report
+        """
+        # Each queued item is (target, attempts made so far)
+        queues: dict[str, deque[tuple[Target, int]]] = defaultdict(deque)
+        for target in targets:
+            queues[push_host(target[1])].append((target, 0))
+
+        report = DeliveryReport(total=sum(len(q) for q in queues.values()))
+        if report.total == 0:
+            return report
+
+        lock = threading.Lock()
+        finished = threading.Event()
+        in_flight: dict[str, int] = defaultdict(int)
+        paused_until: dict[str, float] = {}
+        remaining = report.total
+        expired: list[Target] = []
+
+        def flush_expired(batch: list[Target]) -> None:
+            if not batch or self.prune is None:
+                return
+            try:
+                pruned = self.prune(batch)
+            except Exception as e:
+                logger.error(f"Failed to prune {len(batch)} expired subscriptions: {e}")
+                return
+            with lock:
+                report.pruned += pruned
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="push-broadcast"
+        ) as pool:
+
+            def launch(host: str) -> None:
+                # Caller holds ``lock``
+                if time.monotonic() < paused_until.get(host, 0):
+                    return
+                queue = queues[host]
+                while queue and in_flight[host] < self.limit_for(host):
+                    in_flight[host] += 1
+                    pool.submit(task, host, *queue.popleft())
+
+            def resume(host: str) -> None:
+                with lock:
+                    launch(host)
+
+            def requeue(host: str, target: Target, attempts: int) -> None:
+                with lock:
+                    queues[host].append((target, attempts))
+                    launch(host)
+
+            def schedule_retry(
+                host: str, target: Target, attempts: int, result: DeliveryResult
+            ) -> bool:
+                # Caller holds ``lock``
+                if self.retry_policy is None or self.scheduler is None:
+                    return False
+                delay = self.retry_policy.delay(attempts, result.retry_after)
+                if delay is None:
+                    return False
+                if result.retry_after is not None:
+                    resume_at = time.monotonic() + result.retry_after
+                    if resume_at > paused_until.get(host, 0):
+                        paused_until[host] = resume_at
+                        self.scheduler.schedule(result.retry_after, lambda: resume(host))
+                self.scheduler.schedule(delay, lambda: requeue(host, target, attempts))
+                return True
+
+            def task(host: str, target: Target, attempts: int) -> None:
+                nonlocal remaining
+                user_id, subscription = target
+                try:
+                    result = deliver(user_id, subscription)
+                except Exception as e:
+                    logger.error(f"Delivery to {user_id} raised: {e}")
+                    result = DeliveryOutcome.FAILED
+                if isinstance(result, DeliveryOutcome):
+                    result = DeliveryResult(result)
+                attempts += 1
+
+                batch: list[Target] = []
+                snapshot = None
+                with lock:
+                    in_flight[host] -= 1
+                    if result.outcome in self.RETRYABLE and schedule_retry(
+                        host, target, attempts, result
+                    ):
+                        report.retried += 1
+                    else:
+                        report.record(result.outcome)
+                        remaining -= 1
+                        if result.outcome is DeliveryOutcome.EXPIRED:
+                            expired.append(target)
+                            if len(expired) >= self.prune_batch_size:
+                                batch = expired[:]
+                                expired.clear()
+                        if on_progress is not None:
+                            snapshot = replace(report)
+                        if remaining == 0:
+                            finished.set()
+                    launch(host)
+
+                flush_expired(batch)
+                if on_progress is not None and snapshot is not None:
+                    on_progress(snapshot)
+
+            with lock:
+                for host in list(queues):
+                    launch(host)
+            finished.wait()
+
+        flush_expired(expired)
+        return report
@@ -0,0 +1,114 @@
+"""RFC 8291 (aes128gcm) payload encryption with reusable per-subscriber keys.
+
+``cryptography`` and ``http_ece`` are imported on first use, so processes
+that never encrypt (health probes, freshly started workers) skip them.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+CONTENT_ENCODING = "aes128gcm"
+
+
+def _b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def prepare_payload(title: str, content: str) -> bytes:
+    """Serialise a notification once so every recipient reuses the bytes."""
+    return json.dumps({"title": title, "content": content}).encode()
+
+
+@dataclass(frozen=True)
+class SubscriberKeys:
+    """A subscription's decoded encryption keys."""
+
+    public_key: ec.EllipticCurvePublicKey
+    auth_secret: bytes
+
+    @classmethod
+    def from_subscription(cls, subscription: dict[str, Any]) -> SubscriberKeys:
+        """Decode and validate a subscription's p256dh and auth keys.
+
+        Raises:
+            ValueError: If the keys are missing or not a valid P-256 point
+        """
+        from cryptography.hazmat.primitives.asymmetric import ec
+
+        keys = subscription.get("keys") or {}
+        p256dh, auth = keys.get("p256dh"), keys.get("auth")
+        if not p256dh or not auth:
+            raise ValueError("Subscription is missing p256dh or auth key")
+        public_key = ec.EllipticCurvePublicKey.from_encoded_point(
+            ec.SECP256R1(), _b64url_decode(p256dh)
+        )
+        return cls(public_key=public_key, auth_secret=_b64url_decode(auth))
+
+
+class SubscriberKeyCache:
+    """Bounded LRU cache of parsed subscriber keys.
+
+    Keyed by the raw (p256dh, auth) strings, so a re-subscription with new
+    keys never hits a stale entry.
+    """
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], SubscriberKeys] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subscription: dict[str, Any]) -> SubscriberKeys:
+        """Return parsed keys for a subscription, parsing them on first use."""
+        keys = subscription.get("keys") or {}
+        cache_key = (keys.get("p256dh", ""), keys.get("auth", ""))
+
+        with self._lock:
+            cached = self._entries.get(cache_key)
+            if cached is not None:
+                self._entries.move_to_end(cache_key)
+                return cached
+
+        parsed = SubscriberKeys.from_subscription(subscription)
+        with self._lock:
+            self._entries[cache_key] = parsed
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def encrypt_payload(payload: bytes, keys: SubscriberKeys) -> bytes:
+    """Encrypt a prepared payload for one subscriber (RFC 8291, aes128gcm).
+
+    RFC 8291 requires a fresh ephemeral sender key per message, so what
+    remains per recipient is that key pair, the ECDH and the AEAD record.
+
+    Args:
+        payload: Bytes from ``prepare_payload``
+        keys: Parsed subscriber keys
+
+    Returns:
+        The aes128gcm-encoded request body
+    """
+    import http_ece
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    server_key = ec.generate_private_key(ec.SECP256R1())
+    return http_ece.encrypt(
+        payload,
+        private_key=server_key,
+        dh=keys.public_key,
+        auth_secret=keys.auth_secret,
+        version=CONTENT_ENCODING,
+    )
@@ -0,0 +1,188 @@
+"""Pooled keep-alive HTTP sessions for push-service deliveries.
+
+``requests`` is imported when the first pool is created.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _OriginPool:
+    session: requests.Session
+    adapter: HTTPAdapter
+    last_used: float = field(default_factory=time.monotonic)
+    in_use: int = 0
+
+
+def _origin(endpoint: str) -> str:
+    url = urlparse(endpoint)
+    return f"{url.scheme}://{url.netloc}"
+
+
+class PushHttpPool:
+    """One keep-alive connection pool per push-service origin.
+
+    Deliveries to the same origin (e.g. https://fcm.googleapis.com) share
+    up to ``pool_size`` persistent connections, so the TCP and TLS
+    handshakes are paid once per connection instead of once per
+    notification. An origin unused for ``idle_timeout`` seconds has its
+    connections closed.
+    """
+
+    def __init__(self, pool_size: int = 16, idle_timeout: float = 90.0) -> None:
+        self.pool_size = max(1, pool_size)
+        self.idle_timeout = idle_timeout
+        self._origins: dict[str, _OriginPool] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        # Counters carried over from pools that have been closed
+        self._closed_connections = 0
+        self._closed_requests = 0
+
+    def _new_pool(self) -> _OriginPool:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+            max_retries=0,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return _OriginPool(session=session, adapter=adapter)
+
+    def _close(self, pool: _OriginPool) -> None:
+        # Caller holds ``self._lock``
+        connections, requests_made = self._pool_counters(pool)
+        self._closed_connections += connections
+        self._closed_requests += requests_made
+        pool.session.close()
+
+    def _acquire(self, origin: str) -> _OriginPool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prune >= self.idle_timeout / 2:
+                self._prune_idle(now)
+
+            pool = self._origins.get(origin)
+            if pool is None:
+                pool = self._origins[origin] = self._new_pool()
+            pool.in_use += 1
+            pool.last_used = now
+            return pool
+
+    def _release(self, pool: _OriginPool) -> None:
+        with self._lock:
+            pool.in_use -= 1
+            pool.last_used = time.monotonic()
+
+    def _prune_idle(self, now: float) -> None:
+        # Caller holds ``self._lock``
+        self._last_prune = now
+        for origin, pool in list(self._origins.items()):
+            if pool.in_use == 0 and now - pool.last_used >= self.idle_timeout:
+                self._close(pool)
+                del self._origins[origin]
+                logger.debug(f"Closed idle push connections to {origin}")
+
+    def session_for(self, endpoint: str) -> requests.Session:
+        """Return the shared session for an endpoint's origin.
+
+        Prefer ``post``, which also tracks idle time; this exists for callers
+        that need to hand a session to another library.
+        """
+        pool = self._acquire(_origin(endpoint))
+        self._release(pool)
+        return pool.session
+
+    def post(
+        self,
+        endpoint: str,
+        data: bytes | None,
+        headers: dict[str, str],
+        timeout: float,
+    ) -> requests.Response:
+        """POST to a push endpoint over a pooled connection."""
+        pool = self._acquire(_origin(endpoint))
+        try:
+            return pool.session.post(
+                endpoint, data=data, headers=headers, timeout=timeout
+            )
+        finally:
+            self._release(pool)
+
+    @staticmethod
+    def _pool_counters(pool: _OriginPool) -> tuple[int, int]:
+        connections = requests_made = 0
+        manager = pool.adapter.poolmanager
+        for key in manager.pools.keys():
+            conn_pool = manager.pools.get(key)
+            if conn_pool is not None:
+                connections += conn_pool.num_connections
+                requests_made += conn_pool.num_requests
+        return connections, requests_made
+
+    @staticmethod
+    def _open_connections(pool: _OriginPool) -> int:
+        open_count = 0
+        manager = pool.adapter.poolmanager
+        for key in manager.pools.keys():
+            conn_pool = manager.pools.get(key)
+            if conn_pool is None or conn_pool.pool is None:
+                continue
+            idle = sum(1 for conn in list(conn_pool.pool.queue) if conn is not None)
+            checked_out = conn_pool.pool.maxsize - conn_pool.pool.qsize()
+            open_count += idle + checked_out
+        return open_count
+
+    def stats(self) -> dict[str, Any]:
+        """Return connection reuse statistics.
+
+        ``reuse_ratio`` is the share of requests that did not need a new
+        connection (1.0 means every request reused a warm connection).
+        """
+        with self._lock:
+            origins: dict[str, dict[str, int]] = {}
+            connections = self._closed_connections
+            requests_made = self._closed_requests
+            for origin, pool in self._origins.items():
+                new_conns, reqs = self._pool_counters(pool)
+                connections += new_conns
+                requests_made += reqs
+                origins[origin] = {
+                    "open_connections": self._open_connections(pool),
+                    "connections_created": new_conns,
+                    "requests": reqs,
+                }
+
+        reuse_ratio = 1 - connections / requests_made if requests_made else 0.0
+        return {
+            "connections_created": connections,
+            "requests": requests_made,
+            "reuse_ratio": round(reuse_ratio, 4),
+            "open_connections": sum(o["open_connections"] for o in origins.values()),
+            "origins": origins,
+        }
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            for pool in self._origins.values():
+                self._close(pool)
+            self._origins.clear()
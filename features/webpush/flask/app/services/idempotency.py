@@ -0,0 +1,259 @@
+"""Replay cache so a repeated bot request is not sent twice.
+
+Kept in process memory (time-bucketed) or in SQLite, shared by every worker
+process using the same database file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+# SQLite reservations between sweeps of expired keys
+SQLITE_SWEEP_EVERY = 1000
+
+_cache: ReplayStore | None = None
+_cache_lock = threading.Lock()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash request fields into a stable key (JSON-serialisable parts only)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass
+class ReplayEntry:
+    """What a request key resolved to.
+
+    Attributes:
+        fingerprint: Hash of the request that first used the key
+        job_id: Job queued for it, or None while that request is in flight
+        bucket: Time bucket the entry expires with
+    """
+
+    fingerprint: str
+    job_id: str | None = None
+    bucket: int = 0
+
+
+class ReplayStore(ABC):
+    """Remembers recently accepted requests; ``reserve`` is atomic per key."""
+
+    @abstractmethod
+    def reserve(self, key: str, request_fingerprint: str) -> ReplayEntry | None:
+        """Claim a request key, or return who already holds it.
+
+        Args:
+            key: Idempotency key (client-supplied or derived from the request)
+            request_fingerprint: Hash of the request body, to detect a key
+                reused for a different request
+
+        Returns:
+            None if the caller now holds the key and must call ``complete``,
+            otherwise the existing entry (``job_id`` None while in flight)
+        """
+
+    @abstractmethod
+    def complete(self, key: str, job_id: str | None) -> None:
+        """Record the job a reserved key produced (None releases the key)."""
+
+
+class ReplayCache(ReplayStore):
+    """Remembers recently accepted requests in this process, for a fixed window.
+
+    Entries are grouped into time buckets of ``bucket_seconds``. Expiry drops
+    whole buckets once they are older than ``window_seconds``, so cleanup
+    costs nothing per lookup, and when more than ``max_entries`` are held the
+    oldest buckets go first. Lookups are a single dict access.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 600.0,
+        bucket_seconds: float = 30.0,
+        max_entries: int = 100_000,
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._entries: dict[str, ReplayEntry] = {}
+        # (bucket number, keys added in it), oldest first
+        self._buckets: deque[tuple[int, list[str]]] = deque()
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, request_fingerprint: str) -> ReplayEntry | None:
+        now = time.monotonic()
+        bucket = int(now // self.bucket_seconds)
+        with self._lock:
+            self._expire(bucket)
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            self._entries[key] = ReplayEntry(request_fingerprint, bucket=bucket)
+            if not self._buckets or self._buckets[-1][0] != bucket:
+                self._buckets.append((bucket, []))
+            self._buckets[-1][1].append(key)
+        return None
+
+    def complete(self, key: str, job_id: str | None) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if job_id is None:
+                del self._entries[key]
+            else:
+                entry.job_id = job_id
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, bucket: int) -> None:
+        # Caller holds ``self._lock``
+        oldest = bucket - int(self.window_seconds // self.bucket_seconds)
+        while self._buckets and (
+            self._buckets[0][0] < oldest or len(self._entries) >= self.max_entries
+        ):
+            expired, keys = self._buckets.popleft()
+            for key in keys:
+                # A released key may have been reserved again in a later bucket
+                entry = self._entries.get(key)
+                if entry is not None and entry.bucket == expired:
+                    del self._entries[key]
+
+
+class SqliteReplayCache(ReplayStore):
+    """Replay keys shared by every process using the same database file.
+
+    A reservation is one short immediate transaction, so two workers
+    receiving the same request cannot both claim its key. Keys expire
+    ``window_seconds`` after they were reserved and are swept periodically.
+    """
+
+    def __init__(self, path: Path, window_seconds: float = 600.0) -> None:
+        self.path = Path(path)
+        self.window_seconds = window_seconds
+        self._local = threading.local()
+        self._calls = 0
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS replay_keys (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                job_id TEXT,
+                expires REAL NOT NULL
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Losing the last keys in a power cut only lets a replay through
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, key: str, request_fingerprint: str) -> ReplayEntry | None:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT fingerprint, job_id FROM replay_keys "
+                "WHERE key = ? AND expires >= ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO replay_keys "
+                    "(key, fingerprint, job_id, expires) VALUES (?, ?, NULL, ?)",
+                    (key, request_fingerprint, now + self.window_seconds),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._calls += 1
+        if self._calls % SQLITE_SWEEP_EVERY == 0:
+            try:
+                conn.execute("DELETE FROM replay_keys WHERE expires < ?", (now,))
+            except sqlite3.Error as e:
+                logger.error(f"Failed to sweep replay keys: {e}")
+
+        if row is None:
+            return None
+        return ReplayEntry(str(row[0]), row[1])
+
+    def complete(self, key: str, job_id: str | None) -> None:
+        conn = self._connect()
+        if job_id is None:
+            # Only an in-flight key is released, never one that found its job
+            conn.execute(
+                "DELETE FROM replay_keys WHERE key = ? AND job_id IS NULL", (key,)
+            )
+        else:
+            conn.execute(
+                "UPDATE replay_keys SET job_id = ? WHERE key = ?", (job_id, key)
+            )
+
+    def __len__(self) -> int:
+        count: int = self._connect().execute(
+            "SELECT COUNT(*) FROM replay_keys WHERE expires >= ?", (time.time(),)
+        ).fetchone()[0]
+        return count
+
+
+def create_replay_cache(backend: str, path: Path) -> ReplayStore:
+    """Build a replay cache for the configured backend ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        return SqliteReplayCache(path, window_seconds=Config.REPLAY_WINDOW_SECONDS)
+    if backend != "memory":
+        logger.warning(f"Unknown REPLAY_CACHE_BACKEND '{backend}', using memory")
+    return ReplayCache(
+        window_seconds=Config.REPLAY_WINDOW_SECONDS,
+        max_entries=Config.REPLAY_CACHE_MAX_ENTRIES,
+    )
+
+
+def get_replay_cache() -> ReplayStore:
+    """Return the process-wide replay cache, creating it from Config on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_replay_cache(
+                    Config.REPLAY_CACHE_BACKEND, Path(Config.REPLAY_CACHE_DB)
+                )
+    return _cache
+
+
+def set_replay_cache(cache: ReplayStore | None) -> None:
+    """Replace the replay cache (None re-creates it from Config)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
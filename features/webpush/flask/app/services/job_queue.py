@@ -0,0 +1,496 @@
+"""Durable SQLite-backed job queue with background delivery workers."""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.services.broadcast import DeliveryReport
+from app.services.progress import ProgressHub
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+
+# Minimum seconds between progress writes while a job is running
+PROGRESS_FLUSH_INTERVAL = 0.5
+# Minimum seconds between progress events published to watchers
+PROGRESS_EVENT_INTERVAL = 0.2
+
+
+@dataclass
+class Job:
+    """A claimed job handed to the queue handler."""
+
+    id: str
+    kind: str
+    payload: dict[str, Any]
+
+
+def progress_event(
+    job: Job, report: DeliveryReport, status: str, elapsed: float
+) -> dict[str, Any]:
+    """Build the progress event published while a job runs.
+
+    Args:
+        job: Running job
+        report: Latest delivery report snapshot
+        status: "running", "done" or "failed"
+        elapsed: Seconds since delivery started
+
+    Returns:
+        JSON-serialisable event with counts and throughput
+    """
+    finished = report.sent + report.failed + report.expired
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": status,
+        "total": report.total,
+        "sent": report.sent,
+        "failed": report.failed,
+        "expired": report.expired,
+        "pruned": report.pruned,
+        "retried": report.retried,
+        "pending": max(0, report.total - finished),
+        "elapsed": round(elapsed, 3),
+        "per_second": round(finished / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+ProgressFn = Callable[[DeliveryReport], None]
+JobHandler = Callable[[Job, ProgressFn], DeliveryReport]
+
+
+class JobQueue:
+    """Persistent queue of notification jobs processed by worker threads.
+
+    A job is committed to SQLite before ``submit`` returns, so accepted
+    notifications survive a crash or restart. Workers claim jobs with a
+    lease; a job whose lease expires (its process died mid-delivery) is put
+    back to pending and delivered again, so delivery is at-least-once. A job
+    interrupted by shutdown is left to its lease the same way; only a
+    delivery error marks it failed.
+    Several processes may share one database: claiming is serialised by an
+    immediate transaction.
+
+    A job submitted with a coalesce key supersedes pending jobs with the
+    same key: they are never delivered and report status "superseded".
+
+    A job may also be scheduled for later with ``run_at``. Pending jobs are
+    claimed in ``run_at`` order from a partial index, which doubles as the
+    persistent timer heap: idle workers sleep until the earliest due job
+    (or ``poll_interval``, for jobs scheduled by other processes), so
+    scheduled jobs start on time without a thread or timer per job.
+
+    Progress of jobs running in this process is also published to
+    ``progress`` for live watchers (see ``progress_event``).
+    """
+
+    # Columns added after the first release, applied to existing databases
+    ADDED_COLUMNS = {
+        "pruned": "INTEGER NOT NULL DEFAULT 0",
+        "coalesce_key": "TEXT",
+        "superseded_by": "TEXT",
+        "run_at": "REAL",
+    }
+
+    def __init__(
+        self,
+        path: Path,
+        handler: JobHandler,
+        workers: int = 2,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.path = Path(path)
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._closed = False
+        self._threads: list[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self.progress = ProgressHub()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Accepted jobs must survive power loss, not just process crashes
+            conn.execute("PRAGMA synchronous = FULL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    total INTEGER NOT NULL DEFAULT 0,
+                    sent INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    expired INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    claimed_by TEXT,
+                    lease_until REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, ddl in self.ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+            if "run_at" not in columns:
+                # Jobs queued before scheduling existed are due immediately
+                conn.execute("UPDATE jobs SET run_at = created_at")
+            # Only pending jobs can be superseded, so only they are indexed
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_coalesce ON jobs (coalesce_key) "
+                "WHERE status = 'pending' AND coalesce_key IS NOT NULL"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (run_at) "
+                "WHERE status = 'pending'"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_until)"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------- producer side ----------
+
+    def submit(
+        self,
+        kind: str,
+        payload: dict[str, Any],
+        coalesce_key: str | None = None,
+        run_at: float | None = None,
+    ) -> str:
+        """Persist a job and wake a worker.
+
+        Args:
+            kind: Job type understood by the handler (e.g. "send", "broadcast")
+            payload: JSON-serialisable job arguments
+            coalesce_key: Pending jobs with this key are superseded by the new
+                one (jobs already running are not affected)
+            run_at: Unix time to start the job at (None or a past time for
+                immediately)
+
+        Returns:
+            The new job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        run_at = now if run_at is None else max(now, run_at)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            superseded = 0
+            if coalesce_key is not None:
+                superseded = conn.execute(
+                    "UPDATE jobs SET status = 'superseded', superseded_by = ?, "
+                    "updated_at = ? WHERE coalesce_key = ? AND status = 'pending'",
+                    (job_id, now, coalesce_key),
+                ).rowcount
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, coalesce_key, run_at, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), coalesce_key, run_at, now, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if superseded:
+            logger.info(f"Job {job_id} superseded {superseded} pending job(s)")
+        self.start()
+        # A worker woken early for a scheduled job re-arms its wait for it
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """Return the public state of a job, or None if it does not exist."""
+        row = self._connect().execute(
+            "SELECT id, kind, status, total, sent, failed, expired, pruned, error, "
+            "superseded_by, run_at, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["pending"] = max(
+            0, job["total"] - job["sent"] - job["failed"] - job["expired"]
+        )
+        return job
+
+    def pending_count(self) -> int:
+        """Return the number of due jobs not yet finished."""
+        # Two counts, each over one index, so scheduled jobs are never read
+        conn = self._connect()
+        running = conn.execute(
+            "SELECT COUNT(*) FROM jobs INDEXED BY idx_jobs_lease "
+            "WHERE status = 'running'"
+        ).fetchone()[0]
+        due = conn.execute(
+            "SELECT COUNT(*) FROM jobs INDEXED BY idx_jobs_due "
+            "WHERE status = 'pending' AND run_at <= ?",
+            (time.time(),),
+        ).fetchone()[0]
+        return int(running + due)
+
+    def scheduled_count(self) -> int:
+        """Return the number of jobs waiting for their scheduled time."""
+        count = self._connect().execute(
+            "SELECT COUNT(*) FROM jobs INDEXED BY idx_jobs_due "
+            "WHERE status = 'pending' AND run_at > ?",
+            (time.time(),),
+        ).fetchone()[0]
+        return int(count)
+
+    def next_due(self) -> float | None:
+        """Return the earliest ``run_at`` of a pending job, or None."""
+        run_at = self._connect().execute(
+            "SELECT MIN(run_at) FROM jobs INDEXED BY idx_jobs_due "
+            "WHERE status = 'pending'"
+        ).fetchone()[0]
+        return None if run_at is None else float(run_at)
+
+    # ---------- worker side ----------
+
+    def start(self) -> None:
+        """Start the worker threads if they are not running yet.
+
+        Does nothing once ``shutdown`` was called: requests still finishing
+        in a stopping process queue their jobs for other processes.
+        """
+        if self._threads or self._closed:
+            return
+        with self._start_lock:
+            if self._threads or self._closed:
+                return
+            self._stopping.clear()
+            for n in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker, name=f"delivery-worker-{n}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            heartbeat = threading.Thread(
+                target=self._heartbeat, name="delivery-heartbeat", daemon=True
+            )
+            heartbeat.start()
+            self._threads.append(heartbeat)
+            logger.info(f"Started {self.workers} delivery workers ({self.owner})")
+
+    def shutdown(self, timeout: float | None = None) -> bool:
+        """Stop claiming jobs and wait for in-flight jobs to finish.
+
+        Jobs still pending stay in the database for the next start. A job
+        still running when ``timeout`` (for all workers together) runs out
+        is delivered again by whichever worker claims it after its lease
+        expires.
+
+        Returns:
+            True if every worker stopped in time
+        """
+        with self._start_lock:
+            self._closed = True
+            self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        drained = not any(thread.is_alive() for thread in self._threads)
+        self._threads = []
+        return drained
+
+    def _claim(self) -> Job | None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Separate lookups so each is one step down its own index; an OR
+            # of both scans the table while holding the write lock. Without
+            # statistics SQLite would rather use idx_jobs_status, so the
+            # index is named.
+            row = conn.execute(
+                "SELECT id, kind, payload FROM jobs INDEXED BY idx_jobs_lease "
+                "WHERE status = 'running' AND lease_until < ? "
+                "ORDER BY lease_until LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                row = conn.execute(
+                    "SELECT id, kind, payload FROM jobs INDEXED BY idx_jobs_due "
+                    "WHERE status = 'pending' AND run_at <= ? "
+                    "ORDER BY run_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', claimed_by = ?, "
+                    "lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (self.owner, now + self.lease_seconds, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if row is None:
+            return None
+        return Job(id=row["id"], kind=row["kind"], payload=json.loads(row["payload"]))
+
+    def _write_progress(
+        self, job_id: str, report: DeliveryReport, status: str = "running",
+        error: str | None = None,
+    ) -> None:
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, total = ?, sent = ?, failed = ?, "
+            "expired = ?, pruned = ?, error = ?, lease_until = ?, updated_at = ? "
+            "WHERE id = ? AND claimed_by = ?",
+            (
+                status, report.total, report.sent, report.failed, report.expired,
+                report.pruned, error, now + self.lease_seconds, now, job_id, self.owner,
+            ),
+        )
+
+    def _run(self, job: Job) -> None:
+        flush_lock = threading.Lock()
+        started = time.monotonic()
+        last_flush = last_event = 0.0
+
+        def publish(report: DeliveryReport, status: str = "running") -> None:
+            self.progress.publish(
+                job.id,
+                progress_event(job, report, status, time.monotonic() - started),
+            )
+
+        def progress(report: DeliveryReport) -> None:
+            nonlocal last_flush, last_event
+            # Skip rather than queue behind another delivery thread's write
+            if not flush_lock.acquire(blocking=False):
+                return
+            try:
+                now = time.monotonic()
+                if now - last_flush >= PROGRESS_FLUSH_INTERVAL:
+                    last_flush = now
+                    self._write_progress(job.id, report)
+                if now - last_event >= PROGRESS_EVENT_INTERVAL:
+                    last_event = now
+                    publish(report)
+            finally:
+                flush_lock.release()
+
+        publish(DeliveryReport())
+        try:
+            report = self.handler(job, progress)
+        except Exception as e:
+            if self._interrupted(e):
+                # Leave it running: once the lease expires it is claimed
+                # again, here after a restart or by another process
+                logger.warning(f"Job {job.id} interrupted by shutdown: {e}")
+                return
+            logger.error(f"Job {job.id} failed: {e}")
+            with flush_lock:
+                self._write_progress(job.id, DeliveryReport(), "failed", str(e))
+                publish(DeliveryReport(), "failed")
+            return
+
+        with flush_lock:
+            self._write_progress(job.id, report, "done")
+            publish(report, "done")
+        logger.info(
+            f"Job {job.id} ({job.kind}) done: {report.sent}/{report.total} sent"
+        )
+
+    def _interrupted(self, error: Exception) -> bool:
+        """Whether a handler error comes from shutting down, not from delivery."""
+        if self._stopping.is_set() or sys.is_finalizing():
+            return True
+        # Raised by executors once they (or the interpreter) are shutting down
+        return isinstance(error, RuntimeError) and (
+            "cannot schedule new futures" in str(error)
+        )
+
+    def _heartbeat(self) -> None:
+        # Renew leases of running jobs even when no delivery completes for a
+        # while (e.g. every remaining recipient is waiting on a retry)
+        while not self._stopping.wait(max(self.lease_seconds / 3, 0.05)):
+            now = time.time()
+            try:
+                self._connect().execute(
+                    "UPDATE jobs SET lease_until = ? "
+                    "WHERE claimed_by = ? AND status = 'running'",
+                    (now + self.lease_seconds, self.owner),
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to renew job leases: {e}")
+
+    def _worker(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+
+            if job is None:
+                timeout = self.poll_interval
+                try:
+                    due = self.next_due()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to read the next scheduled job: {e}")
+                    due = None
+                if due is not None:
+                    timeout = min(timeout, max(0.0, due - time.time()))
+                with self._wakeup:
+                    self._wakeup.wait(timeout)
+                continue
+
+            self._run(job)
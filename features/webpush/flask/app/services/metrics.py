@@ -0,0 +1,407 @@
+"""Process-local counters and histograms exported in Prometheus text format."""
+
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from app.services.broadcast import DeliveryReport
+
+logger = logging.getLogger(__name__)
+
+# Distinct label combinations per metric; further ones are folded into "other"
+MAX_SERIES = 200
+# Thread shards per metric before those of finished threads are folded away
+SHARD_FOLD_THRESHOLD = 64
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(names, values, strict=True)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Metric whose samples are kept per thread and summed when scraped.
+
+    Each thread updates only its own dict, so recording takes no lock; the
+    lock is taken once per thread (on its first sample), once per new label
+    combination, and when scraping. Shards of finished threads are folded
+    into ``_retired`` at scrape time, and when a new thread finds
+    ``SHARD_FOLD_THRESHOLD`` shards (doubling with the live ones), so
+    short-lived pool threads do not accumulate between scrapes.
+    """
+
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        max_series: int = MAX_SERIES,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.max_series = max_series
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, dict[Labels, Any]]] = []
+        self._retired: dict[Labels, Any] = {}
+        self._fold_at = SHARD_FOLD_THRESHOLD
+        self._series: set[Labels] = set()
+        self._lock = threading.Lock()
+
+    def _key(self, labels: tuple[Any, ...]) -> Labels:
+        key = tuple(str(value) for value in labels)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        if key in self._series:
+            return key
+        with self._lock:
+            if key not in self._series:
+                if len(self._series) >= self.max_series:
+                    return ("other",) * len(key)
+                self._series.add(key)
+        return key
+
+    def _shard(self) -> dict[Labels, Any]:
+        try:
+            return self._local.shard  # type: ignore[no-any-return]
+        except AttributeError:
+            shard: dict[Labels, Any] = {}
+            with self._lock:
+                if len(self._shards) >= self._fold_at:
+                    self._fold_finished()
+                    self._fold_at = max(SHARD_FOLD_THRESHOLD, 2 * len(self._shards))
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _add(self, into: dict[Labels, Any], key: Labels, value: Any) -> None:
+        raise NotImplementedError
+
+    def _fold_finished(self) -> None:
+        # Caller holds ``self._lock``. A finished thread no longer writes to
+        # its shard, so it can be summed into ``_retired`` and dropped.
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in dict(shard).items():
+                    self._add(self._retired, key, value)
+        self._shards = live
+
+    def collect(self) -> dict[Labels, Any]:
+        """Return the summed samples of every thread, by label values."""
+        with self._lock:
+            self._fold_finished()
+            live = self._shards
+            total: dict[Labels, Any] = {}
+            for key, value in self._retired.items():
+                self._add(total, key, value)
+            shards = [dict(shard) for _, shard in live]
+        for shard in shards:
+            for key, value in shard.items():
+                self._add(total, key, value)
+        return total
+
+    def merge(self, samples: dict[Labels, Any]) -> None:
+        """Add samples collected elsewhere (e.g. in a broadcast shard process)."""
+        with self._lock:
+            for key, value in samples.items():
+                self._add(self._retired, tuple(key), value)
+
+    def reset(self) -> None:
+        """Forget every sample (tests)."""
+        with self._lock:
+            self._shards = []
+            self._retired = {}
+            self._fold_at = SHARD_FOLD_THRESHOLD
+            self._series = set()
+            self._local = threading.local()
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        """Add ``amount`` to the series for ``labels``."""
+        if not amount:
+            return
+        key = self._key(labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def _add(self, into: dict[Labels, Any], key: Labels, value: Any) -> None:
+        into[key] = into.get(key, 0) + value
+
+    def value(self, *labels: Any) -> float:
+        """Return the current total for ``labels``."""
+        return self.collect().get(tuple(str(v) for v in labels), 0)  # type: ignore[no-any-return]
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram of observations in fixed buckets.
+
+    A series is a list of per-bucket counts (the last one for +Inf) followed
+    by the sum of observations; ``_count`` is derived from the buckets so
+    the exported numbers always agree.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        max_series: int = MAX_SERIES,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: Any) -> None:
+        """Record one observation for ``labels``."""
+        key = self._key(labels)
+        shard = self._shard()
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: Any) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _add(self, into: dict[Labels, Any], key: Labels, value: Any) -> None:
+        series = into.get(key)
+        if series is None:
+            into[key] = list(value)
+        else:
+            for i, amount in enumerate(value):
+                series[i] += amount
+
+    def count(self, *labels: Any) -> int:
+        """Return the number of observations for ``labels``."""
+        series = self.collect().get(tuple(str(v) for v in labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, series in sorted(self.collect().items()):
+            cumulative = 0
+            bounds = (*self.buckets, math.inf)
+            for bound, amount in zip(bounds, series[:-1], strict=True):
+                cumulative += amount
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge read from a callback when scraped (e.g. queue depth)."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self) -> list[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.warning(f"Could not read metric {self.name}: {e}")
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric | CallbackGauge] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Any) -> Any:
+        """Add a metric, replacing one of the same name."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Labels = ()
+    ) -> Counter:
+        return self.register(  # type: ignore[no-any-return]
+            Counter(name, documentation, labelnames)
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(  # type: ignore[no-any-return]
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def gauge(
+        self, name: str, documentation: str, read: Callable[[], float]
+    ) -> CallbackGauge:
+        return self.register(  # type: ignore[no-any-return]
+            CallbackGauge(name, documentation, read)
+        )
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, dict[Labels, Any]]:
+        """Return the samples of every counter and histogram (picklable)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.collect() for m in metrics if isinstance(m, _Metric)}
+
+    def merge(self, snapshot: dict[str, dict[Labels, Any]]) -> None:
+        """Add a snapshot taken in another process."""
+        for name, samples in snapshot.items():
+            metric = self._metrics.get(name)
+            if isinstance(metric, _Metric):
+                metric.merge(samples)
+
+    def reset(self) -> None:
+        """Forget every sample (tests, and each broadcast shard process)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            if isinstance(metric, _Metric):
+                metric.reset()
+
+
+REGISTRY = Registry()
+
+NOTIFICATIONS_ACCEPTED = REGISTRY.counter(
+    "webpush_notifications_accepted_total",
+    "Notifications accepted for delivery, by job kind",
+    ("kind",),
+)
+DELIVERIES = REGISTRY.counter(
+    "webpush_deliveries_total",
+    "Final delivery outcomes per device (after retries)",
+    ("outcome",),
+)
+RETRIES = REGISTRY.counter(
+    "webpush_delivery_retries_total",
+    "Delivery attempts re-scheduled after a 429, 5xx or network error",
+)
+PRUNED = REGISTRY.counter(
+    "webpush_subscriptions_pruned_total",
+    "Subscriptions removed after the push service reported them gone",
+)
+PUSH_RESPONSES = REGISTRY.counter(
+    "webpush_push_responses_total",
+    "Push service responses per attempt, by host and status class",
+    ("host", "status_class"),
+)
+PUSH_LATENCY = REGISTRY.histogram(
+    "webpush_push_latency_seconds",
+    "Time to deliver one message to the push service, by host",
+    ("host",),
+)
+STORE_LATENCY = REGISTRY.histogram(
+    "webpush_store_lookup_seconds",
+    "Subscription store lookup time, by operation",
+    ("operation",),
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "webpush_http_request_duration_seconds",
+    "HTTP request handling time, by route and method",
+    ("route", "method"),
+)
+REQUESTS = REGISTRY.counter(
+    "webpush_http_requests_total",
+    "HTTP requests handled, by route, method and status code",
+    ("route", "method", "status"),
+)
+
+
+def status_class(status_code: int | None) -> str:
+    """Return "2xx", "4xx", ... for a status, or "error" without a response."""
+    if status_code is None:
+        return "error"
+    return f"{status_code // 100}xx"
+
+
+def record_report(report: DeliveryReport) -> None:
+    """Count the final outcomes of a finished ``DeliveryReport``."""
+    DELIVERIES.inc("sent", amount=report.sent)
+    DELIVERIES.inc("expired", amount=report.expired)
+    DELIVERIES.inc("too_large", amount=report.too_large)
+    DELIVERIES.inc("rate_limited", amount=report.rate_limited)
+    DELIVERIES.inc("transient", amount=report.transient)
+    DELIVERIES.inc(
+        "failed",
+        amount=report.failed - report.too_large - report.rate_limited - report.transient,
+    )
+    RETRIES.inc(amount=report.retried)
+    PRUNED.inc(amount=report.pruned)
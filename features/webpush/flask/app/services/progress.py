@@ -0,0 +1,123 @@
+"""In-process fan-out of job progress snapshots to any number of watchers."""
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+# Seconds a finished job's last event stays available to late watchers
+FINISHED_RETENTION = 60.0
+
+FINAL_STATUSES = frozenset({"done", "failed", "superseded"})
+
+
+class _Channel:
+    """Latest event of one job plus a condition its watchers wait on."""
+
+    __slots__ = ("condition", "version", "event")
+
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.version = 0
+        self.event: dict[str, Any] | None = None
+
+
+class ProgressHub:
+    """Latest-value broadcast of job progress.
+
+    A publisher overwrites the job's single latest event and wakes that
+    job's watchers; nothing is queued per watcher, so the cost of a publish
+    does not grow with the number of watchers and a slow watcher simply
+    skips intermediate snapshots. Each job has its own condition, so
+    watchers of one job are not woken by another. A job's channel exists
+    from its first publish until ``retention`` after its final one.
+
+    ``close`` wakes every watcher for good, so streams can end when the
+    process shuts down instead of holding it open.
+    """
+
+    def __init__(self, retention: float = FINISHED_RETENTION) -> None:
+        self.retention = retention
+        self._channels: dict[str, _Channel] = {}
+        # (expiry time, job ID) of finished jobs, oldest first
+        self._finished: deque[tuple[float, str]] = deque()
+        self._lock = threading.Lock()
+        # Notified when a job publishes for the first time
+        self._created = threading.Condition(self._lock)
+        self._closed = False
+
+    def _channel(self, job_id: str) -> _Channel:
+        channel = self._channels.get(job_id)
+        if channel is None:
+            with self._created:
+                channel = self._channels.get(job_id)
+                if channel is None:
+                    channel = self._channels[job_id] = _Channel()
+                    self._created.notify_all()
+        return channel
+
+    def publish(self, job_id: str, event: dict[str, Any]) -> None:
+        """Replace a job's latest event and wake its watchers."""
+        channel = self._channel(job_id)
+        with channel.condition:
+            channel.version += 1
+            channel.event = event
+            channel.condition.notify_all()
+
+        if event.get("status") in FINAL_STATUSES:
+            now = time.monotonic()
+            with self._lock:
+                self._finished.append((now + self.retention, job_id))
+                while self._finished and self._finished[0][0] <= now:
+                    _, expired = self._finished.popleft()
+                    self._channels.pop(expired, None)
+
+    def wait(
+        self, job_id: str, after_version: int, timeout: float
+    ) -> tuple[int, dict[str, Any]] | None:
+        """Wait for an event newer than ``after_version``.
+
+        Args:
+            job_id: Job to watch
+            after_version: Version of the last event the caller has seen
+                (0 for none)
+            timeout: Seconds to wait
+
+        Returns:
+            (version, event), or None if nothing newer was published in time
+            or the hub is closed
+        """
+        deadline = time.monotonic() + timeout
+        with self._created:
+            while (channel := self._channels.get(job_id)) is None:
+                remaining = deadline - time.monotonic()
+                if self._closed or remaining <= 0:
+                    return None
+                self._created.wait(remaining)
+
+        with channel.condition:
+            channel.condition.wait_for(
+                lambda: self._closed or channel.version > after_version,
+                max(0.0, deadline - time.monotonic()),
+            )
+            if channel.version > after_version:
+                assert channel.event is not None
+                return channel.version, channel.event
+        return None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Wake all watchers and make further waits return None at once."""
+        with self._created:
+            self._closed = True
+            self._created.notify_all()
+            channels = list(self._channels.values())
+        for channel in channels:
+            with channel.condition:
+                channel.condition.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._channels)
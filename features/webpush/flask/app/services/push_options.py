@@ -0,0 +1,63 @@
+"""Per-message Web Push delivery options (RFC 8030 TTL, Urgency and Topic)."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+# Push services keep a message at most this long (FCM's limit, 4 weeks)
+MAX_TTL = 28 * 24 * 60 * 60
+URGENCIES = ("very-low", "low", "normal", "high")
+# RFC 8030 section 5.4: at most 32 characters of the URL-safe base64 alphabet
+TOPIC_PATTERN = r"^[A-Za-z0-9_-]{1,32}$"
+
+_TOPIC = re.compile(TOPIC_PATTERN)
+
+
+@dataclass(frozen=True)
+class PushOptions:
+    """How the push service should hold a message for an offline device.
+
+    Attributes:
+        ttl: Seconds the push service may keep the message (None uses
+            ``PUSH_DEFAULT_TTL``; 0 means deliver only if the device is online)
+        urgency: "very-low", "low", "normal" or "high"; lets the device
+            defer low-priority messages to save battery
+        topic: Collapse key; a newer message with the same topic replaces
+            one still waiting at the push service
+    """
+
+    ttl: int | None = None
+    urgency: str | None = None
+    topic: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.ttl is not None and not 0 <= self.ttl <= MAX_TTL:
+            raise ValueError(f"ttl must be between 0 and {MAX_TTL} seconds")
+        if self.urgency is not None and self.urgency not in URGENCIES:
+            raise ValueError(f"urgency must be one of {', '.join(URGENCIES)}")
+        if self.topic is not None and not _TOPIC.match(self.topic):
+            raise ValueError("topic must be 1-32 URL-safe base64 characters")
+
+    def headers(self, default_ttl: int) -> dict[str, str]:
+        """Return the Web Push request headers for these options."""
+        headers = {"TTL": str(default_ttl if self.ttl is None else self.ttl)}
+        if self.urgency:
+            headers["Urgency"] = self.urgency
+        if self.topic:
+            headers["Topic"] = self.topic
+        return headers
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the options that are set, for a JSON job payload."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> PushOptions:
+        """Rebuild options from ``to_dict`` output (or a message dict)."""
+        data = data or {}
+        return cls(data.get("ttl"), data.get("urgency"), data.get("topic"))
+
+
+DEFAULT_OPTIONS = PushOptions()
@@ -1,63 +1,176 @@
 """Direct web push notification service (bypasses MagicBell)."""
 
-import json
 import logging
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
 from pathlib import Path
 from typing import Any
 
-from pywebpush import webpush
-
 from app.config import Config
+from app.services import metrics
+from app.services.broadcast import (
+    BroadcastEngine,
+    DeliveryOutcome,
+    DeliveryReport,
+    DeliveryResult,
+    PruneFn,
+    Target,
+    classify_status,
+    parse_host_limits,
+    push_host,
+)
+from app.services.encryption import (
+    CONTENT_ENCODING,
+    SubscriberKeyCache,
+    encrypt_payload,
+    prepare_payload,
+)
+from app.services.http_pool import PushHttpPool
+from app.services.job_queue import Job, JobQueue
+from app.services.push_options import DEFAULT_OPTIONS, PushOptions
+from app.services.retry import RetryPolicy, RetryScheduler, parse_retry_after
+from app.services.sharding import per_shard_limit, run_sharded, shard_count
+from app.services.subscription_cache import SubscriptionCache, SubscriptionSnapshot
+from app.services.subscription_store import SubscriptionStore, create_store
+from app.services.tags import normalize_tags, parse_tag_expression
+from app.services.vapid import VapidHeaderCache
 
 logger = logging.getLogger(__name__)
 
-# Simple file-based storage for subscriptions
-SUBSCRIPTIONS_FILE = Path(__file__).parent.parent.parent / "subscriptions.json"
+_store: SubscriptionStore | None = None
+_cache: SubscriptionCache | None = None
+_queue: JobQueue | None = None
+_http_pool: PushHttpPool | None = None
+_vapid_cache: VapidHeaderCache | None = None
+_retry_scheduler: RetryScheduler | None = None
+_store_lock = threading.Lock()
+
+
+def device_targets(subscriptions: dict[str, list[dict[str, Any]]]) -> list[Target]:
+    """Flatten ``{user_external_id: devices}`` into one target per device."""
+    return [(uid, device) for uid, devices in subscriptions.items() for device in devices]
 
 
 class PushService:
     """Service for managing push subscriptions and sending notifications."""
 
     @staticmethod
-    def load_subscriptions() -> dict[str, dict[str, Any]]:
-        """Load subscriptions from file."""
-        if not SUBSCRIPTIONS_FILE.exists():
-            return {}
+    def get_store() -> SubscriptionStore:
+        """Return the process-wide subscription store, creating it on first use."""
+        global _store
+        if _store is None:
+            with _store_lock:
+                if _store is None:
+                    _store = create_store(
+                        Config.SUBSCRIPTION_STORE,
+                        Path(Config.SUBSCRIPTIONS_DB),
+                        Path(Config.SUBSCRIPTIONS_FILE),
+                        Config.MAX_DEVICES_PER_USER,
+                    )
+        return _store
 
-        try:
-            with open(SUBSCRIPTIONS_FILE) as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load subscriptions: {e}")
-            return {}
+    @staticmethod
+    def set_store(store: SubscriptionStore | None) -> None:
+        """Replace the subscription store (None re-creates it from Config)."""
+        global _store, _cache
+        with _store_lock:
+            _store = store
+            _cache = None
 
     @staticmethod
-    def save_subscriptions(subscriptions: dict[str, dict[str, Any]]) -> None:
-        """Save subscriptions to file."""
-        try:
-            with open(SUBSCRIPTIONS_FILE, "w") as f:
-                json.dump(subscriptions, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save subscriptions: {e}")
+    def get_cache() -> SubscriptionCache:
+        """Return the in-memory subscription cache over the current store."""
+        global _cache
+        store = PushService.get_store()
+        if _cache is None:
+            with _store_lock:
+                if _cache is None:
+                    _cache = SubscriptionCache(
+                        store, Config.SUBSCRIPTION_CACHE_CHECK_INTERVAL
+                    )
+        return _cache
+
+    @staticmethod
+    def get_snapshot() -> SubscriptionSnapshot:
+        """Return the current immutable snapshot of every subscription."""
+        with metrics.STORE_LATENCY.time("snapshot"):
+            return PushService.get_cache().snapshot()
+
+    @staticmethod
+    def get_http_pool() -> PushHttpPool:
+        """Return the process-wide pooled HTTP client for push deliveries."""
+        global _http_pool
+        if _http_pool is None:
+            with _store_lock:
+                if _http_pool is None:
+                    _http_pool = PushHttpPool(
+                        pool_size=Config.PUSH_POOL_SIZE,
+                        idle_timeout=Config.PUSH_POOL_IDLE_TIMEOUT,
+                    )
+        return _http_pool
+
+    @staticmethod
+    def get_vapid_cache() -> VapidHeaderCache:
+        """Return the process-wide VAPID header cache."""
+        global _vapid_cache
+        if _vapid_cache is None:
+            with _store_lock:
+                if _vapid_cache is None:
+                    _vapid_cache = VapidHeaderCache(
+                        Config.VAPID_PRIVATE_KEY,
+                        Config.VAPID_SUBJECT,
+                        token_ttl=Config.VAPID_TOKEN_TTL,
+                    )
+        return _vapid_cache
+
+    @staticmethod
+    def get_retry_scheduler() -> RetryScheduler:
+        """Return the process-wide retry scheduler."""
+        global _retry_scheduler
+        if _retry_scheduler is None:
+            with _store_lock:
+                if _retry_scheduler is None:
+                    _retry_scheduler = RetryScheduler()
+        return _retry_scheduler
+
+    @staticmethod
+    def load_subscriptions() -> dict[str, list[dict[str, Any]]]:
+        """Load every user's device subscriptions (from the cache)."""
+        return {
+            uid: list(devices)
+            for uid, devices in PushService.get_snapshot().users.items()
+        }
 
     @staticmethod
     def register_subscription(
-        user_external_id: str, subscription: dict[str, Any]
+        user_external_id: str,
+        subscription: dict[str, Any],
+        tags: Iterable[str] | None = None,
     ) -> None:
-        """Register a push subscription for a user.
+        """Register one of a user's devices.
+
+        Re-registering an endpoint refreshes that device; a user over
+        ``MAX_DEVICES_PER_USER`` loses their least recently seen device.
 
         Args:
             user_external_id: User's external ID
             subscription: Push subscription object
+            tags: Segment tags replacing the user's current ones (None keeps them)
+
+        Raises:
+            ValueError: If the endpoint is missing or a tag is malformed
         """
-        subscriptions = PushService.load_subscriptions()
-        subscriptions[user_external_id] = subscription
-        PushService.save_subscriptions(subscriptions)
+        if not subscription.get("endpoint"):
+            raise ValueError("Subscription is missing an endpoint")
+        if tags is not None:
+            tags = normalize_tags(tags)
+        PushService.get_store().upsert(user_external_id, subscription, tags)
         logger.info(f"Registered push subscription for user: {user_external_id}")
 
     @staticmethod
     def get_subscription(user_external_id: str) -> dict[str, Any] | None:
-        """Get a user's push subscription.
+        """Get a user's most recently seen push subscription.
 
         Args:
             user_external_id: User's external ID
@@ -65,12 +178,44 @@ class PushService:
         Returns:
             Push subscription object or None if not found
         """
-        subscriptions = PushService.load_subscriptions()
-        return subscriptions.get(user_external_id)
+        devices = PushService.get_devices(user_external_id)
+        return devices[0] if devices else None
+
+    @staticmethod
+    def get_devices(user_external_id: str) -> list[dict[str, Any]]:
+        """Get all of a user's device subscriptions, most recently seen first.
+
+        Args:
+            user_external_id: User's external ID
+
+        Returns:
+            Push subscription objects (empty if the user has none)
+        """
+        with metrics.STORE_LATENCY.time("get_devices"):
+            return PushService.get_cache().get_devices(user_external_id)
+
+    @staticmethod
+    def get_subscriptions(
+        user_external_ids: list[str],
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Get the devices of several users from the subscription cache.
+
+        Args:
+            user_external_ids: Users' external IDs
+
+        Returns:
+            Device subscriptions keyed by user external ID (users without
+            any omitted)
+        """
+        with metrics.STORE_LATENCY.time("get_many"):
+            return PushService.get_cache().get_many(user_external_ids)
 
     @staticmethod
     def send_notification(
-        user_external_id: str, title: str, content: str
+        user_external_id: str,
+        title: str,
+        content: str,
+        options: PushOptions = DEFAULT_OPTIONS,
     ) -> bool:
         """Send a push notification to a user.
 
@@ -78,55 +223,500 @@ class PushService:
             user_external_id: User's external ID
             title: Notification title
             content: Notification content
+            options: Web Push TTL, urgency and topic
 
         Returns:
             True if successful, False otherwise
         """
-        subscription = PushService.get_subscription(user_external_id)
-        if not subscription:
+        report = PushService.notify_user(user_external_id, title, content, options)
+        return report.sent > 0
+
+    @staticmethod
+    def notify_user(
+        user_external_id: str,
+        title: str,
+        content: str,
+        options: PushOptions = DEFAULT_OPTIONS,
+    ) -> DeliveryReport:
+        """Send a push notification to all of a user's devices and report it.
+
+        Devices are delivered to concurrently. Rate-limited and transient
+        failures are retried with backoff, and a device the push service
+        reports as gone is pruned.
+
+        Args:
+            user_external_id: User's external ID
+            title: Notification title
+            content: Notification content
+            options: Web Push TTL, urgency and topic
+
+        Returns:
+            Delivery report counting devices (empty if the user has none)
+        """
+        report = DeliveryReport()
+        devices = PushService.get_devices(user_external_id)
+        if not devices:
             logger.warning(f"No subscription found for user: {user_external_id}")
-            return False
+            return report
 
+        payload = prepare_payload(title, content)
+        report = PushService.build_engine().run(
+            [(user_external_id, device) for device in devices],
+            lambda user_id, sub: PushService.deliver(
+                user_id, sub, payload, options=options
+            ),
+        )
+        metrics.record_report(report)
+
+        if report.sent:
+            logger.info(
+                f"Push notification sent to {report.sent}/{report.total} devices "
+                f"of {user_external_id}: {title}"
+            )
+        return report
+
+    @staticmethod
+    def deliver(
+        user_external_id: str,
+        subscription: dict[str, Any],
+        payload: bytes,
+        key_cache: SubscriberKeyCache | None = None,
+        options: PushOptions = DEFAULT_OPTIONS,
+    ) -> DeliveryResult:
+        """Encrypt and deliver a prepared payload to one subscription.
+
+        The payload is serialised once per notification (``prepare_payload``)
+        and the subscriber's parsed keys come from the store's key cache, so
+        the per-recipient work is the ECDH, the AEAD and the HTTP request.
+
+        Args:
+            user_external_id: User's external ID (for logging)
+            subscription: Push subscription object
+            payload: Serialised notification payload
+            key_cache: Parsed-key cache to use instead of the store's (broadcast
+                shards run in worker processes without a store)
+            options: Web Push TTL, urgency and topic (sent as headers)
+
+        Returns:
+            Outcome classified from the push service's response, with any
+            Retry-After it sent
+        """
+        endpoint = subscription.get("endpoint", "")
         try:
-            notification_data = json.dumps({"title": title, "content": content})
-
-            webpush(
-                subscription_info=subscription,
-                data=notification_data,
-                vapid_private_key=Config.VAPID_PRIVATE_KEY,
-                vapid_claims={
-                    "sub": "mailto:admin@example.com",  # Required by VAPID spec
-                },
+            if key_cache is not None:
+                keys = key_cache.get(subscription)
+            else:
+                keys = PushService.get_store().subscriber_keys(subscription)
+            body = encrypt_payload(payload, keys)
+        except Exception as e:
+            logger.error(f"Invalid subscription keys for {user_external_id}: {e}")
+            return DeliveryResult(DeliveryOutcome.FAILED)
+
+        headers = PushService.get_vapid_cache().headers_for(endpoint)
+        headers["Content-Encoding"] = CONTENT_ENCODING
+        headers.update(options.headers(Config.PUSH_DEFAULT_TTL))
+
+        import requests
+
+        host = push_host(subscription)
+        start = time.perf_counter()
+        try:
+            response = PushService.get_http_pool().post(
+                endpoint, body, headers, timeout=Config.PUSH_TIMEOUT
             )
+        except requests.RequestException as e:
+            logger.error(f"Push service unreachable for {user_external_id}: {e}")
+            metrics.PUSH_RESPONSES.inc(host, metrics.status_class(None))
+            return DeliveryResult(DeliveryOutcome.TRANSIENT)
+        metrics.PUSH_LATENCY.observe(time.perf_counter() - start, host)
+        metrics.PUSH_RESPONSES.inc(host, metrics.status_class(response.status_code))
+
+        outcome = classify_status(response.status_code)
+        if outcome is DeliveryOutcome.SENT:
+            return DeliveryResult(outcome)
 
+        if outcome is DeliveryOutcome.EXPIRED:
             logger.info(
-                f"Push notification sent to {user_external_id}: {title}"
+                f"Subscription for {user_external_id} is gone ({response.status_code})"
             )
-            return True
+        else:
+            logger.error(
+                f"Failed to send push notification to {user_external_id} "
+                f"({outcome.value}): {response.status_code} {response.text[:200]}"
+            )
+        return DeliveryResult(
+            outcome, parse_retry_after(response.headers.get("Retry-After"))
+        )
 
-        except Exception as e:
-            logger.error(f"Failed to send push notification: {e}")
-            return False
+    @staticmethod
+    def prune_subscriptions(targets: list[tuple[str, dict[str, Any]]]) -> int:
+        """Remove subscriptions the push service reported as gone.
+
+        Args:
+            targets: (user_external_id, subscription) pairs that returned 404/410
+
+        Returns:
+            Number of subscriptions removed
+        """
+        pruned = PushService.get_store().remove(
+            (user_id, sub.get("endpoint", "")) for user_id, sub in targets
+        )
+        if pruned:
+            logger.info(f"Pruned {pruned} expired push subscriptions")
+        return pruned
+
+    @staticmethod
+    def build_engine(shards: int = 1, prune: PruneFn | None = None) -> BroadcastEngine:
+        """Build a delivery engine configured from Config.
+
+        Args:
+            shards: Number of processes sharing the broadcast; per-host limits
+                are divided between them so the push services see the same
+                total concurrency
+            prune: Override for removing expired targets (defaults to the store)
+
+        Returns:
+            Configured engine
+        """
+        overrides = parse_host_limits(Config.PUSH_HOST_CONCURRENCY_OVERRIDES)
+        return BroadcastEngine(
+            max_workers=Config.BROADCAST_MAX_WORKERS,
+            host_limit=per_shard_limit(Config.PUSH_HOST_CONCURRENCY, shards),
+            host_overrides={
+                host: per_shard_limit(limit, shards)
+                for host, limit in overrides.items()
+            },
+            prune=prune or PushService.prune_subscriptions,
+            prune_batch_size=Config.PRUNE_BATCH_SIZE,
+            retry_policy=RetryPolicy(
+                max_attempts=Config.PUSH_MAX_ATTEMPTS,
+                base_delay=Config.PUSH_RETRY_BASE_DELAY,
+                max_delay=Config.PUSH_RETRY_MAX_DELAY,
+            ),
+            scheduler=PushService.get_retry_scheduler(),
+        )
 
     @staticmethod
-    def broadcast_notification(title: str, content: str) -> int:
+    def broadcast_notification(
+        title: str,
+        content: str,
+        on_progress: Callable[[DeliveryReport], None] | None = None,
+        options: PushOptions = DEFAULT_OPTIONS,
+    ) -> DeliveryReport:
         """Send a push notification to all subscribed users.
 
+        See ``fan_out`` for how deliveries are spread over workers.
+
         Args:
             title: Notification title
             content: Notification content
+            on_progress: Optional callback receiving interim report snapshots
+            options: Web Push TTL, urgency and topic
+
+        Returns:
+            Aggregated sent/failed/expired/pruned counts
+        """
+        report = PushService.fan_out(
+            PushService.get_snapshot().targets,
+            title,
+            content,
+            on_progress,
+            options,
+        )
+        logger.info(
+            f"Broadcast notification sent to {report.sent}/{report.total} users "
+            f"({report.failed} failed, {report.expired} expired, {report.pruned} pruned)"
+        )
+        return report
+
+    @staticmethod
+    def send_to_tags(
+        expression: str,
+        title: str,
+        content: str,
+        on_progress: Callable[[DeliveryReport], None] | None = None,
+        options: PushOptions = DEFAULT_OPTIONS,
+    ) -> DeliveryReport:
+        """Send a push notification to every user matching a tag expression.
+
+        Recipients come from the store's inverted tag index, so only the
+        matching subscriptions are loaded and delivered to.
+
+        Args:
+            expression: Tag expression, e.g. "sports AND (nba OR nfl)"
+            title: Notification title
+            content: Notification content
+            on_progress: Optional callback receiving interim report snapshots
+            options: Web Push TTL, urgency and topic
+
+        Returns:
+            Aggregated sent/failed/expired/pruned counts
+
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        store = PushService.get_store()
+        with metrics.STORE_LATENCY.time("match_tags"):
+            users = store.match_tags(parse_tag_expression(expression))
+        report = PushService.fan_out(
+            device_targets(PushService.get_subscriptions(list(users))),
+            title,
+            content,
+            on_progress,
+            options,
+        )
+        logger.info(
+            f"Notification for tags '{expression}' sent to "
+            f"{report.sent}/{report.total} users ({report.failed} failed, "
+            f"{report.expired} expired, {report.pruned} pruned)"
+        )
+        return report
+
+    @staticmethod
+    def fan_out(
+        targets: Sequence[Target],
+        title: str,
+        content: str,
+        on_progress: Callable[[DeliveryReport], None] | None = None,
+        options: PushOptions = DEFAULT_OPTIONS,
+    ) -> DeliveryReport:
+        """Deliver one notification to many subscriptions.
+
+        Deliveries run concurrently on a bounded worker pool, with a separate
+        in-flight limit per push-service host (see ``BroadcastEngine``). Large
+        fan-outs are sharded across worker processes (``BROADCAST_PROCESSES``)
+        so payload encryption is not limited to one core by the GIL.
+
+        Args:
+            targets: (user_external_id, subscription) pairs, one per device
+            title: Notification title
+            content: Notification content
+            on_progress: Optional callback receiving interim report snapshots
+            options: Web Push TTL, urgency and topic
+
+        Returns:
+            Aggregated delivery report
+        """
+        # Serialised once; each recipient only pays for its own encryption
+        payload = prepare_payload(title, content)
+
+        shards = shard_count(
+            Config.BROADCAST_PROCESSES,
+            len(targets),
+            Config.BROADCAST_SHARD_MIN_SIZE,
+        )
+        if shards > 1:
+            logger.info(
+                f"Sharding delivery to {len(targets)} subscriptions "
+                f"across {shards} processes"
+            )
+            report = run_sharded(
+                targets,
+                payload,
+                shards,
+                PushService.prune_subscriptions,
+                Config.PRUNE_BATCH_SIZE,
+                on_progress,
+                options,
+            )
+        else:
+            report = PushService.build_engine().run(
+                targets,
+                lambda user_id, sub: PushService.deliver(
+                    user_id, sub, payload, options=options
+                ),
+                on_progress,
+            )
+        metrics.record_report(report)
+        return report
+
+    @staticmethod
+    def send_batch(
+        messages: list[dict[str, str]],
+        on_progress: Callable[[DeliveryReport], None] | None = None,
+    ) -> DeliveryReport:
+        """Deliver many personalised notifications as one fan-out.
+
+        Recipients are resolved with a single store lookup and every message
+        goes to all of its recipient's devices through one ``BroadcastEngine``
+        run, so a batch shares the worker pool, per-host limits, retries and
+        pruning of a broadcast.
+
+        Args:
+            messages: Dicts with recipient_external_id, title and content, and
+                optionally ttl, urgency and topic
+            on_progress: Optional callback receiving interim report snapshots
 
         Returns:
-            Number of successful sends
+            Aggregated report counting devices; a recipient without any
+            device counts as one failure
         """
-        subscriptions = PushService.load_subscriptions()
-        success_count = 0
+        subscriptions = PushService.get_subscriptions(
+            [m["recipient_external_id"] for m in messages]
+        )
 
-        for user_id in subscriptions:
-            if PushService.send_notification(user_id, title, content):
-                success_count += 1
+        targets = []
+        # Keyed by id() of each target's own subscription copy, so a recipient
+        # listed twice still gets both of its messages
+        payloads: dict[int, tuple[bytes, PushOptions]] = {}
+        missing = 0
+        for message in messages:
+            devices = subscriptions.get(message["recipient_external_id"])
+            if not devices:
+                missing += 1
+                continue
+            payload = prepare_payload(message["title"], message["content"])
+            options = PushOptions.from_dict(message)
+            for device in devices:
+                target_sub = dict(device)
+                payloads[id(target_sub)] = (payload, options)
+                targets.append((message["recipient_external_id"], target_sub))
+
+        report = PushService.build_engine().run(
+            targets,
+            lambda user_id, sub: PushService.deliver(
+                user_id, sub, payloads[id(sub)][0], options=payloads[id(sub)][1]
+            ),
+            on_progress,
+        )
+        report.total += missing
+        report.failed += missing
+        metrics.record_report(report)
 
         logger.info(
-            f"Broadcast notification sent to {success_count}/{len(subscriptions)} users"
+            f"Batch of {report.total} notifications: {report.sent} sent, "
+            f"{report.failed} failed, {report.expired} expired"
         )
-        return success_count
+        return report
+
+    @staticmethod
+    def get_queue() -> JobQueue:
+        """Return the process-wide delivery queue, creating it on first use."""
+        global _queue
+        if _queue is None:
+            with _store_lock:
+                if _queue is None:
+                    _queue = JobQueue(
+                        Path(Config.JOBS_DB),
+                        PushService.run_job,
+                        workers=Config.DELIVERY_WORKERS,
+                        lease_seconds=Config.JOB_LEASE_SECONDS,
+                    )
+        return _queue
+
+    @staticmethod
+    def set_queue(queue: JobQueue | None) -> None:
+        """Replace the delivery queue (None re-creates it from Config)."""
+        global _queue
+        with _store_lock:
+            _queue = queue
+
+    @staticmethod
+    def enqueue_notification(
+        title: str,
+        content: str,
+        recipient_external_id: str | None = None,
+        tags: str | None = None,
+        options: PushOptions = DEFAULT_OPTIONS,
+        run_at: float | None = None,
+    ) -> str:
+        """Accept a notification for background delivery.
+
+        Without a recipient or tags the notification is broadcast. With a
+        topic, a queued job for the same topic and target that has not
+        started yet is superseded: only the newest message is delivered.
+
+        Args:
+            title: Notification title
+            content: Notification content
+            recipient_external_id: Single recipient
+            tags: Tag expression selecting recipients (ignored with a recipient)
+            options: Web Push TTL, urgency and topic
+            run_at: Unix time to deliver at (None for immediately)
+
+        Returns:
+            ID of the queued job
+        """
+        payload: dict[str, Any] = {"title": title, "content": content}
+        if recipient_external_id:
+            kind, target = "send", recipient_external_id
+            payload["recipient_external_id"] = recipient_external_id
+        elif tags:
+            kind, target = "segment", tags
+            payload["tags"] = tags
+        else:
+            kind, target = "broadcast", ""
+        if options != DEFAULT_OPTIONS:
+            payload["options"] = options.to_dict()
+
+        coalesce_key = f"{kind}:{target}:{options.topic}" if options.topic else None
+        job_id = PushService.get_queue().submit(kind, payload, coalesce_key, run_at)
+        metrics.NOTIFICATIONS_ACCEPTED.inc(kind)
+        return job_id
+
+    @staticmethod
+    def enqueue_batch(
+        messages: list[dict[str, str]], run_at: float | None = None
+    ) -> str:
+        """Accept a batch of personalised notifications as one job.
+
+        Args:
+            messages: Dicts with recipient_external_id, title and content, and
+                optionally ttl, urgency and topic
+            run_at: Unix time to deliver at (None for immediately)
+
+        Returns:
+            ID of the queued job
+        """
+        job_id = PushService.get_queue().submit(
+            "batch", {"messages": messages}, run_at=run_at
+        )
+        metrics.NOTIFICATIONS_ACCEPTED.inc("batch", amount=len(messages))
+        return job_id
+
+    @staticmethod
+    def run_job(job: Job, progress: Callable[[DeliveryReport], None]) -> DeliveryReport:
+        """Deliver a queued job (JobQueue handler).
+
+        Args:
+            job: Claimed job
+            progress: Callback receiving interim report snapshots
+
+        Returns:
+            Final delivery report
+
+        Raises:
+            ValueError: If the job kind is unknown
+        """
+        options = PushOptions.from_dict(job.payload.get("options"))
+        if job.kind == "send":
+            return PushService.notify_user(
+                job.payload["recipient_external_id"],
+                job.payload["title"],
+                job.payload["content"],
+                options,
+            )
+        if job.kind == "broadcast":
+            return PushService.broadcast_notification(
+                job.payload["title"], job.payload["content"], progress, options
+            )
+        if job.kind == "segment":
+            return PushService.send_to_tags(
+                job.payload["tags"], job.payload["title"], job.payload["content"],
+                progress, options,
+            )
+        if job.kind == "batch":
+            return PushService.send_batch(job.payload["messages"], progress)
+        raise ValueError(f"Unknown job kind: {job.kind}")
+
+
+metrics.REGISTRY.gauge(
+    "webpush_queue_depth",
+    "Delivery jobs due or running",
+    lambda: PushService.get_queue().pending_count(),
+)
+metrics.REGISTRY.gauge(
+    "webpush_scheduled_jobs",
+    "Delivery jobs waiting for their scheduled time",
+    lambda: PushService.get_queue().scheduled_count(),
+)
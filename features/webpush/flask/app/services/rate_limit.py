@@ -0,0 +1,250 @@
+"""Token-bucket rate limiting of bot requests, in memory or shared via SQLite."""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+
+# Buckets kept in memory before refilled (idle) ones are swept
+MAX_MEMORY_BUCKETS = 100_000
+# SQLite calls between sweeps of refilled buckets
+SQLITE_SWEEP_EVERY = 1000
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Rate:
+    """A sustained rate plus the burst allowed on top of it."""
+
+    per_minute: float
+    burst: int
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0 and self.burst > 0
+
+    @property
+    def refill_seconds(self) -> float:
+        """Seconds for an empty bucket to fill up again."""
+        return self.burst / self.per_second
+
+
+class BucketStore(ABC):
+    """Holds token-bucket state; ``take`` must be atomic per key."""
+
+    @abstractmethod
+    def take(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens from a bucket.
+
+        Args:
+            key: Bucket key
+            rate: Refill rate and capacity of the bucket
+            cost: Tokens to take
+
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they would be
+        """
+
+
+class MemoryBucketStore(BucketStore):
+    """Per-process buckets; one short critical section per request."""
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        # key -> (tokens, monotonic time of last update, rate)
+        self._buckets: dict[str, tuple[float, float, Rate]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._sweep(now)
+                tokens = float(rate.burst)
+            else:
+                tokens = min(rate.burst, state[0] + (now - state[1]) * rate.per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now, rate)
+                return 0.0
+            self._buckets[key] = (tokens, now, rate)
+        return (cost - tokens) / rate.per_second
+
+    def _sweep(self, now: float) -> None:
+        # Caller holds ``self._lock``. A bucket that has refilled is the same
+        # as no bucket, so dropping it loses nothing.
+        full = [
+            key
+            for key, (tokens, updated, rate) in self._buckets.items()
+            if tokens + (now - updated) * rate.per_second >= rate.burst
+        ]
+        for key in full:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_buckets:
+            logger.warning(
+                f"Rate limiter tracks {len(self._buckets)} active buckets "
+                f"(MAX_MEMORY_BUCKETS={self.max_buckets})"
+            )
+
+
+class SqliteBucketStore(BucketStore):
+    """Buckets shared by every process using the same database file.
+
+    Each ``take`` is a single UPSERT, so it is atomic across processes
+    without an explicit transaction. Durability is not needed: losing the
+    latest bucket state in a crash only refills some buckets early.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self._calls = 0
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                granted INTEGER NOT NULL,
+                updated REAL NOT NULL,
+                expires REAL NOT NULL
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        now = time.time()
+        conn = self._connect()
+        tokens, granted = conn.execute(
+            """
+            INSERT INTO rate_buckets (key, tokens, granted, updated, expires)
+            VALUES (:key, :burst - :cost, :burst >= :cost, :now, :now + :refill)
+            ON CONFLICT (key) DO UPDATE SET
+                granted = min(:burst, tokens + (:now - updated) * :rate) >= :cost,
+                tokens = min(:burst, tokens + (:now - updated) * :rate)
+                    - (min(:burst, tokens + (:now - updated) * :rate) >= :cost) * :cost,
+                updated = :now,
+                expires = :now + :refill
+            RETURNING tokens, granted
+            """,
+            {
+                "key": key,
+                "burst": rate.burst,
+                "cost": cost,
+                "now": now,
+                "rate": rate.per_second,
+                "refill": rate.refill_seconds,
+            },
+        ).fetchone()
+
+        self._calls += 1
+        if self._calls % SQLITE_SWEEP_EVERY == 0:
+            conn.execute("DELETE FROM rate_buckets WHERE expires < ?", (now,))
+
+        if granted:
+            return 0.0
+        return float((cost - tokens) / rate.per_second)
+
+
+class RateLimiter:
+    """Named token-bucket limits, e.g. one bucket per bot and per recipient."""
+
+    def __init__(self, store: BucketStore, rates: dict[str, Rate]) -> None:
+        self.store = store
+        self.rates = {scope: rate for scope, rate in rates.items() if rate.enabled}
+
+    def acquire(self, scope: str, key: str, cost: float = 1.0) -> float:
+        """Take tokens from the ``scope`` bucket of ``key``.
+
+        Args:
+            scope: Limit name, e.g. "bot" or "recipient" (unknown or disabled
+                scopes are unlimited)
+            key: What is limited, e.g. the bot ID
+            cost: Tokens to take
+
+        Returns:
+            0 if allowed, otherwise seconds to wait before retrying
+        """
+        rate = self.rates.get(scope)
+        if rate is None:
+            return 0.0
+        return self.store.take(f"{scope}:{key}", rate, cost)
+
+    def burst(self, scope: str) -> int | None:
+        """Most tokens one ``acquire`` can take, or None if ``scope`` is unlimited."""
+        rate = self.rates.get(scope)
+        return rate.burst if rate else None
+
+
+def create_limiter(backend: str, path: Path, rates: dict[str, Rate]) -> RateLimiter:
+    """Build a rate limiter for the configured backend ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        return RateLimiter(SqliteBucketStore(path), rates)
+    if backend != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{backend}', using memory")
+    return RateLimiter(MemoryBucketStore(), rates)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it from Config on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = create_limiter(
+                    Config.RATE_LIMIT_BACKEND,
+                    Path(Config.RATE_LIMIT_DB),
+                    {
+                        "bot": Rate(
+                            Config.BOT_RATE_PER_MINUTE, Config.BOT_RATE_BURST
+                        ),
+                        "broadcast": Rate(
+                            Config.BROADCAST_RATE_PER_MINUTE,
+                            Config.BROADCAST_RATE_BURST,
+                        ),
+                        "recipient": Rate(
+                            Config.RECIPIENT_RATE_PER_MINUTE,
+                            Config.RECIPIENT_RATE_BURST,
+                        ),
+                    },
+                )
+    return _limiter
+
+
+def set_rate_limiter(limiter: RateLimiter | None) -> None:
+    """Replace the rate limiter (None re-creates it from Config)."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
@@ -0,0 +1,136 @@
+"""Timer-heap retry scheduling with exponential backoff for push delivery."""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Parse a Retry-After header into a delay in seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+        now: Current UNIX time (defaults to time.time())
+
+    Returns:
+        Non-negative delay in seconds, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long to wait before retrying a delivery."""
+
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """Return the wait before the next attempt, or None to give up.
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first failure)
+            retry_after: Delay requested by the push service, if any
+
+        Returns:
+            Seconds to wait, or None if the attempt budget is spent or the
+            requested Retry-After exceeds ``max_delay``
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None
+            # Small jitter so every throttled recipient does not return at once
+            return retry_after + random.uniform(0, self.base_delay)
+
+        # Exponential backoff with "equal jitter": half fixed, half random
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return float(ceiling / 2 + random.uniform(0, ceiling / 2))
+
+
+class RetryScheduler:
+    """Run callbacks after a delay from a single timer thread.
+
+    Pending callbacks live in a heap ordered by due time, so thousands of
+    scheduled retries cost one sleeping thread, and delivery workers are
+    never parked waiting for a retry. Callbacks must be quick: they should
+    hand work back to a pool rather than deliver inline.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        """Run ``callback`` after ``delay`` seconds."""
+        due = time.monotonic() + max(0.0, delay)
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._counter), callback))
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name="push-retry-scheduler", daemon=True
+                )
+                self._thread.start()
+            # Wake the timer thread in case this is now the earliest entry
+            self._cond.notify()
+
+    def pending(self) -> int:
+        """Return the number of callbacks waiting to run."""
+        with self._cond:
+            return len(self._heap)
+
+    def shutdown(self) -> None:
+        """Stop the timer thread, dropping callbacks that have not run."""
+        with self._cond:
+            self._stopping = True
+            self._heap.clear()
+            self._cond.notify()
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return
+                _, _, callback = heapq.heappop(self._heap)
+
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Scheduled retry callback failed: {e}")
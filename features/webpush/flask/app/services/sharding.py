@@ -0,0 +1,189 @@
+"""Multi-process broadcast sharding for CPU-bound payload encryption."""
+
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from app.services import metrics
+from app.services.broadcast import DeliveryReport, PruneFn, Target
+from app.services.encryption import SubscriberKeyCache
+from app.services.push_options import DEFAULT_OPTIONS, PushOptions
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress messages a shard sends to the parent
+PROGRESS_INTERVAL = 0.25
+
+# Set in each worker process by ``_init_worker``
+_progress_queue: Any = None
+
+
+def shard_count(setting: str, total: int, min_shard_size: int) -> int:
+    """Decide how many worker processes a broadcast should use.
+
+    Args:
+        setting: "auto" (one per CPU core), a number, or "0"/"1" to disable
+        total: Number of deliveries in the broadcast
+        min_shard_size: Smallest shard worth a process of its own
+
+    Returns:
+        Number of shards, 1 meaning deliver in-process
+    """
+    setting = (setting or "").strip().lower()
+    if setting == "auto":
+        wanted = os.cpu_count() or 1
+    else:
+        try:
+            wanted = int(setting or 1)
+        except ValueError:
+            logger.warning(f"Invalid BROADCAST_PROCESSES value: {setting}")
+            return 1
+    return max(1, min(wanted, total // max(1, min_shard_size)))
+
+
+def split(targets: Sequence[Target], shards: int) -> list[Sequence[Target]]:
+    """Deal targets round-robin so every shard gets a similar host mix."""
+    return [targets[i::shards] for i in range(shards)]
+
+
+def per_shard_limit(limit: int, shards: int) -> int:
+    """Split a per-host concurrency limit between shards (at least 1 each)."""
+    return max(1, math.ceil(limit / shards))
+
+
+def _init_worker(progress_queue: Any) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _deliver_shard(
+    index: int,
+    targets: Sequence[Target],
+    payload: bytes,
+    shards: int,
+    options: PushOptions = DEFAULT_OPTIONS,
+) -> tuple[dict[str, int], list[Target], dict[str, Any]]:
+    """Deliver one shard inside a worker process.
+
+    The worker has its own connection pool, VAPID cache and key cache.
+    Expired targets are returned to the parent, which owns the store, along
+    with this shard's per-attempt metrics for the parent to merge.
+    """
+    # Imported here: push_service imports this module
+    from app.services.push_service import PushService
+
+    # Pool processes are reused, so drop samples of a previous shard that
+    # the parent has already merged
+    metrics.REGISTRY.reset()
+    expired: list[Target] = []
+
+    def collect_expired(batch: list[Target]) -> int:
+        expired.extend(batch)
+        return 0
+
+    progress_lock = threading.Lock()
+    last_sent = 0.0
+
+    def progress(report: DeliveryReport) -> None:
+        nonlocal last_sent
+        if not progress_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - last_sent >= PROGRESS_INTERVAL:
+                last_sent = now
+                _progress_queue.put((index, report.to_dict()))
+        finally:
+            progress_lock.release()
+
+    key_cache = SubscriberKeyCache()
+    report = PushService.build_engine(shards=shards, prune=collect_expired).run(
+        targets,
+        lambda user_id, sub: PushService.deliver(
+            user_id, sub, payload, key_cache, options
+        ),
+        progress,
+    )
+    return report.to_dict(), expired, metrics.REGISTRY.snapshot()
+
+
+def run_sharded(
+    targets: Sequence[Target],
+    payload: bytes,
+    shards: int,
+    prune: PruneFn,
+    prune_batch_size: int = 100,
+    on_progress: Callable[[DeliveryReport], None] | None = None,
+    options: PushOptions = DEFAULT_OPTIONS,
+) -> DeliveryReport:
+    """Deliver a broadcast across ``shards`` worker processes.
+
+    Args:
+        targets: (user_external_id, subscription) pairs
+        payload: Prepared notification payload
+        shards: Number of worker processes
+        prune: Removes expired targets from the store (runs in this process)
+        prune_batch_size: Expired targets removed per store call
+        on_progress: Optional callback receiving merged report snapshots
+        options: Web Push TTL, urgency and topic
+
+    Returns:
+        Single delivery report merged from every shard
+    """
+    # Only broadcasts large enough to shard need the process machinery
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    progress_queue = context.Queue()
+    latest: dict[int, DeliveryReport] = {}
+    finished = threading.Event()
+
+    def relay_progress() -> None:
+        while not finished.is_set():
+            try:
+                index, data = progress_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            latest[index] = DeliveryReport(**data)
+            if on_progress:
+                on_progress(DeliveryReport.merged(latest.values()))
+
+    relay = threading.Thread(target=relay_progress, name="shard-progress", daemon=True)
+    relay.start()
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=shards,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(progress_queue,),
+        ) as pool:
+            futures = [
+                pool.submit(_deliver_shard, index, chunk, payload, shards, options)
+                for index, chunk in enumerate(split(targets, shards))
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        finished.set()
+        relay.join()
+        progress_queue.close()
+
+    report = DeliveryReport.merged(DeliveryReport(**data) for data, _, _ in results)
+    expired = [target for _, shard_expired, _ in results for target in shard_expired]
+    for _, _, shard_metrics in results:
+        metrics.REGISTRY.merge(shard_metrics)
+    for start in range(0, len(expired), prune_batch_size):
+        try:
+            report.pruned += prune(expired[start : start + prune_batch_size])
+        except Exception as e:
+            logger.error(f"Failed to prune expired subscriptions: {e}")
+
+    if on_progress:
+        on_progress(report)
+    return report
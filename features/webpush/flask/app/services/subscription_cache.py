@@ -0,0 +1,124 @@
+"""Read-through in-memory snapshot of every push subscription."""
+
+import logging
+import threading
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any
+
+from app.services.broadcast import Target
+from app.services.subscription_store import SubscriptionStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SubscriptionSnapshot:
+    """Immutable view of the store at one device generation.
+
+    ``users`` maps each user to their devices, most recently seen first.
+    ``targets`` flattens it into one (user, subscription) pair per device
+    and is built once per snapshot, on first use. Subscriptions are shared
+    with later snapshots and must not be modified.
+    """
+
+    generation: int
+    users: Mapping[str, tuple[dict[str, Any], ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+    @cached_property
+    def targets(self) -> tuple[Target, ...]:
+        return tuple(
+            (uid, device) for uid, devices in self.users.items() for device in devices
+        )
+
+
+class SubscriptionCache:
+    """Keep a snapshot of the store in memory and refresh it incrementally.
+
+    Reads are served from the current snapshot. The store's device
+    generation is compared at most every ``check_interval`` seconds; when it
+    moved, only the users the store reports as changed are re-read and a new
+    snapshot replaces the old one, so readers never see a half-applied
+    update. Writes through the same store object mark the snapshot stale at
+    once, and writes by other processes are picked up by the generation
+    check. Only backends that cannot list changed users (the JSON file) are
+    reloaded in full.
+    """
+
+    def __init__(self, store: SubscriptionStore, check_interval: float = 1.0) -> None:
+        self.store = store
+        self.check_interval = check_interval
+        self._snapshot: SubscriptionSnapshot | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        store.add_listener(self.invalidate)
+
+    def invalidate(self) -> None:
+        """Check the store's generation on the next read."""
+        self._next_check = 0.0
+
+    def snapshot(self) -> SubscriptionSnapshot:
+        """Return a snapshot no older than ``check_interval`` (or the last write)."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            now = time.monotonic()
+            if snapshot is None or now >= self._next_check:
+                # Armed before reading, so a write landing during the
+                # refresh triggers another check
+                self._next_check = now + self.check_interval
+                snapshot = self._snapshot = self._refresh(snapshot)
+        return snapshot
+
+    def _refresh(self, snapshot: SubscriptionSnapshot | None) -> SubscriptionSnapshot:
+        # Caller holds ``self._lock``
+        if snapshot is not None:
+            changes = self.store.device_changes_since(snapshot.generation)
+            if changes is not None:
+                generation, changed = changes
+                if generation == snapshot.generation:
+                    return snapshot
+                fresh = self.store.get_many(changed)
+                updated = dict(snapshot.users)
+                for uid in changed:
+                    devices = fresh.get(uid)
+                    if devices:
+                        updated[uid] = tuple(devices)
+                    else:
+                        updated.pop(uid, None)
+                logger.debug(
+                    f"Subscription cache refreshed {len(changed)} users "
+                    f"(generation {generation})"
+                )
+                return SubscriptionSnapshot(generation, MappingProxyType(updated))
+            if self.store.device_generation() == snapshot.generation:
+                return snapshot
+
+        # Read the generation first: the data is then at least that new
+        generation = self.store.device_generation()
+        users = {uid: tuple(devices) for uid, devices in self.store.all().items()}
+        logger.info(f"Subscription cache loaded {len(users)} users")
+        return SubscriptionSnapshot(generation, MappingProxyType(users))
+
+    def get_many(
+        self, user_external_ids: Iterable[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Return the devices of several users (users without any omitted)."""
+        users = self.snapshot().users
+        return {
+            uid: list(users[uid])
+            for uid in dict.fromkeys(user_external_ids)
+            if uid in users
+        }
+
+    def get_devices(self, user_external_id: str) -> list[dict[str, Any]]:
+        """Return all of a user's devices, most recently seen first."""
+        return list(self.snapshot().users.get(user_external_id, ()))
@@ -0,0 +1,787 @@
+"""Pluggable storage backends for push subscriptions."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from app.services.encryption import SubscriberKeyCache, SubscriberKeys
+from app.services.tags import TagExpression, TagIndex
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds a writer waits for another process to release the WAL lock
+BUSY_TIMEOUT_MS = 5000
+
+# Bound parameters per IN (...) query; older SQLite builds cap these at 999
+SQL_VARIABLE_CHUNK = 500
+
+DEFAULT_MAX_DEVICES_PER_USER = 10
+
+# Device changes kept in the SQLite change log for incremental cache refreshes
+DEVICE_CHANGE_LOG_SIZE = 10_000
+
+
+class SubscriptionStore(ABC):
+    """Interface every subscription backend implements.
+
+    A user may have several devices, each with its own subscription. Devices
+    are identified by their endpoint, and a user's devices are returned most
+    recently seen first. Registering more than ``max_devices_per_user``
+    devices evicts the least recently seen ones.
+
+    Every backend also keeps an in-memory cache of parsed encryption keys,
+    so repeated deliveries to a subscriber skip base64 decoding and P-256
+    point validation, and an inverted index of subscription tags.
+
+    ``device_generation`` changes whenever any device changes, in any
+    process, and listeners added with ``add_listener`` are called after
+    every write made through this store object.
+    """
+
+    def __init__(self, max_devices_per_user: int = DEFAULT_MAX_DEVICES_PER_USER) -> None:
+        self.max_devices_per_user = max(1, max_devices_per_user)
+        self.key_cache = SubscriberKeyCache()
+        self.tag_index = TagIndex()
+        self._tag_generation: int | None = None
+        self._tag_lock = threading.Lock()
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener`` after each device write through this store."""
+        self._listeners.append(listener)
+
+    def _notify_listeners(self) -> None:
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Subscription change listener failed: {e}")
+
+    def device_changes_since(self, generation: int) -> tuple[int, set[str]] | None:
+        """Return the current device generation and the users changed since.
+
+        Returns:
+            (generation, changed user IDs), or None if the backend cannot
+            tell which users changed and the caller must reload everything
+        """
+        return None
+
+    def subscriber_keys(self, subscription: dict[str, Any]) -> SubscriberKeys:
+        """Return a subscription's parsed encryption keys (cached).
+
+        Raises:
+            ValueError: If the subscription keys are missing or invalid
+        """
+        return self.key_cache.get(subscription)
+
+    def match_tags(self, expression: TagExpression) -> set[str]:
+        """Return the users whose tags match a parsed expression.
+
+        The index is (re)loaded from storage only when the tag generation
+        changed since it was built, e.g. after another process registered
+        a tagged subscription.
+        """
+        generation = self.tag_generation()
+        with self._tag_lock:
+            if generation != self._tag_generation:
+                self.tag_index.load(self.all_tags())
+                self._tag_generation = generation
+        return self.tag_index.match(expression)
+
+    def _apply_tag_change(
+        self, before: int, after: int, update: Callable[[], None]
+    ) -> None:
+        # Keep the index current after our own write, unless it was already
+        # behind storage; then leave it stale for match_tags to reload
+        with self._tag_lock:
+            if self._tag_generation == before:
+                update()
+                self._tag_generation = after
+
+    def get(self, user_external_id: str) -> dict[str, Any] | None:
+        """Return the user's most recently seen device, or None if not found."""
+        devices = self.get_devices(user_external_id)
+        return devices[0] if devices else None
+
+    def get_devices(self, user_external_id: str) -> list[dict[str, Any]]:
+        """Return all of a user's device subscriptions, most recent first."""
+        return self.get_many([user_external_id]).get(user_external_id, [])
+
+    @abstractmethod
+    def get_many(
+        self, user_external_ids: Iterable[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Return the devices of several users in one lookup.
+
+        Users without a device are absent from the result.
+        """
+
+    @abstractmethod
+    def upsert(
+        self,
+        user_external_id: str,
+        subscription: dict[str, Any],
+        tags: Iterable[str] | None = None,
+    ) -> None:
+        """Add or refresh one of a user's devices.
+
+        A subscription whose endpoint is already stored replaces that device
+        (moving it to this user if it belonged to another) and marks it as
+        just seen. ``tags`` replaces the user's tags; None leaves them
+        unchanged.
+        """
+
+    @abstractmethod
+    def all_tags(self) -> dict[str, frozenset[str]]:
+        """Return every user's tags."""
+
+    @abstractmethod
+    def tag_generation(self) -> int:
+        """Return a value that changes whenever any tags change."""
+
+    @abstractmethod
+    def device_generation(self) -> int:
+        """Return a value that changes whenever any device changes."""
+
+    @abstractmethod
+    def all(self) -> dict[str, list[dict[str, Any]]]:
+        """Return every user's devices keyed by user external ID."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the number of stored devices."""
+
+    @abstractmethod
+    def remove(self, entries: Iterable[tuple[str, str]]) -> int:
+        """Remove devices in one batch.
+
+        Each entry is a (user_external_id, endpoint) pair. A device is only
+        removed if that endpoint still belongs to that user.
+
+        Returns:
+            Number of devices removed
+        """
+
+
+class JsonSubscriptionStore(SubscriptionStore):
+    """Legacy single-file JSON backend.
+
+    Every read parses the whole file, so this is only suitable for a handful
+    of devices. Writes are serialised within a process but not across
+    processes. Each user maps to a list of subscriptions, most recently seen
+    first; files written before multi-device support (one subscription per
+    user) are still read.
+    """
+
+    def __init__(
+        self, path: Path, max_devices_per_user: int = DEFAULT_MAX_DEVICES_PER_USER
+    ) -> None:
+        super().__init__(max_devices_per_user)
+        self.path = Path(path)
+        # Tags live beside the subscriptions so the legacy file format is kept
+        self.tags_path = self.path.with_name(f"{self.path.stem}.tags.json")
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, list[dict[str, Any]]]:
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load subscriptions: {e}")
+            return {}
+        return {
+            uid: devices if isinstance(devices, list) else [devices]
+            for uid, devices in data.items()
+        }
+
+    def _save(self, subscriptions: dict[str, list[dict[str, Any]]]) -> None:
+        try:
+            with open(self.path, "w") as f:
+                json.dump(subscriptions, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save subscriptions: {e}")
+
+    def get_many(
+        self, user_external_ids: Iterable[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        subscriptions = self._load()
+        return {
+            uid: subscriptions[uid] for uid in user_external_ids if uid in subscriptions
+        }
+
+    def upsert(
+        self,
+        user_external_id: str,
+        subscription: dict[str, Any],
+        tags: Iterable[str] | None = None,
+    ) -> None:
+        endpoint = subscription.get("endpoint")
+        with self._lock:
+            subscriptions = self._load()
+            orphaned = []
+            for uid in list(subscriptions):
+                kept = [d for d in subscriptions[uid] if d.get("endpoint") != endpoint]
+                if kept:
+                    subscriptions[uid] = kept
+                else:
+                    del subscriptions[uid]
+                    if uid != user_external_id:
+                        orphaned.append(uid)
+
+            devices = [subscription, *subscriptions.get(user_external_id, [])]
+            if len(devices) > self.max_devices_per_user:
+                logger.info(
+                    f"Evicting {len(devices) - self.max_devices_per_user} least "
+                    f"recently seen devices of {user_external_id}"
+                )
+            subscriptions[user_external_id] = devices[: self.max_devices_per_user]
+            self._save(subscriptions)
+
+            changes: dict[str, frozenset[str]] = dict.fromkeys(orphaned, frozenset())
+            if tags is not None:
+                changes[user_external_id] = frozenset(tags)
+            current_tags = self.all_tags()
+            changes = {
+                uid: t for uid, t in changes.items() if t or uid in current_tags
+            }
+            if changes:
+                self._update_tags(changes)
+        self._notify_listeners()
+
+    def _update_tags(self, changes: dict[str, frozenset[str]]) -> None:
+        # Caller holds ``self._lock``; an empty tag set removes the user
+        before = self.tag_generation()
+        all_tags = {uid: set(tags) for uid, tags in self.all_tags().items()}
+        for uid, tags in changes.items():
+            if tags:
+                all_tags[uid] = set(tags)
+            else:
+                all_tags.pop(uid, None)
+        try:
+            with open(self.tags_path, "w") as f:
+                json.dump({uid: sorted(t) for uid, t in all_tags.items()}, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save subscription tags: {e}")
+            return
+
+        def update() -> None:
+            for uid, tags in changes.items():
+                self.tag_index.assign(uid, tags)
+
+        self._apply_tag_change(before, self.tag_generation(), update)
+
+    def all_tags(self) -> dict[str, frozenset[str]]:
+        if not self.tags_path.exists():
+            return {}
+        try:
+            with open(self.tags_path) as f:
+                return {uid: frozenset(tags) for uid, tags in json.load(f).items()}
+        except Exception as e:
+            logger.error(f"Failed to load subscription tags: {e}")
+            return {}
+
+    def tag_generation(self) -> int:
+        try:
+            return self.tags_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def device_generation(self) -> int:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def all(self) -> dict[str, list[dict[str, Any]]]:
+        return self._load()
+
+    def count(self) -> int:
+        return sum(len(devices) for devices in self._load().values())
+
+    def remove(self, entries: Iterable[tuple[str, str]]) -> int:
+        with self._lock:
+            subscriptions = self._load()
+            removed = 0
+            emptied = []
+            for user_external_id, endpoint in entries:
+                devices = subscriptions.get(user_external_id)
+                if not devices:
+                    continue
+                kept = [d for d in devices if d.get("endpoint") != endpoint]
+                removed += len(devices) - len(kept)
+                if kept:
+                    subscriptions[user_external_id] = kept
+                else:
+                    del subscriptions[user_external_id]
+                    emptied.append(user_external_id)
+            if removed:
+                self._save(subscriptions)
+                current_tags = self.all_tags()
+                tagged = [uid for uid in emptied if uid in current_tags]
+                if tagged:
+                    self._update_tags(dict.fromkeys(tagged, frozenset()))
+        if removed:
+            self._notify_listeners()
+        return removed
+
+
+class SqliteSubscriptionStore(SubscriptionStore):
+    """SQLite backend running in WAL mode.
+
+    Devices are keyed by endpoint, with a secondary index on
+    (user_external_id, last_seen) for per-user lookups and eviction. WAL
+    lets readers proceed while one writer commits, and the busy timeout makes
+    concurrent writers from other gunicorn workers queue instead of failing.
+    Each thread keeps its own connection.
+
+    Every write also appends the affected users to ``device_changes``, whose
+    highest ID is the device generation, so a cache in any process can
+    re-read just those users.
+    """
+
+    SCHEMA_VERSION = 4
+
+    def __init__(
+        self,
+        path: Path,
+        legacy_json_path: Path | None = None,
+        max_devices_per_user: int = DEFAULT_MAX_DEVICES_PER_USER,
+    ) -> None:
+        super().__init__(max_devices_per_user)
+        self.path = Path(path)
+        self._local = threading.local()
+        self._init_schema()
+        if legacy_json_path is not None:
+            self.migrate_from_json(Path(legacy_json_path))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+                """
+            )
+            # Version 2: subscription tags
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS subscription_tags (
+                    tag TEXT NOT NULL,
+                    user_external_id TEXT NOT NULL,
+                    PRIMARY KEY (tag, user_external_id)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_subscription_tags_user "
+                "ON subscription_tags (user_external_id)"
+            )
+            # Version 3: several devices per user, keyed by endpoint
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS devices (
+                    endpoint TEXT PRIMARY KEY,
+                    user_external_id TEXT NOT NULL,
+                    subscription TEXT NOT NULL,
+                    last_seen REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_devices_user "
+                "ON devices (user_external_id, last_seen)"
+            )
+            # Version 4: log of changed users for incremental cache refreshes
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS device_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_external_id TEXT NOT NULL
+                )
+                """
+            )
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 3:
+                self._migrate_single_device_rows(conn)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _migrate_single_device_rows(conn: sqlite3.Connection) -> None:
+        # Caller holds a write transaction. Before version 3 each user had one
+        # row in ``subscriptions``; each becomes that user's only device.
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'subscriptions'"
+        ).fetchone()
+        if not exists:
+            return
+        before = conn.total_changes
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO devices
+                (endpoint, user_external_id, subscription, last_seen)
+            SELECT json_extract(subscription, '$.endpoint'), user_external_id,
+                   subscription, updated_at
+            FROM subscriptions
+            WHERE json_extract(subscription, '$.endpoint') IS NOT NULL
+            """
+        )
+        conn.execute("DROP TABLE subscriptions")
+        logger.info(
+            f"Migrated {conn.total_changes - before} subscriptions to per-device rows"
+        )
+
+    def migrate_from_json(self, json_path: Path) -> int:
+        """Import subscriptions from the legacy JSON file exactly once.
+
+        The migration is recorded in ``store_meta`` so later starts (and
+        other workers racing on the same start) skip it. Existing devices win
+        over JSON entries with the same endpoint.
+
+        Args:
+            json_path: Path to the legacy subscriptions.json file
+
+        Returns:
+            Number of devices imported
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute(
+                "SELECT 1 FROM store_meta WHERE key = 'json_migrated'"
+            ).fetchone()
+            if done:
+                conn.execute("COMMIT")
+                return 0
+
+            legacy_store = JsonSubscriptionStore(json_path)
+            legacy = legacy_store.all()
+            now = time.time()
+            # Keep each user's device order: earlier in the list = seen later
+            rows = [
+                (sub["endpoint"], uid, json.dumps(sub), now - position * 1e-3)
+                for uid, devices in legacy.items()
+                for position, sub in enumerate(devices)
+                if sub.get("endpoint")
+            ]
+            conn.executemany(
+                "INSERT OR IGNORE INTO devices "
+                "(endpoint, user_external_id, subscription, last_seen) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            legacy_tags = [
+                (tag, uid)
+                for uid, tags in legacy_store.all_tags().items()
+                if uid in legacy
+                for tag in tags
+            ]
+            if legacy_tags:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO subscription_tags (tag, user_external_id) "
+                    "VALUES (?, ?)",
+                    legacy_tags,
+                )
+                self._bump_tag_generation(conn)
+            if rows:
+                self._log_device_changes(conn, (uid for _, uid, _, _ in rows))
+            conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('json_migrated', ?)",
+                (str(json_path),),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if rows:
+            logger.info(f"Migrated {len(rows)} subscriptions from {json_path}")
+        return len(rows)
+
+    def get_many(
+        self, user_external_ids: Iterable[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        ids = list(dict.fromkeys(user_external_ids))
+        conn = self._connect()
+        found: dict[str, list[dict[str, Any]]] = {}
+        for start in range(0, len(ids), SQL_VARIABLE_CHUNK):
+            chunk = ids[start : start + SQL_VARIABLE_CHUNK]
+            rows = conn.execute(
+                "SELECT user_external_id, subscription FROM devices "
+                f"WHERE user_external_id IN ({', '.join('?' * len(chunk))}) "
+                "ORDER BY user_external_id, last_seen DESC",
+                chunk,
+            )
+            for uid, sub in rows:
+                found.setdefault(uid, []).append(json.loads(sub))
+        return found
+
+    def upsert(
+        self,
+        user_external_id: str,
+        subscription: dict[str, Any],
+        tags: Iterable[str] | None = None,
+    ) -> None:
+        endpoint = subscription.get("endpoint")
+        if not endpoint:
+            raise ValueError("Subscription is missing an endpoint")
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = conn.execute(
+                "SELECT user_external_id FROM devices WHERE endpoint = ?", (endpoint,)
+            ).fetchone()
+            conn.execute(
+                """
+                INSERT INTO devices (endpoint, user_external_id, subscription, last_seen)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (endpoint) DO UPDATE SET
+                    user_external_id = excluded.user_external_id,
+                    subscription = excluded.subscription,
+                    last_seen = excluded.last_seen
+                """,
+                (endpoint, user_external_id, json.dumps(subscription), time.time()),
+            )
+            evicted = conn.execute(
+                """
+                DELETE FROM devices WHERE endpoint IN (
+                    SELECT endpoint FROM devices WHERE user_external_id = ?
+                    ORDER BY last_seen DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (user_external_id, self.max_devices_per_user),
+            ).rowcount
+            if evicted > 0:
+                logger.info(
+                    f"Evicted {evicted} least recently seen devices of {user_external_id}"
+                )
+
+            # The endpoint may have moved from another user's last device
+            untagged = []
+            changed = [user_external_id]
+            if previous and previous[0] != user_external_id:
+                untagged = self._drop_orphan_tags(conn, [previous[0]])
+                changed.append(previous[0])
+            self._log_device_changes(conn, changed)
+
+            new_tags = frozenset(tags) if tags is not None else None
+            if new_tags is not None:
+                conn.execute(
+                    "DELETE FROM subscription_tags WHERE user_external_id = ?",
+                    (user_external_id,),
+                )
+                conn.executemany(
+                    "INSERT INTO subscription_tags (tag, user_external_id) VALUES (?, ?)",
+                    [(tag, user_external_id) for tag in new_tags],
+                )
+            if new_tags is not None or untagged:
+                generations = self._bump_tag_generation(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._notify_listeners()
+        if new_tags is not None or untagged:
+
+            def update() -> None:
+                self.tag_index.discard(untagged)
+                if new_tags is not None:
+                    self.tag_index.assign(user_external_id, new_tags)
+
+            self._apply_tag_change(*generations, update)
+
+    @staticmethod
+    def _drop_orphan_tags(conn: sqlite3.Connection, users: Iterable[str]) -> list[str]:
+        # Caller holds a write transaction; returns users whose tags went away
+        untagged = []
+        for uid in dict.fromkeys(users):
+            before = conn.total_changes
+            conn.execute(
+                "DELETE FROM subscription_tags WHERE user_external_id = ? "
+                "AND NOT EXISTS (SELECT 1 FROM devices WHERE user_external_id = ?)",
+                (uid, uid),
+            )
+            if conn.total_changes > before:
+                untagged.append(uid)
+        return untagged
+
+    @staticmethod
+    def _log_device_changes(conn: sqlite3.Connection, users: Iterable[str]) -> None:
+        # Caller holds a write transaction
+        conn.executemany(
+            "INSERT INTO device_changes (user_external_id) VALUES (?)",
+            [(uid,) for uid in dict.fromkeys(users)],
+        )
+        latest = SqliteSubscriptionStore._read_device_generation(conn)
+        conn.execute(
+            "DELETE FROM device_changes WHERE id <= ?",
+            (latest - DEVICE_CHANGE_LOG_SIZE,),
+        )
+
+    @staticmethod
+    def _read_device_generation(conn: sqlite3.Connection) -> int:
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'device_changes'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def device_generation(self) -> int:
+        return self._read_device_generation(self._connect())
+
+    def device_changes_since(self, generation: int) -> tuple[int, set[str]] | None:
+        conn = self._connect()
+        # One read transaction, so the generation matches the rows read
+        conn.execute("BEGIN")
+        try:
+            current = self._read_device_generation(conn)
+            oldest = conn.execute("SELECT MIN(id) FROM device_changes").fetchone()[0]
+            if current < generation or (
+                current > generation and (oldest is None or oldest > generation + 1)
+            ):
+                return None  # a different database, or the log was trimmed
+            users = {
+                uid
+                for (uid,) in conn.execute(
+                    "SELECT DISTINCT user_external_id FROM device_changes WHERE id > ?",
+                    (generation,),
+                )
+            }
+        finally:
+            conn.execute("COMMIT")
+        return current, users
+
+    def _bump_tag_generation(self, conn: sqlite3.Connection) -> tuple[int, int]:
+        # Caller holds a write transaction
+        before = self._read_tag_generation(conn)
+        conn.execute(
+            "INSERT INTO store_meta (key, value) VALUES ('tag_generation', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (str(before + 1),),
+        )
+        return before, before + 1
+
+    @staticmethod
+    def _read_tag_generation(conn: sqlite3.Connection) -> int:
+        row = conn.execute(
+            "SELECT value FROM store_meta WHERE key = 'tag_generation'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def all_tags(self) -> dict[str, frozenset[str]]:
+        tags: dict[str, set[str]] = {}
+        rows = self._connect().execute(
+            "SELECT user_external_id, tag FROM subscription_tags"
+        )
+        for uid, tag in rows:
+            tags.setdefault(uid, set()).add(tag)
+        return {uid: frozenset(user_tags) for uid, user_tags in tags.items()}
+
+    def tag_generation(self) -> int:
+        return self._read_tag_generation(self._connect())
+
+    def all(self) -> dict[str, list[dict[str, Any]]]:
+        rows = self._connect().execute(
+            "SELECT user_external_id, subscription FROM devices "
+            "ORDER BY user_external_id, last_seen DESC"
+        )
+        found: dict[str, list[dict[str, Any]]] = {}
+        for uid, sub in rows:
+            found.setdefault(uid, []).append(json.loads(sub))
+        return found
+
+    def count(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM devices").fetchone()[0])
+
+    def remove(self, entries: Iterable[tuple[str, str]]) -> int:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            entries = list(entries)
+            conn.executemany(
+                "DELETE FROM devices WHERE user_external_id = ? AND endpoint = ?",
+                entries,
+            )
+            removed = conn.total_changes - before
+
+            untagged = []
+            if removed:
+                self._log_device_changes(conn, (uid for uid, _ in entries))
+                untagged = self._drop_orphan_tags(conn, (uid for uid, _ in entries))
+                if untagged:
+                    generations = self._bump_tag_generation(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if removed:
+            self._notify_listeners()
+        if untagged:
+            self._apply_tag_change(
+                *generations, lambda: self.tag_index.discard(untagged)
+            )
+        return removed
+
+
+def create_store(
+    backend: str,
+    db_path: Path,
+    json_path: Path,
+    max_devices_per_user: int = DEFAULT_MAX_DEVICES_PER_USER,
+) -> SubscriptionStore:
+    """Build the configured subscription store.
+
+    Args:
+        backend: "sqlite" (default) or "json"
+        db_path: SQLite database file used by the sqlite backend
+        json_path: Legacy JSON file; migrated into SQLite on first start
+        max_devices_per_user: Devices kept per user before evicting the
+            least recently seen
+
+    Returns:
+        A ready-to-use subscription store
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend == "sqlite":
+        return SqliteSubscriptionStore(
+            db_path, legacy_json_path=json_path, max_devices_per_user=max_devices_per_user
+        )
+    if backend == "json":
+        return JsonSubscriptionStore(json_path, max_devices_per_user=max_devices_per_user)
+    raise ValueError(f"Unknown subscription store backend: {backend}")
@@ -0,0 +1,187 @@
+"""Subscription tags and an in-memory inverted index for segment targeting."""
+
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+
+TAG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_.:-]{0,63}$")
+MAX_TAGS_PER_SUBSCRIPTION = 32
+# Tags referenced by one targeting expression
+MAX_EXPRESSION_TAGS = 32
+
+_KEYWORDS = {"and", "or"}
+_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+
+# ("tag", name) | ("and", [nodes]) | ("or", [nodes])
+TagExpression = tuple
+
+
+def normalize_tags(tags: Iterable[str]) -> frozenset[str]:
+    """Validate and lower-case a subscription's tags.
+
+    Args:
+        tags: Tag names, e.g. ["sports", "lang:en"]
+
+    Returns:
+        Normalised, de-duplicated tags
+
+    Raises:
+        ValueError: If a tag is malformed or there are too many
+    """
+    if isinstance(tags, str):
+        raise ValueError("tags must be a list of strings")
+    normalized = set()
+    for tag in tags:
+        if not isinstance(tag, str):
+            raise ValueError("tags must be a list of strings")
+        tag = tag.strip().lower()
+        if not TAG_PATTERN.match(tag) or tag in _KEYWORDS:
+            raise ValueError(f"Invalid tag: {tag!r}")
+        normalized.add(tag)
+    if len(normalized) > MAX_TAGS_PER_SUBSCRIPTION:
+        raise ValueError(f"At most {MAX_TAGS_PER_SUBSCRIPTION} tags per subscription")
+    return frozenset(normalized)
+
+
+def parse_tag_expression(expression: str) -> TagExpression:
+    """Parse a targeting expression such as ``sports AND (nba OR nfl)``.
+
+    AND binds tighter than OR; keywords are case-insensitive.
+
+    Args:
+        expression: Tag names combined with AND, OR and parentheses
+
+    Returns:
+        Parsed expression tree
+
+    Raises:
+        ValueError: If the expression is empty or malformed
+    """
+    tokens = _TOKEN.findall(expression or "")
+    if not tokens:
+        raise ValueError("Tag expression is empty")
+    if sum(1 for t in tokens if t not in "()" and t.lower() not in _KEYWORDS) > (
+        MAX_EXPRESSION_TAGS
+    ):
+        raise ValueError(f"At most {MAX_EXPRESSION_TAGS} tags per expression")
+    position = 0
+
+    def peek() -> str | None:
+        return tokens[position].lower() if position < len(tokens) else None
+
+    def parse_or() -> TagExpression:
+        nonlocal position
+        nodes = [parse_and()]
+        while peek() == "or":
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and() -> TagExpression:
+        nonlocal position
+        nodes = [parse_operand()]
+        while peek() == "and":
+            position += 1
+            nodes.append(parse_operand())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_operand() -> TagExpression:
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ValueError("Tag expression ends unexpectedly")
+        position += 1
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError("Missing ')' in tag expression")
+            position += 1
+            return node
+        if token == ")" or token in _KEYWORDS or not TAG_PATTERN.match(token):
+            raise ValueError(f"Unexpected {token!r} in tag expression")
+        return ("tag", token)
+
+    tree = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {tokens[position]!r} in tag expression")
+    return tree
+
+
+class TagIndex:
+    """Inverted index from tag to the users carrying it.
+
+    Resolving an expression touches only the posting sets of the tags it
+    names, so a segment send costs O(matching subscribers), not O(all).
+    """
+
+    def __init__(self) -> None:
+        self._users: dict[str, set[str]] = defaultdict(set)
+        self._tags: dict[str, frozenset[str]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, user_tags: Mapping[str, Iterable[str]]) -> None:
+        """Replace the whole index with ``{user_external_id: tags}``."""
+        users: dict[str, set[str]] = defaultdict(set)
+        tags = {}
+        for user_id, user_tag_set in user_tags.items():
+            tags[user_id] = frozenset(user_tag_set)
+            for tag in tags[user_id]:
+                users[tag].add(user_id)
+        with self._lock:
+            self._users, self._tags = users, tags
+
+    def assign(self, user_external_id: str, tags: Iterable[str]) -> None:
+        """Replace one user's tags."""
+        new = frozenset(tags)
+        with self._lock:
+            old = self._tags.get(user_external_id, frozenset())
+            for tag in old - new:
+                self._discard_posting(tag, user_external_id)
+            for tag in new - old:
+                self._users[tag].add(user_external_id)
+            if new:
+                self._tags[user_external_id] = new
+            else:
+                self._tags.pop(user_external_id, None)
+
+    def discard(self, user_external_ids: Iterable[str]) -> None:
+        """Drop users (e.g. pruned subscriptions) from the index."""
+        with self._lock:
+            for user_id in user_external_ids:
+                for tag in self._tags.pop(user_id, frozenset()):
+                    self._discard_posting(tag, user_id)
+
+    def tags_of(self, user_external_id: str) -> frozenset[str]:
+        """Return a user's tags."""
+        return self._tags.get(user_external_id, frozenset())
+
+    def match(self, expression: TagExpression) -> set[str]:
+        """Return the users matching a parsed expression."""
+        with self._lock:
+            return set(self._evaluate(expression))
+
+    def _discard_posting(self, tag: str, user_id: str) -> None:
+        # Caller holds ``self._lock``
+        posting = self._users.get(tag)
+        if posting is not None:
+            posting.discard(user_id)
+            if not posting:
+                del self._users[tag]
+
+    def _evaluate(self, node: TagExpression) -> set[str]:
+        # Caller holds ``self._lock``; may return a live posting set
+        kind, value = node
+        if kind == "tag":
+            return self._users.get(value, set())
+        children = [self._evaluate(child) for child in value]
+        if kind == "or":
+            return set().union(*children)
+        # Intersect from the smallest set so the work is bounded by it
+        children.sort(key=len)
+        result = set(children[0])
+        for child in children[1:]:
+            result &= child
+            if not result:
+                break
+        return result
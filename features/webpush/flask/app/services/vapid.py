@@ -0,0 +1,80 @@
+"""Cached VAPID authorization headers, one signed token per push audience."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    from py_vapid import Vapid
+
+logger = logging.getLogger(__name__)
+
+
+def vapid_audience(endpoint: str) -> str:
+    """Return the VAPID ``aud`` claim (push-service origin) for an endpoint."""
+    url = urlparse(endpoint)
+    return f"{url.scheme}://{url.netloc}"
+
+
+class VapidHeaderCache:
+    """Sign one VAPID JWT per audience and reuse it until shortly before expiry.
+
+    All subscriptions on the same push service (e.g. every FCM endpoint)
+    share an audience, so a broadcast signs a handful of tokens instead of
+    one per message. The private key is parsed once and kept in memory.
+    """
+
+    def __init__(
+        self,
+        private_key: str,
+        subject: str,
+        token_ttl: int = 12 * 60 * 60,
+        refresh_margin: int = 5 * 60,
+    ) -> None:
+        self.private_key = private_key
+        self.subject = subject
+        self.token_ttl = token_ttl
+        self.refresh_margin = refresh_margin
+        self._vapid: Vapid | None = None
+        self._headers: dict[str, tuple[dict[str, str], float]] = {}
+        self._lock = threading.Lock()
+
+    def _signer(self) -> Vapid:
+        # Caller holds ``self._lock``; py_vapid (and cryptography) load here
+        if self._vapid is None:
+            from py_vapid import Vapid
+
+            self._vapid = Vapid.from_string(private_key=self.private_key)
+        return self._vapid
+
+    def headers_for(self, endpoint: str) -> dict[str, str]:
+        """Return VAPID headers valid for the endpoint's push service.
+
+        Args:
+            endpoint: Subscription endpoint URL
+
+        Returns:
+            Headers to send with the push (a fresh dict the caller may mutate)
+        """
+        audience = vapid_audience(endpoint)
+        now = time.time()
+
+        cached = self._headers.get(audience)
+        if cached is not None and now < cached[1] - self.refresh_margin:
+            return dict(cached[0])
+
+        with self._lock:
+            cached = self._headers.get(audience)
+            if cached is None or now >= cached[1] - self.refresh_margin:
+                exp = int(now) + self.token_ttl
+                headers = self._signer().sign(
+                    {"sub": self.subject, "aud": audience, "exp": exp}
+                )
+                cached = (headers, exp)
+                self._headers[audience] = cached
+                logger.debug(f"Signed VAPID token for {audience} (exp {exp})")
+        return dict(cached[0])
@@ -0,0 +1,146 @@
+"""Production serving with gunicorn: threaded workers and a graceful drain.
+
+``main.py --production`` runs the app through this module, and it doubles
+as a gunicorn config module for running gunicorn directly::
+
+    gunicorn -c python:app.serving -b 0.0.0.0:3000 wsgi:app
+
+Each worker process runs its own delivery workers on the shared SQLite job
+queue. On SIGTERM a worker ends its progress streams and stops accepting
+requests. It then drains two things at the same time, each with its own
+budget. Requests in flight get REQUEST_DRAIN_SECONDS. Running deliveries get
+SHUTDOWN_DRAIN_SECONDS. Jobs not yet started stay queued for the remaining
+or next workers.
+"""
+
+from __future__ import annotations
+
+import logging
+import signal
+import threading
+from concurrent.futures import Future
+from typing import Any
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Result of this worker's delivery drain (True if it finished in time)
+_drain: Future[bool] | None = None
+_drain_lock = threading.Lock()
+
+# ---------- gunicorn settings ----------
+
+# Threads keep long-lived /api/jobs/<id>/events streams from blocking a worker
+worker_class = "gthread"
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+# Time after SIGTERM before a worker is killed. Both drains start at SIGTERM
+# and run side by side, plus a margin for the exit hooks.
+graceful_timeout = (
+    int(max(Config.REQUEST_DRAIN_SECONDS, Config.SHUTDOWN_DRAIN_SECONDS)) + 5
+)
+# Idle keep-alive seconds, for bots and proxies reusing connections
+keepalive = 5
+
+
+def _start_drain() -> Future[bool]:
+    """End progress streams and start draining deliveries, once per worker."""
+    global _drain
+    with _drain_lock:
+        if _drain is not None:
+            return _drain
+        drain: Future[bool] = Future()
+        _drain = drain
+
+    def run() -> None:
+        from app.services.push_service import PushService
+
+        try:
+            queue = PushService.get_queue()
+            queue.progress.close()
+            drain.set_result(queue.shutdown(timeout=Config.SHUTDOWN_DRAIN_SECONDS))
+        except Exception as e:
+            drain.set_exception(e)
+
+    # Off the signal handler, which must not wait on locks
+    threading.Thread(target=run, name="delivery-drain", daemon=True).start()
+    return drain
+
+
+def post_worker_init(worker: Any) -> None:
+    """Start this worker's delivery threads and its SIGTERM drain."""
+    global _drain
+    from app.services.push_service import PushService
+
+    _drain = None
+    PushService.get_queue().start()
+
+    handle_exit = worker.handle_exit
+
+    def on_sigterm(sig: int, frame: Any) -> None:
+        _start_drain()
+        try:
+            # gthread waits graceful_timeout for requests in flight; this
+            # worker's copy of the setting becomes the request budget, while
+            # the arbiter still allows both drains.
+            worker.cfg.set("graceful_timeout", Config.REQUEST_DRAIN_SECONDS)
+        finally:
+            handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+def worker_exit(server: Any, worker: Any) -> None:
+    """Wait for the delivery drain started at SIGTERM before exiting."""
+    if _start_drain().result():
+        logger.info("Delivery queue drained")
+    else:
+        logger.warning(
+            "Deliveries still running after SHUTDOWN_DRAIN_SECONDS; they are "
+            "resumed once their lease expires"
+        )
+
+
+SETTINGS = {
+    "worker_class": worker_class,
+    "workers": workers,
+    "threads": threads,
+    "graceful_timeout": graceful_timeout,
+    "keepalive": keepalive,
+    "post_worker_init": post_worker_init,
+    "worker_exit": worker_exit,
+}
+
+
+def run(host: str, port: int, workers: int, threads: int) -> None:
+    """Serve the app with gunicorn until it receives SIGTERM or SIGINT.
+
+    Raises:
+        SystemExit: If gunicorn is not installed
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as e:
+        raise SystemExit(
+            'Production mode needs gunicorn: uv pip install -e ".[production]"'
+        ) from e
+
+    options = {
+        **SETTINGS,
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+    }
+
+    class WebPushServer(BaseApplication):  # type: ignore[misc]
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            from app import create_app
+
+            return create_app()
+
+    WebPushServer().run()
@@ -1,14 +1,112 @@
+import ipaddress
 import logging
-from datetime import UTC, datetime, timedelta
+import time
+from bisect import bisect_right
+from functools import lru_cache
 
 from flask import Request
 
+from app.config import Config
+
 logger = logging.getLogger(__name__)
 
 
+class IpAllowlist:
+    """Set of IPv4 and IPv6 networks with O(log n) membership checks.
+
+    Entries are comma-separated and may be CIDR blocks ("10.0.0.0/8",
+    "2001:db8::/32"), single addresses, or the legacy dotted prefixes
+    ("192.168.12.") which match whole octets only, so "192.168.1" covers
+    192.168.1.0/24 and not 192.168.10.x. Networks are merged into sorted,
+    non-overlapping integer ranges per IP version and looked up by bisection.
+    """
+
+    def __init__(self, spec: str) -> None:
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for entry in spec.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                network = _parse_network(entry)
+            except ValueError:
+                logger.warning(f"Ignoring invalid IP allowlist entry: {entry!r}")
+                continue
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        # version -> (range starts, range ends), merged and sorted by start
+        self._ranges: dict[int, tuple[list[int], list[int]]] = {}
+        for version, spans in ranges.items():
+            starts: list[int] = []
+            ends: list[int] = []
+            for start, end in sorted(spans):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._ranges[version] = (starts, ends)
+
+    def __bool__(self) -> bool:
+        return any(starts for starts, _ in self._ranges.values())
+
+    def __contains__(self, ip: object) -> bool:
+        if not isinstance(ip, str) or not ip:
+            return False
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        starts, ends = self._ranges[address.version]
+        value = int(address)
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and value <= ends[i]
+
+
+def _parse_network(entry: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    """Parse one allowlist entry, including legacy "192.168.12." prefixes."""
+    if "/" in entry or ":" in entry:
+        return ipaddress.ip_network(entry, strict=False)
+    octets = entry.rstrip(".").split(".")
+    if not 1 <= len(octets) <= 4:
+        raise ValueError(entry)
+    padded = octets + ["0"] * (4 - len(octets))
+    return ipaddress.ip_network(f"{'.'.join(padded)}/{8 * len(octets)}")
+
+
+@lru_cache(maxsize=32)
+def get_ip_allowlist(spec: str) -> IpAllowlist:
+    """Return the compiled allowlist for a config value (built once per value)."""
+    return IpAllowlist(spec)
+
+
+def validate_ip_allowlist(ip: str, allowed: str) -> bool:
+    """Validate that an IP address is inside the allowed networks.
+
+    Args:
+        ip: IP address to validate
+        allowed: Comma-separated CIDR blocks, addresses or dotted prefixes
+            (e.g., "192.168.12.0/24,fd00::/8")
+
+    Returns:
+        True if the IP is allowed, False otherwise (also for an empty list)
+    """
+    if not ip or not allowed:
+        return False
+
+    return ip in get_ip_allowlist(allowed)
+
+
 def validate_ip_prefix(ip: str, allowed_prefix: str) -> bool:
     """Validate that IP address matches allowed prefix.
 
+    Kept for existing callers; prefixes match whole octets and any entry
+    accepted by ``validate_ip_allowlist`` works too.
+
     Args:
         ip: IP address to validate
         allowed_prefix: Allowed IP prefix (e.g., "192.168.12.")
@@ -16,18 +114,15 @@ def validate_ip_prefix(ip: str, allowed_prefix: str) -> bool:
     Returns:
         True if IP matches prefix, False otherwise
     """
-    if not ip:
-        return False
+    return validate_ip_allowlist(ip, allowed_prefix)
 
-    if not allowed_prefix:
-        return False
 
-    return ip.startswith(allowed_prefix)
-
-
-def validate_timestamp(timestamp_ms: int, max_age_minutes: int = 5) -> bool:
+def validate_timestamp(timestamp_ms: float, max_age_minutes: int = 5) -> bool:
     """Validate that timestamp is within acceptable time window.
 
+    Compares milliseconds as numbers, so out-of-range values (negative,
+    huge, NaN) are simply outside the window.
+
     Args:
         timestamp_ms: Timestamp in milliseconds
         max_age_minutes: Maximum age in minutes (default 5)
@@ -35,27 +130,37 @@ def validate_timestamp(timestamp_ms: int, max_age_minutes: int = 5) -> bool:
     Returns:
         True if timestamp is valid, False otherwise
     """
-    try:
-        timestamp = datetime.fromtimestamp(timestamp_ms / 1000, tz=UTC)
-        now = datetime.now(UTC)
-        max_age = timedelta(minutes=max_age_minutes)
-
-        age = abs(now - timestamp)
-        return age <= max_age
-    except (ValueError, OSError):
-        logger.error(f"Invalid timestamp: {timestamp_ms}")
-        return False
+    now_ms = time.time_ns() // 1_000_000
+    return abs(now_ms - timestamp_ms) <= max_age_minutes * 60_000
 
 
 def get_client_ip(request: Request) -> str | None:
     """Get client IP address from request.
 
+    X-Forwarded-For is only honoured when the direct peer is one of
+    TRUSTED_PROXIES. The header is then read from the right, skipping
+    further trusted proxies, so a client cannot choose its address by
+    sending the header itself.
+
     Args:
         request: Flask request object
 
     Returns:
         Client IP address or None if not found
     """
-    if request.headers.getlist("X-Forwarded-For"):
-        return request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
-    return request.remote_addr
+    client_ip = request.remote_addr
+    trusted = get_ip_allowlist(Config.TRUSTED_PROXIES)
+    if not trusted or client_ip not in trusted:
+        return client_ip
+
+    hops = [
+        hop.strip()
+        for header in request.headers.getlist("X-Forwarded-For")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(hops):
+        client_ip = hop
+        if hop not in trusted:
+            break
+    return client_ip
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Per-message CPU cost of payload encryption, before and after caching.
+
+"before" is the pywebpush path the service used to take for every
+recipient: serialise the payload, deep-copy the subscription, decode the
+keys and parse the P-256 point, then encrypt. "after" is the prepared
+broadcast path: one serialisation per broadcast, parsed keys from the key
+cache, then encrypt.
+
+Usage:
+    python benchmarks/bench_encryption.py --subscribers 2000
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from pywebpush import WebPusher
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.encryption import (  # noqa: E402
+    SubscriberKeyCache,
+    encrypt_payload,
+    prepare_payload,
+)
+
+
+def make_subscriptions(count: int) -> list[dict]:
+    subscriptions = []
+    for n in range(count):
+        public = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+        )
+        subscriptions.append(
+            {
+                "endpoint": f"https://fcm.googleapis.com/fcm/send/{n}",
+                "keys": {
+                    "p256dh": base64.urlsafe_b64encode(public).strip(b"=").decode(),
+                    "auth": base64.urlsafe_b64encode(b"0123456789abcdef")
+                    .strip(b"=")
+                    .decode(),
+                },
+            }
+        )
+    return subscriptions
+
+
+def bench_before(subscriptions: list[dict], title: str, content: str) -> float:
+    start = time.process_time()
+    for subscription in subscriptions:
+        data = json.dumps({"title": title, "content": content}).encode()
+        WebPusher(subscription).encode(data, "aes128gcm")
+    return time.process_time() - start
+
+
+def bench_after(
+    subscriptions: list[dict], title: str, content: str, cache: SubscriberKeyCache
+) -> float:
+    start = time.process_time()
+    payload = prepare_payload(title, content)
+    for subscription in subscriptions:
+        encrypt_payload(payload, cache.get(subscription))
+    return time.process_time() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    subscriptions = make_subscriptions(args.subscribers)
+    title, content = "Benchmark", "x" * 200
+
+    # Warm the key cache as a previous broadcast would have
+    cache = SubscriberKeyCache()
+    for subscription in subscriptions:
+        cache.get(subscription)
+
+    before = bench_before(subscriptions, title, content)
+    after = bench_after(subscriptions, title, content, cache)
+
+    results = {
+        "benchmark": "encryption",
+        "subscribers": args.subscribers,
+        "before_us_per_message": round(before / args.subscribers * 1e6, 1),
+        "after_us_per_message": round(after / args.subscribers * 1e6, 1),
+        "speedup": round(before / after, 2) if after else None,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
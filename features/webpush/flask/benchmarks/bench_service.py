@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""End-to-end throughput, latency and memory of the webpush service.
+
+Starts ``fake_push_server.py`` as a separate process, then for each
+subscription-set size runs a fresh worker process that:
+
+1. generates that many subscriptions with real P-256 keys (a fraction of
+   them pointing at ``/gone/`` endpoints, which answer 410);
+2. imports them into a new SQLite store;
+3. times a full ``PushService.broadcast_notification``;
+4. times ``POST /api/send-notification`` requests through the Flask app
+   and waits for the queued deliveries to drain;
+5. reports its peak RSS (and that of any broadcast shard processes).
+
+Results are written as JSON, named after the current commit, so runs on
+different commits can be compared.
+
+Usage:
+    python benchmarks/bench_service.py --sizes 1000,10000,100000
+    python benchmarks/bench_service.py --sizes 1000 --delay-ms 20 --gone-ratio 0.1
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCH_DIR.parent
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).strip(b"=").decode()
+
+
+def make_subscriptions(count: int, push_url: str, gone_ratio: float) -> dict:
+    """Build ``count`` subscriptions; every 1/gone_ratio-th one is gone."""
+    gone_every = round(1 / gone_ratio) if gone_ratio > 0 else 0
+    auth = b64url(b"0123456789abcdef")
+    subscriptions = {}
+    for n in range(count):
+        public = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+        )
+        kind = "gone" if gone_every and n % gone_every == 0 else "push"
+        subscriptions[f"user-{n}"] = {
+            "endpoint": f"{push_url}/{kind}/{n}",
+            "keys": {"p256dh": b64url(public), "auth": auth},
+        }
+    return subscriptions
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_size(args: argparse.Namespace) -> dict:
+    """Benchmark one subscription-set size (runs in its own process)."""
+    workdir = Path(tempfile.mkdtemp(prefix="webpush-bench-"))
+
+    start = time.perf_counter()
+    subscriptions = make_subscriptions(args.run_size, args.push_url, args.gone_ratio)
+    keygen_seconds = time.perf_counter() - start
+    (workdir / "subscriptions.json").write_text(json.dumps(subscriptions))
+
+    vapid_key = ec.generate_private_key(ec.SECP256R1()).private_numbers()
+    # Config reads the environment at import time
+    os.environ.update(
+        {
+            "FLASK_ENV": "production",
+            "SUBSCRIPTION_STORE": "sqlite",
+            "SUBSCRIPTIONS_DB": str(workdir / "subscriptions.db"),
+            "SUBSCRIPTIONS_FILE": str(workdir / "subscriptions.json"),
+            "JOBS_DB": str(workdir / "jobs.db"),
+            "VAPID_PRIVATE_KEY": b64url(vapid_key.private_value.to_bytes(32, "big")),
+            "ALLOWED_BOT_IPS": "127.0.0.",
+            "BROADCAST_PROCESSES": args.processes,
+            # Measure delivery, not the rate limiter (a rate of 0 disables it)
+            "BOT_RATE_PER_MINUTE": "0",
+            "RECIPIENT_RATE_PER_MINUTE": "0",
+            "BROADCAST_RATE_PER_MINUTE": "0",
+        }
+    )
+    sys.path.insert(0, str(PROJECT_DIR))
+    from app import create_app
+    from app.services.push_service import PushService
+
+    start = time.perf_counter()
+    store = PushService.get_store()
+    seed_seconds = time.perf_counter() - start
+    assert store.count() == args.run_size
+
+    start = time.perf_counter()
+    report = PushService.broadcast_notification("Benchmark", "x" * 200)
+    broadcast_seconds = time.perf_counter() - start
+
+    # Single-recipient sends to subscriptions that survived the broadcast
+    recipients = [uid for uid, sub in subscriptions.items() if "/push/" in sub["endpoint"]]
+    client = create_app().test_client()
+    latencies = []
+    for n in range(args.requests):
+        body = {
+            "bot_id": "bench",
+            "title": "Benchmark",
+            "content": "x" * 200,
+            "timestamp": int(time.time() * 1000),
+            "recipient_external_id": recipients[n % len(recipients)],
+        }
+        start = time.perf_counter()
+        response = client.post("/api/send-notification", json=body)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 202, response.get_json()
+
+    start = time.perf_counter()
+    queue = PushService.get_queue()
+    while queue.pending_count() and time.perf_counter() - start < args.drain_timeout:
+        time.sleep(0.05)
+    drain_seconds = time.perf_counter() - start
+    queue.shutdown(timeout=5)
+
+    return {
+        "subscriptions": args.run_size,
+        "keygen_seconds": round(keygen_seconds, 3),
+        "store_import_seconds": round(seed_seconds, 3),
+        "broadcast": {
+            **report.to_dict(),
+            "seconds": round(broadcast_seconds, 3),
+            "deliveries_per_second": round(report.total / broadcast_seconds, 1),
+        },
+        "send_notification": {
+            "requests": args.requests,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+            "queue_drain_seconds": round(drain_seconds, 3),
+        },
+        "memory": {
+            "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+            "peak_child_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="POST /api/send-notification calls per size")
+    parser.add_argument("--delay-ms", type=float, default=0.0,
+                        help="Fake push service response delay")
+    parser.add_argument("--gone-ratio", type=float, default=0.05,
+                        help="Fraction of subscriptions answering 410 Gone")
+    parser.add_argument("--processes", default="0",
+                        help="BROADCAST_PROCESSES for the run (e.g. auto)")
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--output", type=Path,
+                        help="Defaults to benchmarks/results/service-<commit>.json")
+    # Internal: benchmark one size in this process
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--push-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size:
+        print(json.dumps(run_size(args)))
+        return
+
+    server = subprocess.Popen(
+        [sys.executable, str(BENCH_DIR / "fake_push_server.py"),
+         "--delay-ms", str(args.delay_ms)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        push_url = server.stdout.readline().strip()
+        results = []
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Benchmarking {size} subscriptions...", file=sys.stderr)
+            # A fresh process per size keeps peak RSS and config independent
+            child = subprocess.run(
+                [sys.executable, __file__, "--run-size", str(size),
+                 "--push-url", push_url, "--requests", str(args.requests),
+                 "--gone-ratio", str(args.gone_ratio),
+                 "--processes", args.processes,
+                 "--drain-timeout", str(args.drain_timeout)],
+                stdout=subprocess.PIPE, text=True, check=True,
+            )
+            results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    commit = git_commit()
+    output = {
+        "benchmark": "service",
+        "commit": commit,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "delay_ms": args.delay_ms,
+            "gone_ratio": args.gone_ratio,
+            "processes": args.processes,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    print(json.dumps(output, indent=2))
+
+    path = args.output or BENCH_DIR / "results" / f"service-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(output, indent=2) + "\n")
+    print(f"Results written to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
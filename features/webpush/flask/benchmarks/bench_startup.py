@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Startup time and per-worker memory of the webpush service.
+
+Measures two things, each in fresh processes with temporary databases:
+
+1. ``create_app``: time from interpreter start to an app ready to serve
+   (imports included) and the RSS at that point, the cost every worker
+   process pays;
+2. ``main.py --production``: time until the first ``GET /api/health``
+   succeeds, the RSS of the gunicorn master and each worker once serving,
+   and how long a SIGTERM takes to shut everything down.
+
+Results are written as JSON, named after the current commit, so runs on
+different commits can be compared. Linux only (reads /proc).
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --workers 4 --repeat 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from bench_service import BENCH_DIR, PROJECT_DIR, git_commit
+
+CREATE_APP = """
+import json, resource, sys, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": len(sys.modules),
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def bench_env(workdir: Path) -> dict[str, str]:
+    return {
+        **os.environ,
+        "FLASK_ENV": "production",
+        "SUBSCRIPTIONS_DB": str(workdir / "subscriptions.db"),
+        "SUBSCRIPTIONS_FILE": str(workdir / "subscriptions.json"),
+        "JOBS_DB": str(workdir / "jobs.db"),
+        "PYTHONPATH": str(PROJECT_DIR),
+    }
+
+
+def rss_mb(pid: int) -> float:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def children(pid: int) -> list[int]:
+    found = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, ...
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            found.append(int(entry.name))
+    return found
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_create_app(env: dict[str, str], repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        child = subprocess.run(
+            [sys.executable, "-c", CREATE_APP],
+            cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        run = json.loads(child.stdout.strip().splitlines()[-1])
+        run["process_seconds"] = time.perf_counter() - start
+        runs.append(run)
+    return {
+        "median_seconds": round(statistics.median(r["seconds"] for r in runs), 3),
+        "median_process_seconds": round(
+            statistics.median(r["process_seconds"] for r in runs), 3
+        ),
+        "modules": runs[-1]["modules"],
+        "rss_mb": round(statistics.median(r["rss_mb"] for r in runs), 1),
+    }
+
+
+def bench_server(env: dict[str, str], workers: int, threads: int) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "main.py", "--production", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--threads", str(threads)],
+        cwd=PROJECT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("server exited during startup (is gunicorn installed?)")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                time.sleep(0.02)
+        ready_seconds = time.perf_counter() - start
+
+        # Wait for every worker to boot, then let them serve a few requests
+        deadline = time.monotonic() + 30
+        while len(children(server.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.05)
+        for _ in range(workers * 20):
+            urllib.request.urlopen(url, timeout=5).close()
+        worker_rss = [rss_mb(pid) for pid in children(server.pid)]
+        master_rss = rss_mb(server.pid)
+
+        start = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=120)
+        shutdown_seconds = time.perf_counter() - start
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+    return {
+        "workers": workers,
+        "threads": threads,
+        "ready_seconds": round(ready_seconds, 3),
+        "master_rss_mb": round(master_rss, 1),
+        "worker_rss_mb": [round(rss, 1) for rss in worker_rss],
+        "total_rss_mb": round(master_rss + sum(worker_rss), 1),
+        "shutdown_seconds": round(shutdown_seconds, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="create_app runs (the median is reported)")
+    parser.add_argument("--output", type=Path,
+                        help="Defaults to benchmarks/results/startup-<commit>.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = bench_env(Path(tmp))
+        create_app = bench_create_app(env, args.repeat)
+        server = bench_server(env, args.workers, args.threads)
+
+    commit = git_commit()
+    output = {
+        "benchmark": "startup",
+        "commit": commit,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "create_app": create_app,
+        "server": server,
+    }
+    print(json.dumps(output, indent=2))
+
+    path = args.output or BENCH_DIR / "results" / f"startup-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(output, indent=2) + "\n")
+    print(f"Results written to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Per-request CPU cost of validating a bot send request, before and after.
+
+"before" is the path ``POST /api/send-notification`` used to take: parse
+the body into a dict, build ``BotNotificationRequest`` from it (with a
+Python validator converting the timestamp), then compare the timestamp
+with the clock through two timezone-aware datetimes. "after" is the
+current path: pydantic-core parses and validates the raw body in one pass,
+and the window check compares integer milliseconds.
+
+Usage:
+    python benchmarks/bench_validation.py --requests 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from pydantic import BaseModel, Field, field_validator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.bot_request import BotNotificationRequest  # noqa: E402
+from app.utils.security import validate_timestamp  # noqa: E402
+
+
+class LegacyBotNotificationRequest(BaseModel):
+    bot_id: str
+    title: str
+    content: str
+    timestamp_ms: int = Field(..., alias="timestamp")
+
+    @field_validator("timestamp_ms", mode="before")
+    @classmethod
+    def convert_timestamp(cls, v):
+        if isinstance(v, (int, float)):
+            return int(v)
+        raise ValueError("timestamp must be an integer or float")
+
+    model_config = {"populate_by_name": True}
+
+
+def legacy_validate_timestamp(timestamp_ms: int, max_age_minutes: int = 5) -> bool:
+    timestamp = datetime.fromtimestamp(timestamp_ms / 1000, tz=UTC)
+    return abs(datetime.now(UTC) - timestamp) <= timedelta(minutes=max_age_minutes)
+
+
+def bench_before(body: bytes, requests: int) -> float:
+    start = time.process_time()
+    for _ in range(requests):
+        data = json.loads(body)
+        data.get("recipient_external_id")
+        data.get("tags")
+        req = LegacyBotNotificationRequest(**data)
+        legacy_validate_timestamp(req.timestamp_ms)
+    return time.process_time() - start
+
+
+def bench_after(body: bytes, requests: int) -> float:
+    start = time.process_time()
+    for _ in range(requests):
+        req = BotNotificationRequest.model_validate_json(body)
+        validate_timestamp(req.timestamp_ms)
+    return time.process_time() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    body = json.dumps(
+        {
+            "bot_id": "bot_001",
+            "title": "Order shipped",
+            "content": "Your order #4217 is on its way",
+            "timestamp": int(time.time() * 1000),
+            "recipient_external_id": "usr_123",
+            "topic": "order-4217",
+        }
+    ).encode()
+
+    # Warm up both paths (schema build, imports)
+    bench_before(body, 100)
+    bench_after(body, 100)
+
+    before = bench_before(body, args.requests)
+    after = bench_after(body, args.requests)
+
+    results = {
+        "benchmark": "validation",
+        "requests": args.requests,
+        "before_us_per_request": round(before / args.requests * 1e6, 2),
+        "after_us_per_request": round(after / args.requests * 1e6, 2),
+        "speedup": round(before / after, 2) if after else None,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Local stand-in for a push service, for benchmarks.
+
+Accepts any POST, optionally after a delay, and answers 201 Created, or
+410 Gone for endpoints whose path contains ``/gone/``. ``GET /stats``
+returns how many pushes were received per status.
+
+Usage:
+    python benchmarks/fake_push_server.py --port 8099 --delay-ms 20
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakePushServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Broadcasts open many connections at once
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple[str, int], delay: float) -> None:
+        super().__init__(address, _PushHandler)
+        self.delay = delay
+        self.received: Counter[int] = Counter()
+        self.lock = threading.Lock()
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakePushServer
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        status = 410 if "/gone/" in self.path else 201
+        with self.server.lock:
+            self.server.received[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            body = json.dumps({str(k): v for k, v in self.server.received.items()})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakePushServer((args.host, args.port), args.delay_ms / 1000)
+    # The first line tells a parent process where to send pushes
+    print(f"http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
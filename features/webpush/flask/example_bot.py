@@ -59,8 +59,9 @@ def send_notification(title: str, content: str, recipient_external_id: str | Non
 
         data = response.json()
         if data.get("success"):
-            print("✓ Notification sent successfully!")
-            print(f"Notification ID: {data.get('notification_id')}")
+            print("✓ Notification accepted for delivery!")
+            print(f"Job ID: {data.get('job_id')}")
+            print(f"Track progress at {FLASK_SERVER_URL}/api/jobs/{data.get('job_id')}")
             return True
         else:
             print(f"✗ Failed to send notification: {data.get('error')}")
@@ -1,5 +1,6 @@
 import argparse
-from app import create_app
+
+from app.config import Config
 
 
 def create_parser():
@@ -18,9 +19,26 @@ def create_parser():
     )
     parser.add_argument(
         "--debug",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Run the development server with debugger and reloader (default: off)",
+    )
+    parser.add_argument(
+        "--production",
         action="store_true",
-        default=True,
-        help="Run in debug mode (default: True)",
+        help="Serve with gunicorn worker processes instead of the development server",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=Config.WEB_WORKERS,
+        help=f"Worker processes with --production (default: {Config.WEB_WORKERS})",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=Config.WEB_THREADS,
+        help=f"Request threads per worker with --production (default: {Config.WEB_THREADS})",
     )
     return parser
 
@@ -29,5 +47,15 @@ if __name__ == "__main__":
     parser = create_parser()
     args = parser.parse_args()
 
-    app = create_app()
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    if args.production:
+        from app import serving
+
+        serving.run(args.host, args.port, args.workers, args.threads)
+    else:
+        from app import create_app
+        from app.services.push_service import PushService
+
+        app = create_app()
+        # Resume any notifications accepted before the last shutdown
+        PushService.get_queue().start()
+        app.run(host=args.host, port=args.port, debug=args.debug)
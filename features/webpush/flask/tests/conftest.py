@@ -0,0 +1,51 @@
+import pytest
+
+from app.services.auth_service import set_bot_jwt_verifier
+from app.services.idempotency import SqliteReplayCache, set_replay_cache
+from app.services.job_queue import JobQueue
+from app.services.push_service import PushService
+from app.services.rate_limit import set_rate_limiter
+from app.services.subscription_store import SqliteSubscriptionStore
+
+
+@pytest.fixture(autouse=True)
+def isolated_subscription_store(tmp_path):
+    """Point PushService at a throwaway SQLite store for every test."""
+    store = SqliteSubscriptionStore(tmp_path / "subscriptions.db")
+    PushService.set_store(store)
+    yield store
+    PushService.set_store(None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_job_queue(tmp_path):
+    """Point PushService at a throwaway delivery queue for every test."""
+    queue = JobQueue(tmp_path / "jobs.db", PushService.run_job, poll_interval=0.05)
+    PushService.set_queue(queue)
+    yield queue
+    queue.shutdown(timeout=5)
+    PushService.set_queue(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter():
+    """Start every test with full rate-limit buckets."""
+    set_rate_limiter(None)
+    yield
+    set_rate_limiter(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_replay_cache(tmp_path):
+    """Start every test without remembered requests."""
+    set_replay_cache(SqliteReplayCache(tmp_path / "jobs.db"))
+    yield
+    set_replay_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_bot_jwt_verifier():
+    """Build the bot JWT verifier from each test's Config."""
+    set_bot_jwt_verifier(None)
+    yield
+    set_bot_jwt_verifier(None)
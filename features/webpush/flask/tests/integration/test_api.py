@@ -1,9 +1,13 @@
+import json
 import time
 
 import pytest
 import time
 
 from app import create_app
+from app.config import Config
+from app.services.auth_service import AuthService
+from app.services.push_service import PushService
 
 
 @pytest.fixture
@@ -77,3 +81,510 @@ class TestAPIEndpoints:
         data = response.get_json()
         assert data["success"] is False
         assert "error" in data
+
+    def test_send_notification_accepted_returns_job(self, client, monkeypatch):
+        """Test an authorized broadcast is queued and its job can be polled."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+
+        response = client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Test Notification",
+                "content": "Test message",
+                "timestamp": int(time.time() * 1000),
+            },
+        )
+
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+
+        response = client.get(f"/api/jobs/{job_id}")
+        assert response.status_code == 200
+        assert response.get_json()["job"]["id"] == job_id
+
+    def test_send_notification_unknown_recipient(self, client, monkeypatch):
+        """Test a single-recipient send to an unknown user still returns 404."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+
+        response = client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Test Notification",
+                "content": "Test message",
+                "timestamp": int(time.time() * 1000),
+                "recipient_external_id": "usr_missing",
+            },
+        )
+
+        assert response.status_code == 404
+
+    def test_job_status_not_found(self, client, monkeypatch):
+        """Test polling an unknown job returns 404."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+
+        response = client.get("/api/jobs/does-not-exist")
+        assert response.status_code == 404
+
+    def test_batch_reports_status_per_item(self, client, monkeypatch):
+        """Test a batch queues deliverable items and reports the others."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        PushService.register_subscription(
+            "usr_1", {"endpoint": "https://fcm.googleapis.com/fcm/send/1", "keys": {}}
+        )
+
+        response = client.post(
+            "/api/send-notifications/batch",
+            json={
+                "bot_id": "bot_001",
+                "timestamp": int(time.time() * 1000),
+                "notifications": [
+                    {"recipient": "usr_1", "title": "Hi", "content": "One"},
+                    {"recipient": "usr_missing", "title": "Hi", "content": "Two"},
+                    {"recipient": "usr_1", "content": "No title"},
+                ],
+            },
+        )
+
+        assert response.status_code == 202
+        data = response.get_json()
+        assert data["job_id"]
+        assert (data["accepted"], data["rejected"]) == (1, 2)
+        assert [item["status"] for item in data["items"]] == [
+            "queued", "not_found", "invalid"
+        ]
+
+    def test_batch_accepts_ndjson(self, client, monkeypatch):
+        """Test an NDJSON batch carries its envelope on the first line."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        for user in ("usr_1", "usr_2"):
+            PushService.register_subscription(
+                user, {"endpoint": f"https://fcm.googleapis.com/fcm/send/{user}"}
+            )
+        lines = [
+            {"bot_id": "bot_001", "timestamp": int(time.time() * 1000)},
+            {"recipient": "usr_1", "title": "Hi", "content": "One"},
+            {"recipient_external_id": "usr_2", "title": "Hi", "content": "Two"},
+        ]
+
+        response = client.post(
+            "/api/send-notifications/batch",
+            data="\n".join(json.dumps(line) for line in lines) + "\n",
+            content_type="application/x-ndjson",
+        )
+
+        assert response.status_code == 202
+        assert response.get_json()["accepted"] == 2
+
+    def test_batch_rejects_invalid_envelope(self, client, monkeypatch):
+        """Test a batch without bot_id is rejected as a whole."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+
+        response = client.post(
+            "/api/send-notifications/batch",
+            json={"timestamp": int(time.time() * 1000), "notifications": []},
+        )
+
+        assert response.status_code == 400
+        assert "bot_id" in response.get_json()["error"]
+
+    def test_send_rejects_invalid_delivery_options(self, client, monkeypatch):
+        """Test an unknown urgency or malformed topic is a 400, not a 500."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        body = {
+            "bot_id": "bot_001",
+            "title": "Score",
+            "content": "1-0",
+            "timestamp": int(time.time() * 1000),
+        }
+
+        for options in ({"urgency": "urgent"}, {"topic": "not/base64url"}):
+            response = client.post("/api/send-notification", json={**body, **options})
+            assert response.status_code == 400
+
+        response = client.post(
+            "/api/send-notification",
+            json={**body, "ttl": 3600, "urgency": "high", "topic": "score"},
+        )
+        assert response.status_code == 202
+
+    def test_send_rejects_malformed_body(self, client, monkeypatch):
+        """Test bodies the parser or model reject are a 400, not a 500."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        body = {
+            "bot_id": "bot_001",
+            "title": "Score",
+            "content": "1-0",
+            "timestamp": int(time.time() * 1000),
+        }
+
+        for data in (
+            "",
+            "{not json",
+            json.dumps({**body, "timestamp": str(body["timestamp"])}),
+            json.dumps({**body, "timestamp": True}),
+            json.dumps({**body, "tags": ["sports"]}),
+        ):
+            response = client.post(
+                "/api/send-notification", data=data, content_type="application/json"
+            )
+            assert response.status_code == 400, data
+
+        # The IP check comes first, so a rejected client's body is never parsed
+        client.environ_base = {"REMOTE_ADDR": "192.168.1.1"}
+        response = client.post(
+            "/api/send-notification", data="{not json", content_type="application/json"
+        )
+        assert response.status_code == 403
+
+    def test_send_scheduled_notification(self, client, monkeypatch):
+        """Test send_at and delay_seconds queue a job for later."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        now_ms = int(time.time() * 1000)
+        body = {
+            "bot_id": "bot_001",
+            "title": "Reminder",
+            "content": "Starts in an hour",
+            "timestamp": now_ms,
+        }
+
+        response = client.post(
+            "/api/send-notification", json={**body, "send_at": now_ms + 3_600_000}
+        )
+        assert response.status_code == 202
+        data = response.get_json()
+        assert data["send_at"] == now_ms + 3_600_000
+        job = client.get(f"/api/jobs/{data['job_id']}").get_json()["job"]
+        assert job["status"] == "pending"
+        assert PushService.get_queue().scheduled_count() == 1
+
+        response = client.post(
+            "/api/send-notification",
+            json={**body, "content": "Soon", "delay_seconds": 600},
+        )
+        assert response.status_code == 202
+        assert response.get_json()["send_at"] >= now_ms + 600_000
+
+        for schedule in (
+            {"send_at": now_ms + 60_000, "delay_seconds": 60},
+            {"delay_seconds": -1},
+            {"send_at": now_ms + 365 * 86_400_000},
+        ):
+            response = client.post("/api/send-notification", json={**body, **schedule})
+            assert response.status_code == 400
+
+    def test_batch_supersedes_same_topic(self, client, monkeypatch):
+        """Test only the last notification per recipient and topic is queued."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        PushService.register_subscription(
+            "usr_1", {"endpoint": "https://fcm.googleapis.com/fcm/send/1"}
+        )
+
+        response = client.post(
+            "/api/send-notifications/batch",
+            json={
+                "bot_id": "bot_001",
+                "timestamp": int(time.time() * 1000),
+                "notifications": [
+                    {"recipient": "usr_1", "title": "Score", "content": "1-0",
+                     "topic": "score"},
+                    {"recipient": "usr_1", "title": "News", "content": "Hi"},
+                    {"recipient": "usr_1", "title": "Score", "content": "2-0",
+                     "topic": "score", "urgency": "high"},
+                ],
+            },
+        )
+
+        assert response.status_code == 202
+        data = response.get_json()
+        assert (data["accepted"], data["rejected"], data["superseded"]) == (2, 0, 1)
+        assert [item["status"] for item in data["items"]] == [
+            "superseded", "queued", "queued"
+        ]
+
+    def test_send_rate_limited_per_bot(self, client, monkeypatch):
+        """Test a bot over its broadcast limit gets 429 with Retry-After."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        monkeypatch.setattr(Config, "BROADCAST_RATE_BURST", 2)
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+
+        sent = iter(range(100))
+
+        def send(bot_id):
+            # Distinct content so no request is answered as a replay
+            return client.post(
+                "/api/send-notification",
+                json={
+                    "bot_id": bot_id,
+                    "title": "Hi",
+                    "content": f"All {next(sent)}",
+                    "timestamp": int(time.time() * 1000),
+                },
+            )
+
+        assert [send("bot_001").status_code for _ in range(3)] == [202, 202, 429]
+        response = send("bot_001")
+        assert int(response.headers["Retry-After"]) >= 1
+        assert send("bot_002").status_code == 202
+
+    def test_batch_counts_each_item_against_bot_limit(self, client, monkeypatch):
+        """Test a batch takes one bot token per notification."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        monkeypatch.setattr(Config, "BOT_RATE_BURST", 3)
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        PushService.register_subscription(
+            "usr_1", {"endpoint": "https://fcm.googleapis.com/fcm/send/1"}
+        )
+
+        def batch(size):
+            return client.post(
+                "/api/send-notifications/batch",
+                json={
+                    "bot_id": "bot_001",
+                    "timestamp": int(time.time() * 1000),
+                    "notifications": [
+                        {"recipient": "usr_1", "title": "Hi", "content": f"{size}/{n}"}
+                        for n in range(size)
+                    ],
+                },
+            )
+
+        assert batch(4).status_code == 413
+        assert batch(2).status_code == 202
+        response = batch(2)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_send_replay_returns_original_job(self, client, monkeypatch):
+        """Test a repeated request is answered with the first job, not re-sent."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        body = {
+            "bot_id": "bot_001",
+            "title": "Hi",
+            "content": "All",
+            "timestamp": int(time.time() * 1000),
+        }
+
+        first = client.post("/api/send-notification", json=body)
+        replay = client.post("/api/send-notification", json=body)
+
+        assert first.status_code == 202
+        assert replay.status_code == 200
+        assert replay.get_json()["duplicate"] is True
+        assert replay.get_json()["job_id"] == first.get_json()["job_id"]
+
+    def test_batch_replay_returns_original_job(self, client, monkeypatch):
+        """Test a repeated batch is answered with the first job, not re-sent."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        PushService.register_subscription(
+            "usr_1", {"endpoint": "https://fcm.googleapis.com/fcm/send/1"}
+        )
+        body = {
+            "bot_id": "bot_001",
+            "timestamp": int(time.time() * 1000),
+            "notifications": [{"recipient": "usr_1", "title": "Hi", "content": "One"}],
+        }
+
+        first = client.post("/api/send-notifications/batch", json=body)
+        replay = client.post("/api/send-notifications/batch", json=body)
+        body["notifications"][0]["content"] = "Two"
+        other = client.post("/api/send-notifications/batch", json=body)
+
+        assert first.status_code == 202
+        assert replay.status_code == 200
+        assert replay.get_json()["duplicate"] is True
+        assert replay.get_json()["job_id"] == first.get_json()["job_id"]
+        assert other.status_code == 202
+        assert other.get_json()["job_id"] != first.get_json()["job_id"]
+
+    def test_send_idempotency_key(self, client, monkeypatch):
+        """Test an Idempotency-Key dedupes retries and rejects a reused key."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        headers = {"Idempotency-Key": "order-42"}
+
+        def send(timestamp, content="All"):
+            return client.post(
+                "/api/send-notification",
+                headers=headers,
+                json={
+                    "bot_id": "bot_001",
+                    "title": "Hi",
+                    "content": content,
+                    "timestamp": timestamp,
+                },
+            )
+
+        now = int(time.time() * 1000)
+        first = send(now)
+        # A client retry re-signs with a new timestamp; the fields still match
+        retry = send(now + 1000)
+        assert retry.status_code == 200
+        assert retry.get_json()["job_id"] == first.get_json()["job_id"]
+        assert send(now, content="Other").status_code == 422
+
+    def test_send_requires_bot_jwt_when_enabled(self, client, monkeypatch):
+        """Test REQUIRE_BOT_JWT rejects missing or mismatched bot tokens."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        monkeypatch.setattr(Config, "REQUIRE_BOT_JWT", True)
+        monkeypatch.setattr(Config, "BOT_JWT_SECRET", "bot-secret")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        body = {
+            "bot_id": "bot_001",
+            "title": "Hi",
+            "content": "All",
+            "timestamp": int(time.time() * 1000),
+        }
+
+        def send(token=None):
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            return client.post("/api/send-notification", json=body, headers=headers)
+
+        assert send().status_code == 401
+        assert send(AuthService.generate_bot_jwt("bot_002")).status_code == 401
+        assert send(AuthService.generate_bot_jwt("bot_001")).status_code == 202
+
+    def test_metrics_endpoint(self, client, monkeypatch):
+        """Test metrics are IP-restricted and count accepted notifications."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        assert client.get("/api/metrics").status_code == 403
+
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Hi",
+                "content": "All",
+                "timestamp": int(time.time() * 1000),
+            },
+        )
+        response = client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        body = response.get_data(as_text=True)
+        assert 'webpush_notifications_accepted_total{kind="broadcast"}' in body
+        assert "# TYPE webpush_queue_depth gauge" in body
+        assert 'route="/api/send-notification",method="POST",status="202"' in body
+
+    def test_job_events_stream_until_done(self, client, monkeypatch):
+        """Test the SSE stream reports progress and ends with the final status."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        monkeypatch.setattr(Config, "PROGRESS_POLL_INTERVAL", 0.05)
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        response = client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Hi",
+                "content": "All",
+                "timestamp": int(time.time() * 1000),
+            },
+        )
+        events_url = response.get_json()["events_url"]
+
+        response = client.get(events_url)
+        body = response.get_data(as_text=True)
+        response.close()
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        events = [
+            json.loads(line[len("data: "):])
+            for line in body.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert events[-1]["status"] == "done"
+        assert client.get("/api/jobs/missing/events").status_code == 404
+
+    def test_job_events_streams_are_capped(self, client, monkeypatch):
+        """Test streams beyond PROGRESS_MAX_STREAMS get 503 until one closes."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        monkeypatch.setattr(Config, "PROGRESS_MAX_STREAMS", 1)
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        response = client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Hi",
+                "content": "Later",
+                "timestamp": int(time.time() * 1000),
+                "delay_seconds": 3600,
+            },
+        )
+        events_url = response.get_json()["events_url"]
+
+        first = client.get(events_url, buffered=False)
+        assert first.status_code == 200
+        assert next(first.response)
+        busy = client.get(events_url)
+        first.close()
+        again = client.get(events_url, buffered=False)
+        again.close()
+
+        assert busy.status_code == 503
+        assert busy.headers["Retry-After"] == "5"
+        assert busy.get_json()["status_url"].endswith(response.get_json()["job_id"])
+        assert again.status_code == 200
+
+    def test_register_with_tags_and_send_to_segment(self, client, monkeypatch):
+        """Test tags given at registration select recipients of a send."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+        response = client.post(
+            "/api/register-push-subscription",
+            json={
+                "user_external_id": "usr_1",
+                "subscription": {"endpoint": "https://fcm.googleapis.com/fcm/send/1"},
+                "tags": ["sports", "nba"],
+            },
+        )
+        assert response.status_code == 200
+        assert PushService.get_store().match_tags(("tag", "nba")) == {"usr_1"}
+
+        response = client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Tip-off",
+                "content": "Game starting",
+                "timestamp": int(time.time() * 1000),
+                "tags": "sports AND (nba OR nfl)",
+            },
+        )
+
+        assert response.status_code == 202
+        job = PushService.get_queue().get(response.get_json()["job_id"])
+        assert job["kind"] == "segment"
+
+    def test_send_rejects_invalid_tag_expression(self, client, monkeypatch):
+        """Test a malformed tag expression is rejected before queueing."""
+        monkeypatch.setattr(Config, "ALLOWED_BOT_IPS", "192.168.12.")
+        client.environ_base = {"REMOTE_ADDR": "192.168.12.10"}
+
+        response = client.post(
+            "/api/send-notification",
+            json={
+                "bot_id": "bot_001",
+                "title": "Tip-off",
+                "content": "Game starting",
+                "timestamp": int(time.time() * 1000),
+                "tags": "sports AND",
+            },
+        )
+
+        assert response.status_code == 400
@@ -9,6 +9,7 @@ import requests
 from flask import Flask
 
 from app import create_app
+from app.services.broadcast import DeliveryReport
 
 
 @pytest.fixture(scope="session")
@@ -53,7 +54,7 @@ class TestPushNotification:
         # Mock the external webpush call
         with patch("app.services.push_service.PushService.broadcast_notification") as mock_broadcast:
             # Pretend one user was successfully notified
-            mock_broadcast.return_value = 1
+            mock_broadcast.return_value = DeliveryReport(total=1, sent=1)
 
             # Create test payload
             payload = {
@@ -1,6 +1,11 @@
+import time
+
+import jwt
 import pytest
 
-from app.services.auth_service import AuthService
+from app.config import Config
+from app.services import auth_service
+from app.services.auth_service import AuthService, BotJwtVerifier, parse_bot_jwt_keys
 
 
 class TestAuthService:
@@ -42,3 +47,61 @@ class TestAuthService:
 
         assert token is not None
         assert isinstance(token, str)
+
+
+class TestBotJwtVerifier:
+    """Tests for cached, multi-key bot JWT verification."""
+
+    def test_key_rotation_by_kid(self):
+        """Test tokens signed with any configured key verify, others fail."""
+        verifier = BotJwtVerifier({"k1": "old", "k2": "new"}, default_key="base")
+        exp = int(time.time()) + 60
+
+        for kid, secret in (("k1", "old"), ("k2", "new")):
+            token = jwt.encode(
+                {"bot_id": "b", "exp": exp}, secret, headers={"kid": kid}
+            )
+            assert verifier.verify(token)["bot_id"] == "b"
+        assert verifier.verify(jwt.encode({"bot_id": "b"}, "base"))["bot_id"] == "b"
+
+        with pytest.raises(jwt.InvalidTokenError):
+            verifier.verify(jwt.encode({"bot_id": "b"}, "x", headers={"kid": "k3"}))
+        with pytest.raises(jwt.InvalidSignatureError):
+            verifier.verify(jwt.encode({"bot_id": "b"}, "old", headers={"kid": "k2"}))
+
+    def test_cached_until_exp(self, monkeypatch):
+        """Test a verified token skips decoding until it expires."""
+        verifier = BotJwtVerifier({}, default_key="s")
+        token = jwt.encode({"bot_id": "b", "exp": int(time.time()) + 60}, "s")
+        verifier.verify(token)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("decoded again")
+
+        monkeypatch.setattr(jwt, "decode", fail)
+        assert verifier.verify(token)["bot_id"] == "b"
+
+        later = time.time() + 120
+        monkeypatch.setattr(auth_service.time, "time", lambda: later)
+        with pytest.raises(AssertionError):
+            verifier.verify(token)
+
+    def test_cache_is_bounded(self):
+        """Test the least recently used tokens are evicted."""
+        verifier = BotJwtVerifier({}, default_key="s", max_entries=2)
+        exp = int(time.time()) + 60
+        for i in range(3):
+            verifier.verify(jwt.encode({"bot_id": f"b{i}", "exp": exp}, "s"))
+
+        assert len(verifier) == 2
+
+    def test_generate_bot_jwt_with_active_kid(self, monkeypatch):
+        """Test generated tokens carry the active kid and verify."""
+        monkeypatch.setattr(Config, "BOT_JWT_KEYS", "k1:old, k2:new")
+        monkeypatch.setattr(Config, "BOT_JWT_ACTIVE_KID", "k2")
+
+        token = AuthService.generate_bot_jwt("bot_001")
+
+        assert jwt.get_unverified_header(token)["kid"] == "k2"
+        assert AuthService.validate_bot_jwt(token)["bot_id"] == "bot_001"
+        assert parse_bot_jwt_keys("k1:old, k2:new") == {"k1": "old", "k2": "new"}
@@ -0,0 +1,127 @@
+import threading
+import time
+
+from app.services.broadcast import (
+    BroadcastEngine,
+    DeliveryOutcome,
+    classify_status,
+    parse_host_limits,
+)
+
+
+def make_targets(host: str, count: int) -> list:
+    return [
+        (f"{host}-{n}", {"endpoint": f"https://{host}/push/{n}"}) for n in range(count)
+    ]
+
+
+class TestBroadcastEngine:
+    """Tests for the concurrent broadcast engine."""
+
+    def test_aggregates_outcomes(self):
+        """Test sent/failed/expired counts are aggregated across workers."""
+        outcomes = {
+            "a-0": DeliveryOutcome.SENT,
+            "a-1": DeliveryOutcome.EXPIRED,
+            "a-2": DeliveryOutcome.FAILED,
+        }
+        engine = BroadcastEngine(max_workers=4, host_limit=4)
+
+        report = engine.run(make_targets("a", 3), lambda uid, sub: outcomes[uid])
+
+        assert (report.total, report.sent, report.failed, report.expired) == (3, 1, 1, 1)
+
+    def test_exception_counts_as_failure(self):
+        """Test a delivery that raises is recorded as failed."""
+
+        def deliver(uid, sub):
+            raise RuntimeError("boom")
+
+        report = BroadcastEngine(max_workers=2, host_limit=2).run(
+            make_targets("a", 2), deliver
+        )
+
+        assert report.failed == 2
+
+    def test_respects_per_host_limit(self):
+        """Test no host ever has more in-flight deliveries than its limit."""
+        lock = threading.Lock()
+        in_flight: dict[str, int] = {}
+        peak: dict[str, int] = {}
+
+        def deliver(uid, sub):
+            host = sub["endpoint"].split("/")[2]
+            with lock:
+                in_flight[host] = in_flight.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), in_flight[host])
+            time.sleep(0.01)
+            with lock:
+                in_flight[host] -= 1
+            return DeliveryOutcome.SENT
+
+        engine = BroadcastEngine(
+            max_workers=16,
+            host_limit=2,
+            host_overrides={"fcm.googleapis.com": 5},
+        )
+        targets = make_targets("web.push.apple.com", 20) + make_targets(
+            "fcm.googleapis.com", 20
+        )
+
+        report = engine.run(targets, deliver)
+
+        assert report.sent == 40
+        assert peak["web.push.apple.com"] <= 2
+        assert peak["fcm.googleapis.com"] <= 5
+
+    def test_empty_broadcast(self):
+        """Test broadcasting to nobody returns an empty report."""
+        report = BroadcastEngine(max_workers=2, host_limit=2).run([], None)
+        assert report.total == 0
+
+    def test_parse_host_limits(self):
+        """Test host override parsing ignores malformed entries."""
+        limits = parse_host_limits("web.push.apple.com=16, fcm.googleapis.com=x,bad")
+        assert limits == {"web.push.apple.com": 16}
+
+
+class TestClassifyStatus:
+    """Tests for push-service response classification."""
+
+    def test_classifies_statuses(self):
+        """Test each status class maps to its outcome."""
+        assert classify_status(201) is DeliveryOutcome.SENT
+        assert classify_status(404) is DeliveryOutcome.EXPIRED
+        assert classify_status(410) is DeliveryOutcome.EXPIRED
+        assert classify_status(413) is DeliveryOutcome.TOO_LARGE
+        assert classify_status(429) is DeliveryOutcome.RATE_LIMITED
+        assert classify_status(503) is DeliveryOutcome.TRANSIENT
+        assert classify_status(None) is DeliveryOutcome.TRANSIENT
+        assert classify_status(400) is DeliveryOutcome.FAILED
+
+
+class TestPruning:
+    """Tests for batched pruning of expired subscriptions."""
+
+    def test_expired_targets_are_pruned_in_batches(self):
+        """Test expired targets reach the prune callback in bounded batches."""
+        batches = []
+
+        def prune(batch):
+            batches.append(len(batch))
+            return len(batch)
+
+        engine = BroadcastEngine(
+            max_workers=4, host_limit=4, prune=prune, prune_batch_size=3
+        )
+        report = engine.run(
+            make_targets("a", 10),
+            lambda uid, sub: DeliveryOutcome.EXPIRED
+            if int(uid.split("-")[1]) < 7
+            else DeliveryOutcome.SENT,
+        )
+
+        assert report.expired == 7
+        assert report.pruned == 7
+        assert max(batches) <= 3
+        assert sum(batches) == 7
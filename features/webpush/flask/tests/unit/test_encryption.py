@@ -0,0 +1,69 @@
+import base64
+import json
+
+import http_ece
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.services.encryption import (
+    SubscriberKeyCache,
+    encrypt_payload,
+    prepare_payload,
+)
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).strip(b"=").decode()
+
+
+def make_subscriber():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public = private_key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    auth = b"0123456789abcdef"
+    subscription = {
+        "endpoint": "https://fcm.googleapis.com/fcm/send/abc",
+        "keys": {"p256dh": b64url(public), "auth": b64url(auth)},
+    }
+    return private_key, auth, subscription
+
+
+class TestEncryption:
+    """Tests for prepared-payload encryption."""
+
+    def test_subscriber_can_decrypt(self):
+        """Test the subscriber's private key decrypts the aes128gcm body."""
+        private_key, auth, subscription = make_subscriber()
+        keys = SubscriberKeyCache().get(subscription)
+
+        body = encrypt_payload(prepare_payload("Hello", "World"), keys)
+
+        plaintext = http_ece.decrypt(
+            body, private_key=private_key, auth_secret=auth, version="aes128gcm"
+        )
+        assert json.loads(plaintext) == {"title": "Hello", "content": "World"}
+
+    def test_each_message_uses_a_fresh_sender_key(self):
+        """Test two encryptions of the same payload differ."""
+        _, _, subscription = make_subscriber()
+        keys = SubscriberKeyCache().get(subscription)
+        payload = prepare_payload("Hello", "World")
+
+        assert encrypt_payload(payload, keys) != encrypt_payload(payload, keys)
+
+    def test_key_cache_reuses_parsed_keys(self):
+        """Test a subscriber's keys are parsed once and evicted LRU."""
+        cache = SubscriberKeyCache(max_entries=1)
+        _, _, first = make_subscriber()
+        _, _, second = make_subscriber()
+
+        assert cache.get(first) is cache.get(first)
+        cache.get(second)
+        assert len(cache) == 1
+
+    def test_invalid_keys_raise(self):
+        """Test a subscription without keys is rejected."""
+        with pytest.raises(ValueError):
+            SubscriberKeyCache().get({"endpoint": "https://example.com"})
@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.http_pool import PushHttpPool
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def push_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PushHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestPushHttpPool:
+    """Tests for the pooled push HTTP client."""
+
+    def test_connections_are_reused(self, push_server):
+        """Test sequential pushes to one origin share a single connection."""
+        pool = PushHttpPool(pool_size=4)
+
+        for n in range(10):
+            response = pool.post(f"{push_server}/push/{n}", b"x", {}, timeout=5)
+            assert response.status_code == 201
+
+        stats = pool.stats()
+        assert stats["requests"] == 10
+        assert stats["connections_created"] == 1
+        assert stats["reuse_ratio"] == 0.9
+        assert stats["open_connections"] == 1
+        pool.close()
+
+    def test_idle_origins_are_closed(self, push_server):
+        """Test an origin idle past the timeout has its connections closed."""
+        pool = PushHttpPool(pool_size=4, idle_timeout=0)
+        pool.post(f"{push_server}/push/1", b"x", {}, timeout=5)
+
+        pool.post(f"{push_server}/push/2", b"x", {}, timeout=5)
+
+        stats = pool.stats()
+        assert stats["connections_created"] == 2
+        assert stats["requests"] == 2
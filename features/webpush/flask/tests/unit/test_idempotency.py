@@ -0,0 +1,97 @@
+import pytest
+
+from app.services import idempotency
+from app.services.idempotency import ReplayCache, SqliteReplayCache, fingerprint
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    """Build replay caches of each backend (SQLite ones share one file)."""
+    if request.param == "memory":
+        cache = ReplayCache()
+        return lambda: cache
+    return lambda: SqliteReplayCache(tmp_path / "jobs.db")
+
+
+class TestReplayCache:
+    """Tests for the replay cache backends."""
+
+    def test_reserve_then_replay(self, make_cache):
+        """Test the first request holds a key and a repeat sees its job."""
+        cache = make_cache()
+
+        assert cache.reserve("k", "fp") is None
+        assert cache.reserve("k", "fp").job_id is None  # still in flight
+
+        cache.complete("k", "job-1")
+        entry = cache.reserve("k", "fp")
+        assert (entry.fingerprint, entry.job_id) == ("fp", "job-1")
+
+    def test_complete_without_job_releases_key(self, make_cache):
+        """Test a request that queued nothing can be sent again."""
+        cache = make_cache()
+        cache.reserve("k", "fp")
+        cache.complete("k", None)
+
+        assert cache.reserve("k", "fp") is None
+
+    def test_sqlite_keys_are_shared(self, tmp_path):
+        """Test a key reserved by one worker process is seen by another."""
+        first = SqliteReplayCache(tmp_path / "jobs.db")
+        second = SqliteReplayCache(tmp_path / "jobs.db")
+
+        assert first.reserve("k", "fp") is None
+        assert second.reserve("k", "fp").job_id is None
+        first.complete("k", "job-1")
+
+        assert second.reserve("k", "fp").job_id == "job-1"
+        second.complete("k", None)  # a duplicate never releases the key
+        assert first.reserve("k", "fp").job_id == "job-1"
+
+    def test_sqlite_keys_expire_after_window(self, tmp_path, monkeypatch):
+        """Test a SQLite key can be reserved again once its window passed."""
+        now = [1000.0]
+        monkeypatch.setattr(idempotency.time, "time", lambda: now[0])
+        cache = SqliteReplayCache(tmp_path / "jobs.db", window_seconds=60)
+        cache.reserve("k", "fp")
+        cache.complete("k", "job-1")
+
+        now[0] += 30
+        assert cache.reserve("k", "fp").job_id == "job-1"
+
+        now[0] += 40
+        assert cache.reserve("k", "other") is None
+        assert len(cache) == 1
+
+    def test_entries_expire_after_window(self, monkeypatch):
+        """Test whole buckets are dropped once older than the window."""
+        now = [1000.0]
+        monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+        cache = ReplayCache(window_seconds=60, bucket_seconds=10)
+        cache.reserve("old", "fp")
+        cache.complete("old", "job-1")
+
+        now[0] += 30
+        assert cache.reserve("old", "fp").job_id == "job-1"
+
+        now[0] += 50
+        assert cache.reserve("old", "fp") is None
+
+    def test_bounded_by_max_entries(self, monkeypatch):
+        """Test the oldest buckets are evicted when the cache is full."""
+        now = [0.0]
+        monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+        cache = ReplayCache(window_seconds=600, bucket_seconds=1, max_entries=3)
+        for i in range(5):
+            cache.reserve(f"k{i}", "fp")
+            now[0] += 1
+
+        assert len(cache) <= 3
+        assert cache.reserve("k4", "fp") is not None
+        assert cache.reserve("k0", "fp") is None
+
+
+def test_fingerprint_is_stable():
+    """Test equal fields hash alike regardless of dict order."""
+    assert fingerprint("bot", {"a": 1, "b": 2}) == fingerprint("bot", {"b": 2, "a": 1})
+    assert fingerprint("bot", "x") != fingerprint("bot", "y")
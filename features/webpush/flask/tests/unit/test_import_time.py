@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+# Loaded on first push, JWT or HTTP use only, never to start or probe the app
+LAZY_PACKAGES = ("cryptography", "http_ece", "py_vapid", "jwt", "requests")
+
+# Cold import of the app and its routes, generous enough for slow CI runners
+IMPORT_BUDGET_SECONDS = 1.0
+
+HEALTH_CHECK = """
+import json, sys
+from app import create_app
+create_app().test_client().get("/api/health")
+print(json.dumps(sorted({m.split(".")[0] for m in sys.modules})))
+"""
+
+
+def run_python(args: list[str], tmp_path: Path) -> subprocess.CompletedProcess:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(PROJECT_DIR),
+        "JOBS_DB": str(tmp_path / "jobs.db"),
+        "SUBSCRIPTIONS_DB": str(tmp_path / "subscriptions.db"),
+        "SUBSCRIPTIONS_FILE": str(tmp_path / "subscriptions.json"),
+    }
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def import_seconds(stderr: str) -> float:
+    """Sum the self times of an ``-X importtime`` report."""
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us = line.split(":", 1)[1].split("|")[0].strip()
+        if self_us.isdigit():
+            total_us += int(self_us)
+    return total_us / 1e6
+
+
+class TestImportTime:
+    """Tests that startup and health checks stay cheap to import."""
+
+    def test_health_check_skips_heavy_dependencies(self, tmp_path):
+        """Test crypto, JWT and HTTP stacks are not loaded to serve /api/health."""
+        loaded = set(json.loads(run_python(["-c", HEALTH_CHECK], tmp_path).stdout))
+
+        assert loaded.isdisjoint(LAZY_PACKAGES), loaded & set(LAZY_PACKAGES)
+
+    def test_app_import_time_within_budget(self, tmp_path):
+        """Test importing the app and its routes stays under the budget."""
+        result = run_python(
+            ["-X", "importtime", "-c", "import app.routes.api"], tmp_path
+        )
+
+        assert import_seconds(result.stderr) < IMPORT_BUDGET_SECONDS
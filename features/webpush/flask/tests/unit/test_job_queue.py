@@ -0,0 +1,300 @@
+import threading
+import time
+
+from app.services.broadcast import DeliveryReport
+from app.services.job_queue import JobQueue
+
+
+def wait_for_status(queue: JobQueue, job_id: str, status: str, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job and job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {queue.get(job_id)}")
+
+
+class TestJobQueue:
+    """Tests for the durable delivery queue."""
+
+    def test_job_runs_and_reports_counts(self, tmp_path):
+        """Test a submitted job is delivered and its counts recorded."""
+
+        def handler(job, progress):
+            return DeliveryReport(total=3, sent=2, expired=1)
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        try:
+            job_id = queue.submit("broadcast", {"title": "t", "content": "c"})
+            job = wait_for_status(queue, job_id, "done")
+        finally:
+            queue.shutdown(timeout=5)
+
+        assert (job["total"], job["sent"], job["expired"], job["pending"]) == (3, 2, 1, 0)
+
+    def test_progress_is_published_to_watchers(self, tmp_path):
+        """Test a running job publishes events ending with its final counts."""
+
+        def handler(job, progress):
+            progress(DeliveryReport(total=2, sent=1))
+            return DeliveryReport(total=2, sent=2)
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        try:
+            job_id = queue.submit("broadcast", {})
+            wait_for_status(queue, job_id, "done")
+            version, event = queue.progress.wait(job_id, 0, timeout=1)
+        finally:
+            queue.shutdown(timeout=5)
+
+        assert event["status"] == "done"
+        assert (event["sent"], event["pending"]) == (2, 0)
+        assert "per_second" in event
+
+    def test_failed_handler_marks_job_failed(self, tmp_path):
+        """Test a handler exception is recorded on the job."""
+
+        def handler(job, progress):
+            raise RuntimeError("push service down")
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        try:
+            job_id = queue.submit("broadcast", {})
+            job = wait_for_status(queue, job_id, "failed")
+        finally:
+            queue.shutdown(timeout=5)
+
+        assert job["error"] == "push service down"
+
+    def test_job_interrupted_by_shutdown_is_delivered_again(self, tmp_path):
+        """Test a shutdown error leaves the job to its lease instead of failing it."""
+        path = tmp_path / "jobs.db"
+
+        def handler(job, progress):
+            raise RuntimeError("cannot schedule new futures after interpreter shutdown")
+
+        first = JobQueue(path, handler, lease_seconds=0.2, poll_interval=0.05)
+        try:
+            job_id = first.submit("broadcast", {})
+            wait_for_status(first, job_id, "running")
+            time.sleep(0.1)
+        finally:
+            first.shutdown(timeout=5)
+        assert first.get(job_id)["status"] == "running"
+
+        second = JobQueue(path, lambda job, progress: DeliveryReport(total=1, sent=1),
+                          poll_interval=0.05)
+        second.start()
+        try:
+            job = wait_for_status(second, job_id, "done")
+        finally:
+            second.shutdown(timeout=5)
+
+        assert job["sent"] == 1
+
+    def test_failure_while_stopping_is_not_final(self, tmp_path):
+        """Test a handler failing because the queue stopped leaves the job running."""
+        started = threading.Event()
+
+        def handler(job, progress):
+            started.set()
+            time.sleep(0.2)
+            raise ConnectionError("pool closed")
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        job_id = queue.submit("broadcast", {})
+        assert started.wait(5)
+        queue.shutdown(timeout=5)
+
+        assert queue.get(job_id)["status"] == "running"
+
+    def test_pending_jobs_survive_restart(self, tmp_path):
+        """Test jobs accepted before a restart are delivered afterwards."""
+        path = tmp_path / "jobs.db"
+        delivered = []
+
+        first = JobQueue(path, lambda job, progress: DeliveryReport())
+        first.start = lambda: None  # simulate a crash before workers ran
+        job_id = first.submit("send", {"title": "t"})
+
+        def handler(job, progress):
+            delivered.append(job.id)
+            return DeliveryReport(total=1, sent=1)
+
+        second = JobQueue(path, handler, poll_interval=0.05)
+        second.start()
+        try:
+            wait_for_status(second, job_id, "done")
+        finally:
+            second.shutdown(timeout=5)
+
+        assert delivered == [job_id]
+
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        """Test a job left running by a dead process is picked up again."""
+        path = tmp_path / "jobs.db"
+        dead = JobQueue(path, lambda job, progress: DeliveryReport(), lease_seconds=0)
+        dead.start = lambda: None
+        job_id = dead.submit("send", {})
+        assert dead._claim().id == job_id
+
+        second = JobQueue(path, lambda job, progress: DeliveryReport(total=1, sent=1),
+                          poll_interval=0.05)
+        second.start()
+        try:
+            job = wait_for_status(second, job_id, "done")
+        finally:
+            second.shutdown(timeout=5)
+
+        assert job["sent"] == 1
+
+    def test_progress_is_visible_while_running(self, tmp_path):
+        """Test interim progress is written while the handler runs."""
+        release = threading.Event()
+
+        def handler(job, progress):
+            progress(DeliveryReport(total=10, sent=4))
+            release.wait(5)
+            return DeliveryReport(total=10, sent=10)
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        try:
+            job_id = queue.submit("broadcast", {})
+            job = wait_for_status(queue, job_id, "running")
+            deadline = time.monotonic() + 5
+            while job["sent"] != 4 and time.monotonic() < deadline:
+                time.sleep(0.01)
+                job = queue.get(job_id)
+            release.set()
+        finally:
+            queue.shutdown(timeout=5)
+
+        assert (job["sent"], job["pending"]) == (4, 6)
+
+    def test_topic_supersedes_pending_job(self, tmp_path):
+        """Test a job with the same coalesce key replaces one still pending."""
+        release = threading.Event()
+        ran = []
+
+        def handler(job, progress):
+            release.wait(5)
+            ran.append(job.payload["n"])
+            return DeliveryReport(total=1, sent=1)
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, workers=1, poll_interval=0.05)
+        try:
+            busy = queue.submit("send", {"n": 0})
+            wait_for_status(queue, busy, "running")
+            stale = queue.submit("send", {"n": 1}, coalesce_key="send:u1:score")
+            other = queue.submit("send", {"n": 2}, coalesce_key="send:u2:score")
+            latest = queue.submit("send", {"n": 3}, coalesce_key="send:u1:score")
+            release.set()
+            wait_for_status(queue, latest, "done")
+            wait_for_status(queue, other, "done")
+        finally:
+            queue.shutdown(timeout=5)
+
+        job = queue.get(stale)
+        assert (job["status"], job["superseded_by"]) == ("superseded", latest)
+        assert sorted(ran) == [0, 2, 3]
+
+    def test_scheduled_job_starts_on_time(self, tmp_path):
+        """Test a scheduled job waits for run_at and starts without polling."""
+        started = {}
+
+        def handler(job, progress):
+            started[job.payload["n"]] = time.time()
+            return DeliveryReport()
+
+        # A poll interval far longer than the delay: only the timer can fire it
+        queue = JobQueue(tmp_path / "jobs.db", handler, workers=1, poll_interval=30)
+        try:
+            run_at = time.time() + 0.3
+            later = queue.submit("send", {"n": 1}, run_at=run_at)
+            now = queue.submit("send", {"n": 0})
+            wait_for_status(queue, now, "done")
+            assert queue.get(later)["status"] == "pending"
+            assert (queue.scheduled_count(), queue.next_due()) == (1, run_at)
+
+            wait_for_status(queue, later, "done")
+        finally:
+            queue.shutdown(timeout=5)
+
+        assert run_at <= started[1] < run_at + 0.25
+        assert queue.get(later)["run_at"] == run_at
+        assert queue.scheduled_count() == 0
+
+    def test_scheduled_jobs_survive_restart_in_due_order(self, tmp_path):
+        """Test schedules are persistent and claimed earliest first."""
+        path = tmp_path / "jobs.db"
+        first = JobQueue(path, lambda job, progress: DeliveryReport())
+        first.start = lambda: None
+        base = time.time()
+        for n in (3, 1, 2):
+            first.submit("send", {"n": n}, run_at=base + n * 0.05)
+
+        order = []
+
+        def handler(job, progress):
+            order.append(job.payload["n"])
+            return DeliveryReport()
+
+        second = JobQueue(path, handler, workers=1, poll_interval=30)
+        try:
+            second.start()
+            deadline = time.monotonic() + 5
+            while len(order) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            second.shutdown(timeout=5)
+
+        assert order == [1, 2, 3]
+
+    def test_claim_and_counts_stay_indexed_with_many_schedules(self, tmp_path):
+        """Test a large schedule is not scanned to claim or count jobs."""
+        queue = JobQueue(tmp_path / "jobs.db", lambda job, progress: DeliveryReport())
+        queue.start = lambda: None
+        now = time.time()
+        conn = queue._connect()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO jobs (id, kind, payload, run_at, created_at, updated_at) "
+            "VALUES (?, 'send', '{}', ?, ?, ?)",
+            ((f"later-{n}", now + 3600 + n, now, now) for n in range(100_000)),
+        )
+        conn.execute("COMMIT")
+        due = queue.submit("send", {})
+        plans = []
+
+        def explain(sql):
+            if sql.startswith("SELECT"):
+                plans.extend(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+
+        conn.set_trace_callback(explain)
+        claimed = queue._claim()
+        counts = (queue.pending_count(), queue.scheduled_count(), queue.next_due())
+        conn.set_trace_callback(None)
+
+        assert claimed.id == due
+        assert counts == (1, 100_000, now + 3600)
+        assert len(plans) == 6
+        assert not [plan for plan in plans if "SCAN" in plan or "TEMP B-TREE" in plan]
+
+    def test_shutdown_timeout_covers_all_workers(self, tmp_path):
+        """Test shutdown gives up after one timeout, not one per worker."""
+        release = threading.Event()
+
+        def handler(job, progress):
+            release.wait(5)
+            return DeliveryReport()
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, workers=3, poll_interval=0.05)
+        try:
+            for _ in range(3):
+                wait_for_status(queue, queue.submit("send", {}), "running")
+            start = time.monotonic()
+            assert queue.shutdown(timeout=0.2) is False
+            assert time.monotonic() - start < 0.5
+        finally:
+            release.set()
@@ -0,0 +1,91 @@
+import threading
+
+from app.services.broadcast import DeliveryReport
+from app.services.metrics import (
+    DELIVERIES,
+    PRUNED,
+    SHARD_FOLD_THRESHOLD,
+    Registry,
+    record_report,
+)
+
+
+class TestMetrics:
+    """Tests for the per-thread counters and histograms."""
+
+    def test_counter_sums_threads(self):
+        """Test increments from many threads, including finished ones, add up."""
+        registry = Registry()
+        counter = registry.counter("c_total", "Test counter", ("host",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc("a")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc("b", amount=2)
+
+        assert counter.value("a") == 8000
+        assert counter.value("b") == 2
+        assert 'c_total{host="a"} 8000' in registry.render()
+
+    def test_finished_thread_shards_fold_without_scrapes(self):
+        """Test shards of short-lived threads do not pile up between scrapes."""
+        registry = Registry()
+        counter = registry.counter("c_total", "Test counter")
+
+        for _ in range(SHARD_FOLD_THRESHOLD * 4):
+            thread = threading.Thread(target=counter.inc)
+            thread.start()
+            thread.join()
+
+        assert len(counter._shards) <= SHARD_FOLD_THRESHOLD
+        assert counter.value() == SHARD_FOLD_THRESHOLD * 4
+
+    def test_histogram_render(self):
+        """Test buckets are cumulative and count matches +Inf."""
+        registry = Registry()
+        histogram = registry.histogram("h_seconds", "Test", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "/x")
+
+        lines = registry.render().splitlines()
+
+        assert 'h_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'h_seconds_bucket{route="/x",le="1"} 3' in lines
+        assert 'h_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'h_seconds_count{route="/x"} 4' in lines
+        assert 'h_seconds_sum{route="/x"} 6.05' in lines
+
+    def test_label_cardinality_is_capped(self):
+        """Test label values beyond the limit are folded into "other"."""
+        registry = Registry()
+        counter = registry.counter("c_total", "Test", ("host",))
+        counter.max_series = 2
+        for host in ("a", "b", "c", "d"):
+            counter.inc(host)
+
+        assert counter.value("other") == 2
+
+    def test_snapshot_merge(self):
+        """Test samples from another process's registry can be merged in."""
+        worker, parent = Registry(), Registry()
+        for registry in (worker, parent):
+            registry.histogram("h_seconds", "Test", ("host",), (1.0,))
+        worker._metrics["h_seconds"].observe(0.5, "fcm")
+
+        parent.merge(worker.snapshot())
+
+        assert parent._metrics["h_seconds"].count("fcm") == 1
+
+    def test_record_report(self):
+        """Test a delivery report is split into outcome counters."""
+        sent, pruned = DELIVERIES.value("sent"), PRUNED.value()
+        record_report(DeliveryReport(total=4, sent=2, failed=1, transient=1, pruned=1))
+
+        assert DELIVERIES.value("sent") == sent + 2
+        assert PRUNED.value() == pruned + 1
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from app.services.progress import ProgressHub
+
+
+class TestProgressHub:
+    """Tests for the latest-value progress fan-out."""
+
+    def test_many_watchers_see_latest_event(self):
+        """Test every watcher is woken with the newest event."""
+        hub = ProgressHub()
+        seen = []
+
+        def watch():
+            seen.append(hub.wait("job", 0, timeout=5))
+
+        watchers = [threading.Thread(target=watch) for _ in range(20)]
+        for watcher in watchers:
+            watcher.start()
+        time.sleep(0.05)
+        hub.publish("job", {"status": "running", "sent": 1})
+        for watcher in watchers:
+            watcher.join()
+
+        assert seen == [(1, {"status": "running", "sent": 1})] * 20
+
+    def test_slow_watcher_skips_to_latest(self):
+        """Test nothing is queued per watcher: only the newest event is kept."""
+        hub = ProgressHub()
+        for sent in range(5):
+            hub.publish("job", {"status": "running", "sent": sent})
+
+        assert hub.wait("job", 0, timeout=0) == (5, {"status": "running", "sent": 4})
+        assert hub.wait("job", 5, timeout=0.01) is None
+        assert hub.wait("other", 0, timeout=0.01) is None
+
+    def test_finished_jobs_are_dropped_after_retention(self):
+        """Test channels of finished jobs do not accumulate."""
+        hub = ProgressHub(retention=0)
+        hub.publish("a", {"status": "done"})
+        hub.publish("b", {"status": "done"})
+
+        assert len(hub) <= 1
+
+    def test_close_releases_watchers(self):
+        """Test closing the hub ends every wait, now and later."""
+        hub = ProgressHub()
+        hub.publish("job", {"status": "running", "sent": 1})
+        results = []
+        watchers = [
+            threading.Thread(target=lambda job=job: results.append(hub.wait(job, 1, 30)))
+            for job in ("job", "not-started")
+        ]
+        for watcher in watchers:
+            watcher.start()
+        time.sleep(0.05)
+
+        start = time.monotonic()
+        hub.close()
+        for watcher in watchers:
+            watcher.join(5)
+
+        assert time.monotonic() - start < 1
+        assert results == [None, None]
+        assert hub.closed
+        assert hub.wait("job", 1, timeout=30) is None
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from app.services.broadcast import DeliveryOutcome
+from app.services.push_options import PushOptions
+from app.services.push_service import PushService
+
+
+def make_subscription(n: int) -> dict:
+    return {"endpoint": f"https://fcm.googleapis.com/fcm/send/{n}"}
+
+
+class TestNotifyUser:
+    """Tests for delivering to every device of a user."""
+
+    def test_fans_out_to_all_devices(self, monkeypatch):
+        """Test each registered device gets the notification."""
+        for n in range(3):
+            PushService.register_subscription("usr_1", make_subscription(n))
+        delivered = []
+        lock = threading.Lock()
+
+        def deliver(user_id, subscription, payload, key_cache=None, options=None):
+            with lock:
+                delivered.append(subscription["endpoint"])
+            return DeliveryOutcome.SENT
+
+        monkeypatch.setattr(PushService, "deliver", deliver)
+
+        report = PushService.notify_user("usr_1", "Hello", "World")
+
+        assert (report.total, report.sent) == (3, 3)
+        assert sorted(delivered) == sorted(make_subscription(n)["endpoint"] for n in range(3))
+        assert PushService.send_notification("usr_1", "Hello", "World") is True
+
+
+class TestPushOptions:
+    """Tests for the Web Push TTL, Urgency and Topic headers."""
+
+    def test_headers_sent_with_delivery(self, monkeypatch):
+        """Test deliver() passes the message's options as request headers."""
+        sent = {}
+
+        class Response:
+            status_code = 201
+
+        class Pool:
+            def post(self, endpoint, body, headers, timeout):
+                sent.update(headers)
+                return Response()
+
+        class Vapid:
+            def headers_for(self, endpoint):
+                return {"Authorization": "vapid t=x, k=y"}
+
+        monkeypatch.setattr(PushService, "get_http_pool", lambda: Pool())
+        monkeypatch.setattr(PushService, "get_vapid_cache", lambda: Vapid())
+        monkeypatch.setattr(
+            "app.services.push_service.encrypt_payload", lambda payload, keys: payload
+        )
+        store = PushService.get_store()
+        monkeypatch.setattr(store, "subscriber_keys", lambda sub: None)
+
+        options = PushOptions(ttl=600, urgency="low", topic="score")
+        result = PushService.deliver(
+            "usr_1", make_subscription(1), b"{}", options=options
+        )
+
+        assert result.outcome is DeliveryOutcome.SENT
+        assert (sent["TTL"], sent["Urgency"], sent["Topic"]) == ("600", "low", "score")
+
+    def test_defaults_send_only_ttl(self):
+        """Test unset options fall back to the default TTL only."""
+        assert PushOptions().headers(default_ttl=0) == {"TTL": "0"}
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"ttl": -1}, {"urgency": "urgent"}, {"topic": "has space"}, {"topic": "x" * 33}],
+    )
+    def test_rejects_invalid_options(self, kwargs):
+        """Test out-of-range TTLs, unknown urgencies and bad topics."""
+        with pytest.raises(ValueError):
+            PushOptions(**kwargs)
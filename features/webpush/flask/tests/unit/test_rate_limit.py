@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from app.services.rate_limit import (
+    MemoryBucketStore,
+    Rate,
+    RateLimiter,
+    SqliteBucketStore,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Build bucket stores of each backend (SQLite ones share one file)."""
+    if request.param == "memory":
+        store = MemoryBucketStore()
+        return lambda: store
+    return lambda: SqliteBucketStore(tmp_path / "ratelimit.db")
+
+
+class TestTokenBucket:
+    """Tests for the token-bucket stores."""
+
+    def test_burst_then_retry_after(self, make_store):
+        """Test a bucket allows its burst, then reports when to retry."""
+        store = make_store()
+        rate = Rate(per_minute=60, burst=3)
+
+        assert [store.take("bot:a", rate) for _ in range(3)] == [0.0, 0.0, 0.0]
+        retry_after = store.take("bot:a", rate)
+
+        assert 0 < retry_after <= 1.0
+        assert store.take("bot:b", rate) == 0.0
+
+    def test_refills_over_time(self, make_store):
+        """Test tokens come back at the configured rate."""
+        store = make_store()
+        rate = Rate(per_minute=60 * 100, burst=1)  # 100 per second
+
+        assert store.take("bot:a", rate) == 0.0
+        assert store.take("bot:a", rate) > 0
+        time.sleep(0.03)
+        assert store.take("bot:a", rate) == 0.0
+
+    def test_sqlite_buckets_are_shared(self, tmp_path):
+        """Test two workers using one database draw from the same bucket."""
+        rate = Rate(per_minute=60, burst=2)
+        first = SqliteBucketStore(tmp_path / "ratelimit.db")
+        second = SqliteBucketStore(tmp_path / "ratelimit.db")
+
+        assert first.take("bot:a", rate) == 0.0
+        assert second.take("bot:a", rate) == 0.0
+        assert first.take("bot:a", rate) > 0
+
+    def test_memory_sweep_drops_refilled_buckets(self):
+        """Test idle buckets are dropped once the store is full."""
+        store = MemoryBucketStore(max_buckets=2)
+        rate = Rate(per_minute=60 * 1000, burst=1)
+        store.take("recipient:1", rate)
+        store.take("recipient:2", rate)
+        time.sleep(0.01)
+
+        store.take("recipient:3", rate)
+
+        assert set(store._buckets) == {"recipient:3"}
+
+
+class TestRateLimiter:
+    """Tests for named limits."""
+
+    def test_disabled_and_unknown_scopes_are_unlimited(self):
+        """Test a zero rate turns a limit off."""
+        limiter = RateLimiter(
+            MemoryBucketStore(),
+            {"bot": Rate(per_minute=0, burst=1), "recipient": Rate(60, 1)},
+        )
+
+        assert all(limiter.acquire("bot", "a") == 0.0 for _ in range(10))
+        assert limiter.acquire("other", "a") == 0.0
+        assert limiter.acquire("recipient", "u1") == 0.0
+        assert limiter.acquire("recipient", "u1") > 0
+
+    def test_burst_of_scope(self):
+        """Test the burst is reported for enabled scopes only."""
+        limiter = RateLimiter(
+            MemoryBucketStore(),
+            {"bot": Rate(per_minute=0, burst=1), "recipient": Rate(60, 5)},
+        )
+
+        assert limiter.burst("recipient") == 5
+        assert limiter.burst("bot") is None
+        assert limiter.burst("other") is None
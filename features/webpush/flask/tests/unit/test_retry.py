@@ -0,0 +1,96 @@
+import threading
+import time
+from email.utils import formatdate
+
+from app.services.broadcast import BroadcastEngine, DeliveryOutcome, DeliveryResult
+from app.services.retry import RetryPolicy, RetryScheduler, parse_retry_after
+
+
+class TestRetryPolicy:
+    """Tests for backoff and Retry-After handling."""
+
+    def test_backoff_grows_and_is_capped(self):
+        """Test delays grow exponentially, stay jittered and respect the cap."""
+        policy = RetryPolicy(max_attempts=10, base_delay=1, max_delay=8)
+
+        for attempt, ceiling in [(1, 1), (2, 2), (3, 4), (4, 8), (6, 8)]:
+            delay = policy.delay(attempt)
+            assert ceiling / 2 <= delay <= ceiling
+
+    def test_gives_up_after_max_attempts(self):
+        """Test no retry is scheduled once the attempt budget is spent."""
+        assert RetryPolicy(max_attempts=3).delay(3) is None
+
+    def test_honors_retry_after(self):
+        """Test a Retry-After delay is used instead of backoff."""
+        policy = RetryPolicy(base_delay=0.5, max_delay=60)
+        assert 30 <= policy.delay(1, retry_after=30) <= 30.5
+        assert policy.delay(1, retry_after=600) is None
+
+    def test_parse_retry_after(self):
+        """Test delta-seconds and HTTP-date Retry-After values."""
+        now = time.time()
+        assert parse_retry_after("120") == 120
+        assert 59 <= parse_retry_after(formatdate(now + 60, usegmt=True), now) <= 61
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+
+class TestRetryScheduler:
+    """Tests for the timer-heap scheduler."""
+
+    def test_runs_callbacks_in_due_order(self):
+        """Test callbacks fire in due-time order, not submission order."""
+        scheduler = RetryScheduler()
+        fired = []
+        done = threading.Event()
+
+        scheduler.schedule(0.06, lambda: (fired.append("late"), done.set()))
+        scheduler.schedule(0.02, lambda: fired.append("early"))
+        done.wait(2)
+        scheduler.shutdown()
+
+        assert fired == ["early", "late"]
+
+
+class TestBroadcastRetries:
+    """Tests for retries inside the broadcast engine."""
+
+    def test_transient_failures_are_retried(self):
+        """Test a transient failure is retried and then delivered."""
+        attempts = {}
+
+        def deliver(uid, sub):
+            attempts[uid] = attempts.get(uid, 0) + 1
+            if attempts[uid] < 3:
+                return DeliveryOutcome.TRANSIENT
+            return DeliveryOutcome.SENT
+
+        scheduler = RetryScheduler()
+        engine = BroadcastEngine(
+            max_workers=2,
+            host_limit=2,
+            retry_policy=RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.05),
+            scheduler=scheduler,
+        )
+        report = engine.run([("u1", {"endpoint": "https://a/1"})], deliver)
+        scheduler.shutdown()
+
+        assert (report.sent, report.retried, report.failed) == (1, 2, 0)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test a persistently throttled delivery ends up as failed."""
+        scheduler = RetryScheduler()
+        engine = BroadcastEngine(
+            max_workers=2,
+            host_limit=2,
+            retry_policy=RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.05),
+            scheduler=scheduler,
+        )
+        report = engine.run(
+            [("u1", {"endpoint": "https://a/1"})],
+            lambda uid, sub: DeliveryResult(DeliveryOutcome.RATE_LIMITED, 0.01),
+        )
+        scheduler.shutdown()
+
+        assert (report.failed, report.rate_limited, report.retried) == (1, 1, 1)
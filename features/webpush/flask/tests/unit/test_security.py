@@ -1,4 +1,15 @@
-from app.utils.security import validate_ip_prefix, validate_timestamp
+from types import SimpleNamespace
+
+from werkzeug.datastructures import Headers
+
+from app.config import Config
+from app.utils.security import (
+    IpAllowlist,
+    get_client_ip,
+    validate_ip_allowlist,
+    validate_ip_prefix,
+    validate_timestamp,
+)
 
 
 class TestSecurityUtils:
@@ -52,3 +63,56 @@ class TestSecurityUtils:
         """Test timestamp validation with invalid format."""
         result = validate_timestamp(-1)
         assert result is False
+
+    def test_validate_timestamp_accepts_float_and_rejects_out_of_range(self):
+        """Test fractional milliseconds pass and absurd values fail cleanly."""
+        import time
+
+        assert validate_timestamp(time.time() * 1000) is True
+        for value in (10**30, float("inf"), float("nan")):
+            assert validate_timestamp(value) is False
+
+
+class TestIpAllowlist:
+    """Tests for the CIDR allowlist and trusted-proxy handling."""
+
+    def test_legacy_prefix_matches_whole_octets(self):
+        """Test "192.168.1" no longer matches 192.168.10.x."""
+        assert validate_ip_prefix("192.168.1.5", "192.168.1")
+        assert not validate_ip_prefix("192.168.10.5", "192.168.1")
+
+    def test_many_ranges_v4_and_v6(self):
+        """Test membership across several CIDR blocks of both versions."""
+        allowlist = IpAllowlist("10.0.0.0/8, 192.168.12.7, fd00::/8, 100.64.0.")
+
+        assert "10.200.1.1" in allowlist
+        assert "192.168.12.7" in allowlist
+        assert "192.168.12.8" not in allowlist
+        assert "100.64.0.9" in allowlist
+        assert "fd12::1" in allowlist
+        assert "::ffff:10.1.2.3" in allowlist  # IPv4-mapped
+        assert "2001:db8::1" not in allowlist
+        assert "not-an-ip" not in allowlist
+
+    def test_overlapping_ranges_are_merged(self):
+        """Test adjacent and nested blocks collapse into one range."""
+        allowlist = IpAllowlist("10.0.0.0/24,10.0.1.0/24,10.0.0.128/25")
+
+        assert allowlist._ranges[4] == ([0x0A000000], [0x0A0001FF])
+
+    def test_invalid_entries_are_ignored(self):
+        """Test a bad entry does not disable the rest of the list."""
+        assert validate_ip_allowlist("10.0.0.1", "bogus/99,10.0.0.0/8")
+        assert not validate_ip_allowlist("10.0.0.1", "")
+
+    def test_forwarded_for_only_from_trusted_proxy(self, monkeypatch):
+        """Test X-Forwarded-For is ignored unless the peer is a trusted proxy."""
+        monkeypatch.setattr(Config, "TRUSTED_PROXIES", "10.0.0.0/8")
+        headers = Headers([("X-Forwarded-For", "6.6.6.6, 192.168.12.10, 10.0.0.2")])
+
+        direct = SimpleNamespace(remote_addr="203.0.113.9", headers=headers)
+        proxied = SimpleNamespace(remote_addr="10.0.0.1", headers=headers)
+
+        assert get_client_ip(direct) == "203.0.113.9"
+        # Rightmost untrusted hop; the spoofed leftmost entry is not used
+        assert get_client_ip(proxied) == "192.168.12.10"
@@ -0,0 +1,96 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app import serving
+from app.config import Config
+from app.services.broadcast import DeliveryReport
+from app.services.job_queue import JobQueue
+from app.services.push_service import PushService
+
+
+class FakeWorker:
+    """Just enough of a gunicorn worker for the hooks."""
+
+    def __init__(self, cfg=None):
+        self.alive = True
+        self.cfg = cfg or SimpleNamespace(set=lambda name, value: None)
+
+    def handle_exit(self, sig, frame):
+        self.alive = False
+
+
+def init_worker(monkeypatch, cfg=None):
+    """Run post_worker_init, returning the SIGTERM handler it installs."""
+    handlers = {}
+    monkeypatch.setattr(serving.signal, "signal", handlers.__setitem__)
+    worker = FakeWorker(cfg)
+    serving.post_worker_init(worker)
+    return worker, handlers[serving.signal.SIGTERM]
+
+
+class TestServing:
+    """Tests for the gunicorn settings and worker hooks."""
+
+    def test_settings_use_threaded_workers(self):
+        """Test the gunicorn settings come from Config and allow both drains."""
+        assert serving.SETTINGS["worker_class"] == "gthread"
+        assert serving.SETTINGS["workers"] == Config.WEB_WORKERS
+        assert serving.SETTINGS["graceful_timeout"] > Config.SHUTDOWN_DRAIN_SECONDS
+        assert serving.SETTINGS["graceful_timeout"] > Config.REQUEST_DRAIN_SECONDS
+
+    def test_worker_exit_waits_for_running_delivery(self, tmp_path, monkeypatch):
+        """Test a stopping worker lets its in-flight job finish."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def handler(job, progress):
+            started.set()
+            release.wait(5)
+            return DeliveryReport(total=1, sent=1)
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        PushService.set_queue(queue)
+        monkeypatch.setattr(Config, "SHUTDOWN_DRAIN_SECONDS", 5)
+        init_worker(monkeypatch)
+        job_id = queue.submit("send", {})
+        assert started.wait(5)
+
+        threading.Timer(0.1, release.set).start()
+        serving.worker_exit(None, None)
+
+        assert queue.get(job_id)["status"] == "done"
+
+    def test_sigterm_ends_streams_and_drains_alongside_requests(
+        self, tmp_path, monkeypatch
+    ):
+        """Test SIGTERM closes progress streams and starts the job drain at once."""
+        gunicorn_config = pytest.importorskip("gunicorn.config")
+        release = threading.Event()
+
+        def handler(job, progress):
+            release.wait(5)
+            return DeliveryReport(total=1, sent=1)
+
+        queue = JobQueue(tmp_path / "jobs.db", handler, poll_interval=0.05)
+        PushService.set_queue(queue)
+        # A real gunicorn config validates the value the handler sets
+        worker, on_sigterm = init_worker(monkeypatch, gunicorn_config.Config())
+        queue.submit("send", {})
+        watcher = threading.Thread(target=queue.progress.wait, args=("other", 0, 30))
+        watcher.start()
+
+        on_sigterm(serving.signal.SIGTERM, None)
+        watcher.join(5)
+
+        assert not watcher.is_alive()
+        assert worker.alive is False
+        assert worker.cfg.graceful_timeout == Config.REQUEST_DRAIN_SECONDS
+        release.set()
+        serving.worker_exit(None, None)
+
+        # A request still finishing queues its job without restarting delivery
+        job_id = queue.submit("send", {})
+        assert queue._threads == []
+        assert queue.get(job_id)["status"] == "pending"
@@ -0,0 +1,151 @@
+import base64
+import concurrent.futures
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.services import metrics
+from app.services.broadcast import DeliveryReport
+from app.services.push_service import PushService
+from app.services.sharding import per_shard_limit, run_sharded, shard_count, split
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).strip(b"=").decode()
+
+
+def make_subscription(endpoint: str) -> dict:
+    public = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        "endpoint": endpoint,
+        "keys": {"p256dh": b64url(public), "auth": b64url(b"0123456789abcdef")},
+    }
+
+
+def push_attempts() -> int:
+    """Deliveries recorded in PUSH_LATENCY, all hosts together."""
+    return sum(int(sum(s[:-1])) for s in metrics.PUSH_LATENCY.collect().values())
+
+
+class OneProcessPool(ProcessPoolExecutor):
+    """Process pool that runs every shard in the same reused worker."""
+
+    def __init__(self, max_workers=None, **kwargs):
+        super().__init__(max_workers=1, **kwargs)
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(410 if "/gone/" in self.path else 201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def push_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PushHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestSharding:
+    """Tests for multi-process broadcast sharding."""
+
+    def test_shard_count(self, monkeypatch):
+        """Test the shard count follows the setting and the minimum shard size."""
+        monkeypatch.setattr("os.cpu_count", lambda: 8)
+
+        assert shard_count("auto", 10_000, 1000) == 8
+        assert shard_count("auto", 3500, 1000) == 3
+        assert shard_count("4", 100_000, 1000) == 4
+        assert shard_count("0", 100_000, 1000) == 1
+        assert shard_count("", 100_000, 1000) == 1
+        assert shard_count("lots", 100_000, 1000) == 1
+
+    def test_split_is_round_robin(self):
+        """Test targets are dealt evenly and none are lost."""
+        targets = [(str(n), {}) for n in range(10)]
+
+        shards = split(targets, 3)
+
+        assert [len(shard) for shard in shards] == [4, 3, 3]
+        assert sorted(t for shard in shards for t in shard) == sorted(targets)
+
+    def test_per_shard_limit(self):
+        """Test host limits are divided between shards, never below one."""
+        assert per_shard_limit(8, 3) == 3
+        assert per_shard_limit(2, 4) == 1
+
+    def test_reports_merge(self):
+        """Test shard reports are summed field by field."""
+        merged = DeliveryReport.merged(
+            [DeliveryReport(total=3, sent=2, failed=1, transient=1),
+             DeliveryReport(total=2, sent=1, expired=1)]
+        )
+
+        assert merged == DeliveryReport(
+            total=5, sent=3, failed=1, expired=1, transient=1
+        )
+
+    def test_run_sharded_delivers_and_prunes(self, push_server, monkeypatch):
+        """Test two worker processes deliver and the parent prunes expired."""
+        # Worker processes are spawned and read their config from the environment
+        vapid_key = ec.generate_private_key(ec.SECP256R1()).private_numbers()
+        monkeypatch.setenv(
+            "VAPID_PRIVATE_KEY", b64url(vapid_key.private_value.to_bytes(32, "big"))
+        )
+        store = PushService.get_store()
+        targets = []
+        for n in range(6):
+            kind = "gone" if n % 3 == 0 else "push"
+            sub = make_subscription(f"{push_server}/{kind}/{n}")
+            store.upsert(f"user-{n}", sub)
+            targets.append((f"user-{n}", sub))
+        snapshots = []
+
+        report = run_sharded(
+            targets, b'{"title": "Hi"}', 2, PushService.prune_subscriptions,
+            on_progress=snapshots.append,
+        )
+
+        assert report.total == 6
+        assert report.sent == 4
+        assert report.expired == 2
+        assert report.pruned == 2
+        assert store.count() == 4
+        assert snapshots[-1] == report
+
+    def test_reused_worker_reports_each_shard_once(self, push_server, monkeypatch):
+        """Test a worker running two shards does not resend the first's metrics."""
+        vapid_key = ec.generate_private_key(ec.SECP256R1()).private_numbers()
+        monkeypatch.setenv(
+            "VAPID_PRIVATE_KEY", b64url(vapid_key.private_value.to_bytes(32, "big"))
+        )
+        monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", OneProcessPool)
+        targets = [
+            (f"user-{n}", make_subscription(f"{push_server}/push/{n}"))
+            for n in range(6)
+        ]
+        before = push_attempts()
+
+        report = run_sharded(
+            targets, b'{"title": "Hi"}', 2, PushService.prune_subscriptions
+        )
+
+        assert report.sent == 6
+        assert push_attempts() - before == 6
@@ -0,0 +1,109 @@
+from app.services import subscription_store
+from app.services.subscription_cache import SubscriptionCache
+from app.services.subscription_store import (
+    JsonSubscriptionStore,
+    SqliteSubscriptionStore,
+)
+
+
+def make_subscription(n: int) -> dict:
+    return {
+        "endpoint": f"https://fcm.googleapis.com/fcm/send/{n}",
+        "keys": {"p256dh": f"p256dh-{n}", "auth": f"auth-{n}"},
+    }
+
+
+class TestSubscriptionCache:
+    """Tests for the in-memory subscription snapshot."""
+
+    def test_loads_every_user_once(self, tmp_path):
+        """Test the first read loads the store and later reads reuse it."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+        store.upsert("usr_2", make_subscription(2))
+        cache = SubscriptionCache(store, check_interval=60)
+
+        snapshot = cache.snapshot()
+
+        assert snapshot.users["usr_1"] == (make_subscription(1),)
+        assert sorted(snapshot.targets, key=lambda t: t[0]) == [
+            ("usr_1", make_subscription(1)),
+            ("usr_2", make_subscription(2)),
+        ]
+        assert cache.snapshot() is snapshot
+
+    def test_own_writes_refresh_only_changed_users(self, tmp_path, monkeypatch):
+        """Test a write through the store is visible at once, without a reload."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+        store.upsert("usr_2", make_subscription(2))
+        cache = SubscriptionCache(store, check_interval=60)
+        before = cache.snapshot()
+
+        def fail():
+            raise AssertionError("full reload")
+
+        monkeypatch.setattr(store, "all", fail)
+        store.upsert("usr_3", make_subscription(3))
+        store.remove([("usr_1", make_subscription(1)["endpoint"])])
+
+        assert cache.get_many(["usr_1", "usr_2", "usr_3"]) == {
+            "usr_2": [make_subscription(2)],
+            "usr_3": [make_subscription(3)],
+        }
+        assert before.users["usr_1"] == (make_subscription(1),)
+
+    def test_sees_writes_from_another_process(self, tmp_path):
+        """Test a second store on the same database is picked up by the check."""
+        writer = SqliteSubscriptionStore(tmp_path / "subs.db")
+        writer.upsert("usr_1", make_subscription(1))
+        cache = SubscriptionCache(
+            SqliteSubscriptionStore(tmp_path / "subs.db"), check_interval=0
+        )
+        assert cache.get_devices("usr_1") == [make_subscription(1)]
+
+        writer.upsert("usr_1", make_subscription(2))
+        writer.upsert("usr_2", make_subscription(1))
+
+        assert cache.get_devices("usr_1") == [make_subscription(2)]
+        assert cache.get_devices("usr_2") == [make_subscription(1)]
+
+    def test_waits_for_check_interval(self, tmp_path):
+        """Test another process's writes are not looked for before the interval."""
+        writer = SqliteSubscriptionStore(tmp_path / "subs.db")
+        cache = SubscriptionCache(
+            SqliteSubscriptionStore(tmp_path / "subs.db"), check_interval=60
+        )
+        assert cache.get_devices("usr_1") == []
+
+        writer.upsert("usr_1", make_subscription(1))
+
+        assert cache.get_devices("usr_1") == []
+        cache.invalidate()
+        assert cache.get_devices("usr_1") == [make_subscription(1)]
+
+    def test_trimmed_change_log_reloads_everything(self, tmp_path, monkeypatch):
+        """Test falling further behind than the change log forces a full load."""
+        monkeypatch.setattr(subscription_store, "DEVICE_CHANGE_LOG_SIZE", 2)
+        writer = SqliteSubscriptionStore(tmp_path / "subs.db")
+        writer.upsert("usr_0", make_subscription(0))
+        cache = SubscriptionCache(
+            SqliteSubscriptionStore(tmp_path / "subs.db"), check_interval=0
+        )
+        cache.snapshot()
+
+        for n in range(1, 5):
+            writer.upsert(f"usr_{n}", make_subscription(n))
+
+        assert writer.device_changes_since(1) is None
+        assert len(cache.snapshot().users) == 5
+
+    def test_json_store_reloads_on_change(self, tmp_path):
+        """Test the JSON backend, which has no change log, is reloaded in full."""
+        store = JsonSubscriptionStore(tmp_path / "subscriptions.json")
+        cache = SubscriptionCache(store, check_interval=60)
+        assert cache.snapshot().users == {}
+
+        store.upsert("usr_1", make_subscription(1))
+
+        assert cache.get_devices("usr_1") == [make_subscription(1)]
@@ -0,0 +1,183 @@
+import json
+import sqlite3
+import threading
+
+from app.services.subscription_store import (
+    JsonSubscriptionStore,
+    SqliteSubscriptionStore,
+)
+
+
+def make_subscription(n: int) -> dict:
+    return {
+        "endpoint": f"https://fcm.googleapis.com/fcm/send/{n}",
+        "keys": {"p256dh": f"p256dh-{n}", "auth": f"auth-{n}"},
+    }
+
+
+class TestSqliteSubscriptionStore:
+    """Tests for the SQLite subscription store."""
+
+    def test_upsert_and_get(self, tmp_path):
+        """Test a subscription round-trips through the store."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+
+        assert store.get("usr_1") == make_subscription(1)
+        assert store.get("usr_missing") is None
+
+    def test_second_device_is_added_and_same_endpoint_refreshed(self, tmp_path):
+        """Test a user's devices are kept side by side, deduplicated by endpoint."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+        store.upsert("usr_1", make_subscription(2))
+        refreshed = {**make_subscription(1), "keys": {"p256dh": "new", "auth": "new"}}
+        store.upsert("usr_1", refreshed)
+
+        assert store.get("usr_1") == refreshed
+        assert store.get_devices("usr_1") == [refreshed, make_subscription(2)]
+        assert store.count() == 2
+
+    def test_device_cap_evicts_least_recently_seen(self, tmp_path):
+        """Test registering past the cap drops the stalest device."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db", max_devices_per_user=2)
+        for n in (1, 2, 3):
+            store.upsert("usr_1", make_subscription(n))
+
+        assert store.get_devices("usr_1") == [make_subscription(3), make_subscription(2)]
+
+    def test_endpoint_moves_between_users(self, tmp_path):
+        """Test a device registered by a new user leaves the previous one."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+        store.upsert("usr_2", make_subscription(1))
+
+        assert store.get("usr_1") is None
+        assert store.get("usr_2") == make_subscription(1)
+
+    def test_get_many_in_one_lookup(self, tmp_path):
+        """Test several users resolve at once, skipping unknown ones."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        for n in range(1200):
+            store.upsert(f"usr_{n}", make_subscription(n))
+
+        found = store.get_many([f"usr_{n}" for n in range(0, 1200, 2)] + ["usr_x"])
+
+        assert len(found) == 600
+        assert found["usr_1198"] == [make_subscription(1198)]
+        assert "usr_x" not in found
+
+    def test_uses_wal_journal(self, tmp_path):
+        """Test the database is opened in WAL mode."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        mode = store._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_concurrent_writers_do_not_lose_updates(self, tmp_path):
+        """Test concurrent registrations from separate connections all persist."""
+        path = tmp_path / "subs.db"
+        SqliteSubscriptionStore(path)
+
+        def register(start: int) -> None:
+            store = SqliteSubscriptionStore(path)
+            for n in range(start, start + 50):
+                store.upsert(f"usr_{n}", make_subscription(n))
+
+        threads = [threading.Thread(target=register, args=(i * 50,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert SqliteSubscriptionStore(path).count() == 200
+
+    def test_remove_only_matching_endpoint(self, tmp_path):
+        """Test pruning skips users who re-subscribed with a new endpoint."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+        store.upsert("usr_2", make_subscription(2))
+
+        removed = store.remove(
+            [
+                ("usr_1", make_subscription(1)["endpoint"]),
+                ("usr_2", make_subscription(99)["endpoint"]),
+            ]
+        )
+
+        assert removed == 1
+        assert store.get("usr_1") is None
+        assert store.get("usr_2") == make_subscription(2)
+
+    def test_migrates_json_once(self, tmp_path):
+        """Test the legacy JSON file is imported on first start only."""
+        json_path = tmp_path / "subscriptions.json"
+        json_path.write_text(json.dumps({"usr_1": make_subscription(1)}))
+        db_path = tmp_path / "subs.db"
+
+        store = SqliteSubscriptionStore(db_path, legacy_json_path=json_path)
+        assert store.get("usr_1") == make_subscription(1)
+
+        json_path.write_text(json.dumps({"usr_2": make_subscription(2)}))
+        store = SqliteSubscriptionStore(db_path, legacy_json_path=json_path)
+        assert store.get("usr_2") is None
+        assert store.count() == 1
+
+    def test_migrates_single_device_schema(self, tmp_path):
+        """Test a pre-multi-device database keeps its subscriptions."""
+        db_path = tmp_path / "subs.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE subscriptions (user_external_id TEXT PRIMARY KEY, "
+            "subscription TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO subscriptions VALUES (?, ?, 0)",
+            ("usr_1", json.dumps(make_subscription(1))),
+        )
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+
+        store = SqliteSubscriptionStore(db_path)
+
+        assert store.get_devices("usr_1") == [make_subscription(1)]
+        store.upsert("usr_1", make_subscription(2))
+        assert store.count() == 2
+
+    def test_device_changes_since(self, tmp_path):
+        """Test the change log lists the users written after a generation."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("usr_1", make_subscription(1))
+        generation = store.device_generation()
+
+        store.upsert("usr_2", make_subscription(1))
+        store.upsert("usr_3", make_subscription(3))
+
+        assert store.device_changes_since(generation) == (
+            store.device_generation(),
+            {"usr_1", "usr_2", "usr_3"},
+        )
+        assert store.device_changes_since(store.device_generation())[1] == set()
+        assert store.device_changes_since(store.device_generation() + 1) is None
+
+
+class TestJsonSubscriptionStore:
+    """Tests for the legacy JSON subscription store."""
+
+    def test_upsert_and_get(self, tmp_path):
+        """Test the JSON backend still round-trips subscriptions."""
+        store = JsonSubscriptionStore(tmp_path / "subscriptions.json")
+        store.upsert("usr_1", make_subscription(1))
+
+        assert store.get("usr_1") == make_subscription(1)
+        assert store.all() == {"usr_1": [make_subscription(1)]}
+
+    def test_reads_single_device_file(self, tmp_path):
+        """Test a file written before multi-device support still loads."""
+        path = tmp_path / "subscriptions.json"
+        path.write_text(json.dumps({"usr_1": make_subscription(1)}))
+        store = JsonSubscriptionStore(path)
+
+        store.upsert("usr_1", make_subscription(2))
+
+        assert store.get_devices("usr_1") == [make_subscription(2), make_subscription(1)]
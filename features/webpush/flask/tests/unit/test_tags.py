@@ -0,0 +1,96 @@
+import pytest
+
+from app.services.subscription_store import SqliteSubscriptionStore
+from app.services.tags import TagIndex, normalize_tags, parse_tag_expression
+
+
+def make_subscription(n: int) -> dict:
+    return {"endpoint": f"https://fcm.googleapis.com/fcm/send/{n}"}
+
+
+class TestTagExpressions:
+    """Tests for tag normalisation and expression parsing."""
+
+    def test_normalize_tags(self):
+        """Test tags are lower-cased and de-duplicated."""
+        assert normalize_tags(["Sports", "sports", "lang:en"]) == {"sports", "lang:en"}
+
+    @pytest.mark.parametrize("tags", ["sports", ["bad tag"], ["and"], [1]])
+    def test_normalize_rejects_invalid_tags(self, tags):
+        """Test malformed tags and reserved words are rejected."""
+        with pytest.raises(ValueError):
+            normalize_tags(tags)
+
+    def test_and_binds_tighter_than_or(self):
+        """Test operator precedence and parentheses."""
+        assert parse_tag_expression("a OR b and c") == (
+            "or", [("tag", "a"), ("and", [("tag", "b"), ("tag", "c")])]
+        )
+        assert parse_tag_expression("(a or b) AND c") == (
+            "and", [("or", [("tag", "a"), ("tag", "b")]), ("tag", "c")]
+        )
+
+    @pytest.mark.parametrize("expression", ["", "a AND", "(a OR b", "a b", "OR a"])
+    def test_rejects_malformed_expressions(self, expression):
+        """Test malformed expressions raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_tag_expression(expression)
+
+
+class TestTagIndex:
+    """Tests for the inverted tag index."""
+
+    def test_match(self):
+        """Test AND/OR expressions resolve against posting sets."""
+        index = TagIndex()
+        index.load({"u1": {"sports", "nba"}, "u2": {"sports", "nfl"}, "u3": {"news"}})
+
+        assert index.match(parse_tag_expression("sports AND nba")) == {"u1"}
+        assert index.match(parse_tag_expression("nba OR news")) == {"u1", "u3"}
+        assert index.match(parse_tag_expression("sports AND (nba OR nfl)")) == {
+            "u1", "u2"
+        }
+        assert index.match(parse_tag_expression("missing")) == set()
+
+    def test_assign_and_discard(self):
+        """Test incremental updates keep postings consistent."""
+        index = TagIndex()
+        index.assign("u1", {"a", "b"})
+        index.assign("u1", {"b", "c"})
+        index.discard(["u2"])
+
+        assert index.match(parse_tag_expression("a")) == set()
+        assert index.match(parse_tag_expression("b AND c")) == {"u1"}
+
+        index.discard(["u1"])
+        assert index.match(parse_tag_expression("b OR c")) == set()
+
+
+class TestStoreTags:
+    """Tests for tags persisted by the SQLite store."""
+
+    def test_tags_survive_reopen_and_follow_pruning(self, tmp_path):
+        """Test tags persist, and pruned subscriptions leave the index."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        store.upsert("u1", make_subscription(1), {"sports"})
+        store.upsert("u2", make_subscription(2), {"sports", "nba"})
+        store.upsert("u2", make_subscription(2))  # tags=None keeps them
+        expr = parse_tag_expression("sports")
+        assert store.match_tags(expr) == {"u1", "u2"}
+
+        store.remove([("u1", make_subscription(1)["endpoint"])])
+
+        assert store.match_tags(expr) == {"u2"}
+        reopened = SqliteSubscriptionStore(tmp_path / "subs.db")
+        assert reopened.match_tags(parse_tag_expression("nba")) == {"u2"}
+
+    def test_index_reloads_after_another_process_writes(self, tmp_path):
+        """Test a change made through another store instance is picked up."""
+        store = SqliteSubscriptionStore(tmp_path / "subs.db")
+        other = SqliteSubscriptionStore(tmp_path / "subs.db")
+        expr = parse_tag_expression("beta")
+        assert store.match_tags(expr) == set()
+
+        other.upsert("u1", make_subscription(1), {"beta"})
+
+        assert store.match_tags(expr) == {"u1"}
@@ -0,0 +1,60 @@
+import base64
+import json
+from unittest.mock import patch
+
+from py_vapid import Vapid
+
+from app.services.vapid import VapidHeaderCache
+
+
+def make_private_key() -> str:
+    vapid = Vapid()
+    vapid.generate_keys()
+    raw = vapid.private_key.private_numbers().private_value.to_bytes(32, "big")
+    return base64.urlsafe_b64encode(raw).strip(b"=").decode()
+
+
+def token_claims(headers: dict) -> dict:
+    token = headers["Authorization"].split("t=", 1)[1].split(",", 1)[0]
+    body = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+
+
+class TestVapidHeaderCache:
+    """Tests for the per-audience VAPID header cache."""
+
+    def test_reuses_token_per_audience(self):
+        """Test endpoints on the same push service share one signed token."""
+        cache = VapidHeaderCache(make_private_key(), "mailto:ops@example.com")
+
+        with patch.object(Vapid, "sign", wraps=cache._signer().sign) as sign:
+            first = cache.headers_for("https://fcm.googleapis.com/fcm/send/a")
+            second = cache.headers_for("https://fcm.googleapis.com/fcm/send/b")
+            other = cache.headers_for("https://web.push.apple.com/xyz")
+
+        assert first == second
+        assert first != other
+        assert sign.call_count == 2
+        assert token_claims(first)["aud"] == "https://fcm.googleapis.com"
+        assert token_claims(other)["sub"] == "mailto:ops@example.com"
+
+    def test_resigns_near_expiry(self):
+        """Test a token inside the refresh margin is replaced."""
+        cache = VapidHeaderCache(
+            make_private_key(), "mailto:ops@example.com", token_ttl=60, refresh_margin=60
+        )
+
+        first = cache.headers_for("https://fcm.googleapis.com/a")
+        with patch("app.services.vapid.time.time", return_value=token_claims(first)["exp"]):
+            second = cache.headers_for("https://fcm.googleapis.com/a")
+
+        assert token_claims(second)["exp"] > token_claims(first)["exp"]
+
+    def test_returned_headers_are_copies(self):
+        """Test callers cannot corrupt the cached headers."""
+        cache = VapidHeaderCache(make_private_key(), "mailto:ops@example.com")
+
+        headers = cache.headers_for("https://fcm.googleapis.com/a")
+        headers["TTL"] = "0"
+
+        assert "TTL" not in cache.headers_for("https://fcm.googleapis.com/a")
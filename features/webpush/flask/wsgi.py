@@ -0,0 +1,8 @@
+"""WSGI entry point for running under a server directly.
+
+    gunicorn -c python:app.serving -b 0.0.0.0:3000 wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()